@@ -1,14 +1,14 @@
 import json
 
-from openai import OpenAI
+
+from translation import TranslationService
 
 class DemoGE:
 
     def __init__(self):
         print("Intialize")
-        self.client = OpenAI(
-            # api_key=""
-        )
+        # process-wide async client pool (API key from OPENAI_API_KEY)
+        self.service = TranslationService()
 
         self.command : str = '''
            You are an expert data-cleaning assistant.
@@ -146,22 +146,8 @@ Now produce ONLY the JSON for the given inputs.
 
     def execute_api(self):
 
-        response = self.client.chat.completions.create(
-            model="gpt-4o-mini",
-            # You can also try "gpt-4o" or "gpt-4.1" (Codex is deprecated but GPT models now handle code better)
-            messages=[
-                {
-                    "role": "system",
-                    "content": f"{self.command}"
-                 },
-                {
-                    "role": "user",
-                    "content": f"Now convert the following English condition into JSON AST: \n{self.english_instruction}"
-                }
-            ]
-        )
-
-        res = response.choices[0].message.content
+        # cached + retried via the shared service; repeat instructions never reach the network
+        res = self.service.translate(self.command, self.english_instruction)
         print(json.dumps(res,indent=2))
         print(res)
 
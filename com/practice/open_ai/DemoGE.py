@@ -1,13 +1,15 @@
 import json
-from openai import OpenAI
+
+from english_filter import translate_filter
+from filter_ast import parse_ast
+from translation import TranslationService
 
 class DemoGE:
 
     def __init__(self):
         print("Intialize")
-        self.client = OpenAI(
-            # api_key=""
-        )
+        # process-wide async client pool (API key from OPENAI_API_KEY)
+        self.service = TranslationService()
 
         self.command : str = '''
             You are an expert programming assistant.
@@ -68,24 +70,12 @@ Example Output (JSON AST):
 
     def execute_api(self):
 
-        response = self.client.chat.completions.create(
-            model="gpt-4o-mini",
-            # You can also try "gpt-4o" or "gpt-4.1" (Codex is deprecated but GPT models now handle code better)
-            messages=[
-                {
-                    "role": "system",
-                    "content": f"{self.command}"
-                 },
-                {
-                    "role": "user",
-                    "content": f"Now convert the following English condition into JSON AST: \n{self.english_instruction}"
-                }
-            ]
-        )
-
-        res=response.choices[0].message.content
+        # parsed locally when the phrasing is simple; otherwise the cached + retried LLM call
+        res = translate_filter(self.english_instruction, self.service, self.command)
         print(json.dumps(res,indent=2))
-        print(res)
+        # validated, canonical AST (raises AstValidationError if the reply breaks the schema)
+        ast = parse_ast(res, strict=True)
+        print(json.dumps(ast.to_dict(), indent=2))
 
 
 if __name__ == '__main__':
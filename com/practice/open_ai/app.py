@@ -1,9 +1,16 @@
 import io
+import json
 import hashlib
 import streamlit as st
 import pandas as pd
 
-from data_io import load_df, to_csv_bytes
+from data_io import load_df
+from export import EXPORT_FORMATS, file_name, mime_type, spool_export
+from frame_cache import FrameCache
+from frame_index import attach_index
+from pipeline import Pipeline
+from preview import PREVIEW_MIN_ROWS, Refiner, corr_estimate, histogram_estimate, missing_estimate, sample_rows
+from viz_data import corr_matrix, histogram, histogram_chart
 
 st.set_page_config(page_title="Data Zen", layout="wide")
 
@@ -12,10 +19,40 @@ st.set_page_config(page_title="Data Zen", layout="wide")
 def _file_hash(file_bytes: bytes) -> str:
     return hashlib.sha256(file_bytes).hexdigest()
 
-@st.cache_data(show_spinner=False)
-def _cached_load_df(file_bytes: bytes):
-    # cache by file hash to avoid re-parsing on reruns
-    return load_df(file_bytes)
+@st.cache_resource(show_spinner=False)
+def _frame_cache() -> FrameCache:
+    # directory / size limit via DATA_ZEN_CACHE_DIR, DATA_ZEN_CACHE_MAX_BYTES
+    return FrameCache()
+
+@st.cache_resource(show_spinner=False)
+def _pipeline() -> Pipeline:
+    # stage results keyed by input hash + config, shared across reruns
+    return Pipeline()
+
+@st.cache_resource(show_spinner=False)
+def _refiner() -> Refiner:
+    # exact statistics computed in the background while a sampled preview is shown
+    return Refiner()
+
+def _upload_key(uploaded) -> str:
+    # hash each upload once, not on every rerun
+    hashes = st.session_state.setdefault("upload_hashes", {})
+    if uploaded.file_id not in hashes:
+        hashes[uploaded.file_id] = _file_hash(uploaded.getvalue())
+    return hashes[uploaded.file_id]
+
+def _cached_load_df(file_bytes: bytes, key: str = None):
+    # cache parsed frames by file hash on disk (Feather) so reruns and restarts skip the CSV parse;
+    # compacted dtypes (categories, narrow numbers) filter and clean like the parsed ones
+    key = key or _file_hash(file_bytes)
+    cache = _frame_cache()
+    df = cache.get(key)
+    if df is None:
+        df = load_df(file_bytes, compact=True)
+        cache.put(key, df)
+    # filter indexes are built on first use and saved next to the cached frame
+    attach_index(df, cache=cache, key=key)
+    return df
 
 def _missing_table(df: pd.DataFrame) -> pd.DataFrame:
     mc = df.isna().sum()
@@ -23,6 +60,12 @@ def _missing_table(df: pd.DataFrame) -> pd.DataFrame:
     return pd.DataFrame({"missing_count": mc, "missing_pct": pct}).sort_values(
     "missing_pct", ascending=False)
 
+def _histogram(df: pd.DataFrame, column: str, method: str) -> pd.DataFrame:
+    return histogram(df[column], method=method)
+
+def _corr(df: pd.DataFrame, columns: tuple) -> pd.DataFrame:
+    return corr_matrix(df, list(columns))
+
 # ---------- UI ----------
 
 st.title("Data Zen")
@@ -32,30 +75,174 @@ if not uploaded:
     st.info("Upload a CSV or TXT file to preview its contents and download it back.")
     st.stop()
 
-file_bytes = uploaded.getvalue()
+file_key = _upload_key(uploaded)
+pipeline = _pipeline()
 
 try:
-    df = _cached_load_df(file_bytes)
+    loaded = pipeline.load(file_key, lambda: _cached_load_df(uploaded.getvalue(), file_key))
 except Exception as e:
     st.error(f"Failed to read file: {e}")
     st.stop()
 
-st.success(f"Loaded {uploaded.name} · {df.shape[0]} rows × {df.shape[1]} columns")
-
-# Quick profile
+st.success(f"Loaded {uploaded.name} · {loaded.value.shape[0]} rows × {loaded.value.shape[1]} columns")
+
+# Filter & clean (only stages whose inputs changed are recomputed)
+
+with st.expander("Filter & clean", expanded=False):
+    config_text = st.text_area("Config JSON (filter_ast / cleaning_plan)", value="", height=200)
+config = {}
+if config_text.strip():
+    try:
+        config = json.loads(config_text)
+    except ValueError as e:
+        st.error(f"Invalid config JSON: {e}")
+    if not isinstance(config, dict):
+        st.error("Config JSON must be an object.")
+        config = {}
+
+result = pipeline.clean(pipeline.filter(loaded, config.get("filter_ast")), config.get("cleaning_plan"))
+df = result.value
+if result is not loaded:
+    st.info(f"Result · {df.shape[0]} rows × {df.shape[1]} columns")
+
+# Quick profile (sampled with 95% intervals in fast preview mode; exact values follow in the background)
+
+fast_preview = st.toggle("Fast preview (sampled statistics)", value=len(df) >= PREVIEW_MIN_ROWS, key="fast_preview")
+
+# poll for the exact table only while the refiner is still working on it
+refine_key = (result.key, "missing_table")
+refining = fast_preview and pipeline.peek(result, "missing_table") is None and not _refiner().failed(refine_key)
+
+@st.fragment(run_every=2 if refining else None)
+def _missing_panel():
+    exact = pipeline.peek(result, "missing_table")
+    if exact is not None or not fast_preview:
+        st.dataframe(exact if exact is not None else pipeline.derive(result, "missing_table", _missing_table),
+                     use_container_width=True)
+        if refining:
+            st.rerun()  # exact values are in: redraw the page without the refresh timer
+        return
+    sample = pipeline.derive(result, "sample", sample_rows)
+    st.dataframe(missing_estimate(sample), use_container_width=True)
+    if _refiner().failed(refine_key) is not None:
+        st.caption(f"Estimated from {len(sample.frame):,} of {sample.population:,} rows (95% intervals); "
+                   "exact values could not be computed.")
+        if refining:
+            st.rerun()
+        return
+    st.caption(f"Estimated from {len(sample.frame):,} of {sample.population:,} rows (95% intervals); "
+               "exact values are being computed.")
+    _refiner().submit(refine_key, pipeline.derive, result, "missing_table", _missing_table)
 
 with st.expander("Dataset overview", expanded=True):
     c1, c2 = st.columns([2, 1])
 with c1:
-    st.dataframe(df.head(50), use_container_width=True)
+    st.dataframe(pipeline.derive(result, "head", lambda d: d.head(50)), use_container_width=True)
 with c2:
     st.markdown("Columns:")
     st.write(list(df.columns))
     st.markdown("Dtypes:")
-    st.write(df.dtypes.astype(str))
+    st.write(df.dtypes.astype(str))  # frame metadata, exact at no cost
     st.markdown("Missing values:")
-    st.dataframe(_missing_table(df), use_container_width=True)
-
-# Download button
-
-st.download_button(label="⬇️ Download CSV",data=to_csv_bytes(df),file_name="data.csv",mime="text/csv",)
+    _missing_panel()
+
+# Charts (sampled with 95% intervals in fast preview mode; exact data follows in the background, as above)
+
+st.subheader("Numeric Column Distributions")
+num_cols = df.select_dtypes("number").columns.tolist()
+hist_cols = num_cols[:10]  # limit for speed
+bin_method = st.radio("Bins", ["fixed", "quantile"], horizontal=True)
+chart_sample = pipeline.derive(result, "sample", sample_rows) if fast_preview else None
+hist_charts = [("histogram", _histogram, (col, bin_method)) for col in hist_cols]
+corr_chart = ("corr", _corr, (tuple(num_cols),))
+charts = hist_charts + ([corr_chart] if num_cols else [])
+
+def _chart_key(name, config):
+    return (result.key, name) + config
+
+def _chart_pending(name, config):
+    return pipeline.peek(result, name, *config) is None and not _refiner().failed(_chart_key(name, config))
+
+charts_refining = chart_sample is not None and not chart_sample.exact and any(_chart_pending(n, c) for n, _, c in charts)
+
+def _exact_chart(name, fn, config):
+    # the exact chart data, or None while it is computed in the background (sampled mode only)
+    exact = pipeline.peek(result, name, *config)
+    if exact is not None or chart_sample is None or chart_sample.exact:
+        return exact if exact is not None else pipeline.derive(result, name, fn, *config)
+    if not _refiner().failed(_chart_key(name, config)):
+        _refiner().submit(_chart_key(name, config), pipeline.derive, result, name, fn, *config)
+    return None
+
+def _sample_note(name, config, interval):
+    status = ("exact values could not be computed" if _refiner().failed(_chart_key(name, config))
+              else "exact values are being computed")
+    return f"Estimated from {len(chart_sample.frame):,} of {chart_sample.population:,} rows; {interval}; {status}."
+
+@st.fragment(run_every=2 if charts_refining else None)
+def _charts_panel():
+    for name, fn, config in hist_charts:
+        col = config[0]
+        st.write(f"Histogram: {col}")
+        hist = _exact_chart(name, fn, config)
+        if hist is not None:
+            st.bar_chart(histogram_chart(hist))
+            continue
+        hist = histogram_estimate(chart_sample, col, method=bin_method)
+        st.bar_chart(histogram_chart(hist))
+        widest = int((hist["count_high"] - hist["count_low"]).max() // 2) if len(hist) else 0
+        st.caption(_sample_note(name, config, f"widest 95% interval ±{widest:,} rows per bar"))
+
+    st.subheader("Correlation Heatmap")
+    if num_cols:
+        import seaborn as sns, matplotlib.pyplot as plt
+        name, fn, config = corr_chart
+        corr = _exact_chart(name, fn, config)
+        if corr is None:
+            est = corr_estimate(chart_sample, num_cols)
+            corr = est["r"]
+            widest = float(((est["high"] - est["low"]) / 2).max().max())
+            st.caption(_sample_note(name, config, f"widest 95% interval ±{widest:.3f}"))
+        fig, ax = plt.subplots()
+        sns.heatmap(corr, ax=ax)
+        st.pyplot(fig)
+    else:
+        st.caption("No numeric columns.")
+    if charts_refining and not any(_chart_pending(n, c) for n, _, c in charts):
+        st.rerun()  # exact data is in: redraw the page without the refresh timer
+
+_charts_panel()
+
+# Download (streamed to a spooled temp file on request, once per result and format)
+
+e1, e2 = st.columns([1, 3])
+with e1:
+    export_fmt = st.selectbox("Export format", list(EXPORT_FORMATS), index=0)
+with e2:
+    if st.button("Prepare download"):
+        st.session_state["export_request"] = (result.key, export_fmt)
+
+def _export_file(request):
+    # one open export per session: replacing it closes (and deletes) the previous one
+    key, f = st.session_state.get("export_file", (None, None))
+    if key != request:
+        if f is not None:
+            f.close()
+        st.session_state.pop("export_file", None)
+        f = spool_export(df, request[1])
+        st.session_state["export_file"] = (request, f)
+    f.seek(0)
+    return f
+
+if st.session_state.get("export_request") == (result.key, export_fmt):
+    try:
+        export_file = _export_file((result.key, export_fmt))
+    except ImportError as e:
+        st.error(str(e))
+    else:
+        st.download_button(
+            label="⬇️ Download",
+            data=export_file,
+            file_name=file_name(uploaded.name, export_fmt),
+            mime=mime_type(export_fmt),
+        )
@@ -0,0 +1,278 @@
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import json
+import logging
+import os
+import platform
+import resource
+import sys
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+import synth
+from data_io import load_df
+from export import write_export
+from t import apply_filter_ast, run_cleaning_plan
+
+logger = logging.getLogger(__name__)
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+EXPORT_CASES = ["csv", "csv.gz", "parquet"]
+
+# ----------------------------------
+# Datasets: scaled customer extracts
+# ----------------------------------
+def customer_schema(null_ratio: float = 0.0, cardinality: Optional[int] = None) -> Dict[str, Any]:
+    """Schema shaped like customer_dataset_*.csv, plus the status/amount/country columns first.json uses."""
+    city: Dict[str, Any] = {"name": "city", "type": "String", "null_ratio": null_ratio}
+    if cardinality:
+        city["cardinality"] = cardinality
+    return {"fields": [
+        {"name": "customer_id", "type": "String"},
+        {"name": "first_name", "type": "String", "null_ratio": null_ratio},
+        {"name": "last_name", "type": "String"},
+        {"name": "company", "type": "String", "null_ratio": null_ratio},
+        {"name": "salary", "type": "Decimal", "constraints": "between 200000 and 30000000", "null_ratio": null_ratio},
+        {"name": "separtment", "type": "String", "constraints": "SET[HR,IT,FINANCE,SALES]", "null_ratio": null_ratio},
+        city,
+        {"name": "email", "type": "String", "null_ratio": null_ratio},
+        {"name": "phone_number", "type": "String"},
+        {"name": "date_of_birth", "type": "Date", "constraints": "1960-01-01 to 2005-12-31"},
+        {"name": "date_of_joining", "type": "Date", "constraints": "2000-01-01 to 2025-06-30", "null_ratio": null_ratio},
+        {"name": "age", "type": "Integer", "constraints": "between 18 and 70", "null_ratio": null_ratio},
+        {"name": "years_of_experience", "type": "Integer", "constraints": "between 0 and 45"},
+        {"name": "status", "type": "String", "constraints": "SET[pending,processing,shipped]"},
+        {"name": "amount", "type": "Decimal", "constraints": "between 0 and 2000", "null_ratio": null_ratio},
+        {"name": "country", "type": "String", "constraints": "SET[US,IN,GB,DE]"},
+    ]}
+
+
+def dataset_path(workdir: str, rows: int, null_ratio: float, cardinality: Optional[int], seed: int) -> str:
+    """Generate (once) and return the CSV for one dataset variant."""
+    name = f"customers_{rows}_n{null_ratio:g}_c{cardinality or 'default'}_s{seed}.csv"
+    path = os.path.join(workdir, name)
+    if not os.path.exists(path):
+        tmp = path + ".tmp"
+        synth.write_csv(customer_schema(null_ratio, cardinality), tmp, rows=rows, seed=seed)
+        os.replace(tmp, path)
+    return path
+
+
+# -------------------------
+# Workload
+# -------------------------
+def representative_asts() -> Dict[str, Dict[str, Any]]:
+    with open(os.path.join(HERE, "first.json")) as f:
+        first = json.load(f)
+    city_in = {"op": "CMP", "field": "city", "cmp": "in", "value": ["Mumbai", "Delhi", "Pune"]}
+    return {
+        "first_json": first,
+        "city_in": city_in,
+        "numeric_range": {"op": "AND", "children": [
+            {"op": "CMP", "field": "age", "cmp": ">=", "value": 25},
+            {"op": "CMP", "field": "age", "cmp": "<", "value": 40},
+            {"op": "CMP", "field": "salary", "cmp": "gt", "value": 1_000_000},
+        ]},
+        "shared_leaves": {"op": "OR", "children": [
+            {"op": "AND", "children": [city_in, {"op": "CMP", "field": "separtment", "cmp": "eq", "value": "IT"}]},
+            {"op": "AND", "children": [city_in, {"op": "CMP", "field": "years_of_experience", "cmp": "gt", "value": 20}]},
+            {"op": "NOT", "children": [{"op": "CMP", "field": "country", "cmp": "in", "value": ["US", "IN"]}]},
+        ]},
+    }
+
+
+def representative_plan() -> Dict[str, Any]:
+    return {"pandas": {"steps": [
+        {"fillna_categorical": {"columns": ["separtment", "city", "company"], "strategy": "constant", "value": "UNKNOWN"}},
+        {"fillna_numeric": {"columns": ["age", "salary", "amount"], "strategy": "constant", "value": 0}},
+        {"clip_values": {"columns": ["age"], "min": 18, "max": 65}},
+        {"clip_values": {"columns": ["amount"], "min": 0, "max": 1500}},
+    ]}}
+
+
+# -------------------------
+# Measurement
+# -------------------------
+def _rss_bytes() -> int:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        # Not Linux: fall back to the lifetime peak (kB on Linux, bytes on macOS).
+        scale = 1 if sys.platform == "darwin" else 1024
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+
+class _PeakRss:
+    """Sample RSS on a background thread while a stage runs."""
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.peak = max(self.peak, _rss_bytes())
+            self._stop.wait(self.interval)
+
+    def __enter__(self) -> "_PeakRss":
+        self.peak = _rss_bytes()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, _rss_bytes())
+
+
+def measure(fn: Callable[[], Any], repeat: int) -> Tuple[Any, float, int]:
+    """Run fn `repeat` times; return (last result, best wall seconds, peak RSS bytes)."""
+    best = float("inf")
+    peak = 0
+    result = None
+    for _ in range(repeat):
+        result = None
+        with _PeakRss() as rss, contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            result = fn()
+            best = min(best, time.perf_counter() - start)
+        peak = max(peak, rss.peak)
+    return result, best, peak
+
+
+def run_suite(
+    sizes: List[int],
+    null_ratios: List[float],
+    cardinalities: List[Optional[int]],
+    workdir: str,
+    repeat: int = 3,
+    seed: int = 0,
+) -> List[Dict[str, Any]]:
+    """Time every stage on every dataset variant and return result records."""
+    asts = representative_asts()
+    plan = representative_plan()
+    records: List[Dict[str, Any]] = []
+
+    def record(dataset: str, rows: int, stage: str, case: str, wall: float, peak: int, **extra: Any) -> None:
+        records.append({
+            "dataset": dataset, "rows": rows, "stage": stage, "case": case,
+            "wall_s": round(wall, 6),
+            "rows_per_s": round(rows / wall, 1) if wall > 0 else None,
+            "peak_rss_mb": round(peak / 2 ** 20, 1),
+            **extra,
+        })
+        logger.info("%-40s %-16s %-14s %9.4fs", dataset, stage, case, wall)
+
+    for rows in sizes:
+        for null_ratio in null_ratios:
+            for cardinality in cardinalities:
+                path = dataset_path(workdir, rows, null_ratio, cardinality, seed)
+                dataset = os.path.basename(path)[:-4]
+                with open(path, "rb") as f:
+                    file_bytes = f.read()
+
+                df, wall, peak = measure(lambda: load_df(file_bytes), repeat)
+                record(dataset, rows, "load_df", "default", wall, peak, bytes=len(file_bytes))
+
+                for name, ast in asts.items():
+                    mask, wall, peak = measure(lambda: apply_filter_ast(df, ast), repeat)
+                    record(dataset, rows, "apply_filter_ast", name, wall, peak, selected=int(mask.sum()))
+
+                _, wall, peak = measure(lambda: run_cleaning_plan(df, plan), repeat)
+                record(dataset, rows, "run_cleaning_plan", "representative", wall, peak)
+
+                for fmt in EXPORT_CASES:
+                    written, wall, peak = measure(lambda: write_export(df, fmt, os.devnull), repeat)
+                    record(dataset, rows, "export", fmt, wall, peak, bytes=written)
+                del df, file_bytes
+    return records
+
+
+# -------------------------
+# Baseline comparison
+# -------------------------
+def compare(results: List[Dict[str, Any]], baseline: List[Dict[str, Any]], tolerance: float) -> List[Dict[str, Any]]:
+    """Return one row per (dataset, stage, case) present in both runs, flagging slowdowns beyond tolerance."""
+    base = {(r["dataset"], r["stage"], r["case"]): r for r in baseline}
+    rows = []
+    for r in results:
+        b = base.get((r["dataset"], r["stage"], r["case"]))
+        if not b or not b.get("wall_s"):
+            continue
+        ratio = r["wall_s"] / b["wall_s"]
+        rows.append({
+            "dataset": r["dataset"], "stage": r["stage"], "case": r["case"],
+            "baseline_s": b["wall_s"], "wall_s": r["wall_s"], "ratio": round(ratio, 3),
+            "regression": ratio > 1 + tolerance,
+        })
+    return rows
+
+
+def _meta() -> Dict[str, Any]:
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark load / filter / clean / export on scaled customer data.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--null-ratios", type=float, nargs="+", default=[0.0, 0.2])
+    parser.add_argument("--cardinalities", type=int, nargs="+", default=[0],
+                        help="distinct city values; 0 = realistic city list")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workdir", default=os.path.join(tempfile.gettempdir(), "data_zen_bench"))
+    parser.add_argument("--out", default="bench_results.json")
+    parser.add_argument("--baseline", help="results JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="allowed slowdown before flagging (0.15 = 15%%)")
+    parser.add_argument("--save-baseline", action="store_true", help="also write results to --baseline")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    logging.getLogger("t").setLevel(logging.ERROR)
+    logging.getLogger("filter_plan").setLevel(logging.ERROR)
+    os.makedirs(args.workdir, exist_ok=True)
+
+    results = run_suite(args.sizes, args.null_ratios, [c or None for c in args.cardinalities],
+                        args.workdir, args.repeat, args.seed)
+    report: Dict[str, Any] = {"meta": _meta(), "results": results}
+
+    regressions = []
+    if args.baseline and os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline) as f:
+            comparison = compare(results, json.load(f)["results"], args.tolerance)
+        report["comparison"] = comparison
+        regressions = [c for c in comparison if c["regression"]]
+        for c in regressions:
+            logger.warning("REGRESSION %s %s %s: %.4fs -> %.4fs (x%.2f)",
+                           c["dataset"], c["stage"], c["case"], c["baseline_s"], c["wall_s"], c["ratio"])
+
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
+    if args.save_baseline and args.baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+    logger.info("Wrote %d result(s) to %s; %d regression(s).", len(results), args.out, len(regressions))
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
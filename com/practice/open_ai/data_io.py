@@ -2,30 +2,254 @@
 
 import io
 import csv
-from typing import Optional, Dict, Any
+import logging
+from typing import Optional, Dict, Any, List
 
+import numpy as np
 import pandas as pd
 
-def load_df(file_bytes: bytes,encoding: str = "utf-8", delimiter: str=None) -> pd.DataFrame:
+logger = logging.getLogger(__name__)
+
+def sniff_delimiter(sample: bytes, encoding: str = "utf-8") -> str:
+    try:
+        text = sample[: 64 * 1024].decode(encoding, errors="ignore")
+        dialect = csv.Sniffer().sniff(text, delimiters=[",", ";", "\t", "|"])
+        return dialect.delimiter
+    except Exception:
+        return ","
+
+
+# Date layouts tried by schema inference, in priority order.
+DATE_FORMATS = ["%Y-%m-%d", "%d/%m/%Y", "%Y/%m/%d", "%m/%d/%Y", "%d-%m-%Y", "%Y-%m-%d %H:%M:%S", "%Y-%m-%dT%H:%M:%S"]
+
+ENGINES = ("pandas", "pyarrow")
+
+
+def _date_formats(values: pd.Series, min_ratio: float) -> List[str]:
+    """Formats (from DATE_FORMATS) that together parse at least min_ratio of values."""
+    used: List[str] = []
+    parsed = pd.Series(False, index=values.index)
+    for fmt in DATE_FORMATS:
+        hit = pd.to_datetime(values, format=fmt, errors="coerce").notna() & ~parsed
+        if hit.any():
+            used.append(fmt)
+            parsed |= hit
+    return used if len(values) and parsed.mean() >= min_ratio else []
+
+
+def infer_schema(
+    file_bytes: bytes,
+    encoding: str = "utf-8",
+    delimiter: str = None,
+    sample_rows: int = 10_000,
+    category_ratio: float = 0.5,
+    max_categories: int = 1_000,
+    date_ratio: float = 0.95,
+) -> Dict[str, Any]:
+    """
+    Guess column types from the first `sample_rows` rows, read as text.
+    Returns {"dtype": {col: pandas dtype}, "parse_dates": {col: [formats]}}:
+      - all values numeric -> int64 (float64 if the sample has gaps or decimals);
+        values with a leading zero such as phone numbers stay text
+      - >= date_ratio of values match DATE_FORMATS -> parsed as datetime
+      - text with few distinct values -> category
+    Columns not listed are left to the parser.
+    """
     if delimiter is None:
-        try:
-            sample = file_bytes[: 64 * 1024].decode(encoding, errors="ignore")
-            dialect = csv.Sniffer().sniff(sample, delimiters=[",", ";", "\t", "|"])
-            delimiter = dialect.delimiter
-        except Exception:
-            delimiter = ","  #
-        # Wrap bytes in a buffer for pandas
-    buf = io.BytesIO(file_bytes)
-    df = pd.read_csv(
-        buf,
+        delimiter = sniff_delimiter(file_bytes, encoding)
+    sample = pd.read_csv(
+        io.BytesIO(file_bytes),
         sep=delimiter,
         encoding=encoding,
         on_bad_lines="skip",
-        low_memory=False
+        nrows=sample_rows,
+        dtype=str,
     )
+
+    dtype: Dict[str, str] = {}
+    parse_dates: Dict[str, List[str]] = {}
+    for col in sample.columns:
+        values = sample[col].dropna().str.strip()
+        values = values[values != ""]
+        if values.empty:
+            continue
+
+        numbers = pd.to_numeric(values, errors="coerce")
+        if numbers.notna().all() and not values.str.match(r"^[+-]?0\d").any():
+            integral = (numbers % 1 == 0).all() and len(values) == len(sample)
+            dtype[col] = "int64" if integral else "float64"
+            continue
+
+        formats = _date_formats(values, date_ratio)
+        if formats:
+            parse_dates[col] = formats
+            continue
+
+        n_unique = values.nunique()
+        if n_unique <= max_categories and n_unique <= category_ratio * len(values):
+            dtype[col] = "category"
+    return {"dtype": dtype, "parse_dates": parse_dates}
+
+
+def date_formats(dayfirst: bool = True) -> List[str]:
+    """DATE_FORMATS, with month-first layouts ahead of day-first ones unless dayfirst."""
+    return list(DATE_FORMATS) if dayfirst else sorted(DATE_FORMATS, key=lambda f: f.startswith("%d"))
+
+
+def parse_datetime_column(
+    s: pd.Series,
+    formats: Optional[List[str]] = None,
+    dayfirst: bool = True,
+    fallback: bool = False,
+    errors: str = "coerce",
+) -> pd.Series:
+    """
+    Parse text to datetime64[ns]: one vectorized pass per format (default
+    `date_formats(dayfirst)`), each over the values still unparsed, so earlier
+    formats win. With `fallback`, leftovers go through pandas' per-value parser
+    (format="mixed"). Unparsed values become NaT, or raise with errors="raise".
+    """
+    raw = s.astype("string").str.strip()
+    values = raw.to_numpy(dtype=object, na_value=None)
+    out = np.full(len(values), np.datetime64("NaT", "ns"))
+    todo = np.flatnonzero((raw.notna() & (raw != "")).to_numpy(dtype=bool))
+    passes = [dict(format=fmt) for fmt in (formats if formats is not None else date_formats(dayfirst))]
+    if fallback:
+        passes.append(dict(format="mixed", dayfirst=dayfirst))
+    for kwargs in passes:
+        if not len(todo):
+            break
+        parsed = pd.to_datetime(pd.Series(values[todo]), errors="coerce", **kwargs)
+        hit = parsed.notna().to_numpy()
+        out[todo[hit]] = parsed[hit].to_numpy(dtype="datetime64[ns]")
+        todo = todo[~hit]
+    if len(todo) and errors == "raise":
+        raise ValueError(f"{len(todo)} value(s) are not dates, e.g. {values[todo[0]]!r}")
+    return pd.Series(out, index=s.index, name=s.name)
+
+
+def _parse_dates(df: pd.DataFrame, parse_dates: Dict[str, List[str]]) -> pd.DataFrame:
+    for col, formats in parse_dates.items():
+        if col in df.columns:
+            df[col] = parse_datetime_column(df[col], formats)
     return df
 
 
+def load_df(
+    file_bytes: bytes,
+    encoding: str = "utf-8",
+    delimiter: str = None,
+    engine: str = "pandas",
+    dtype: Optional[Dict[str, Any]] = None,
+    usecols: Optional[List[str]] = None,
+    schema: Optional[Dict[str, Any]] = None,
+    compact: bool = False,
+) -> pd.DataFrame:
+    """
+    Parse an uploaded CSV.
+      - engine: "pandas" (C parser) or "pyarrow" (multi-threaded Arrow reader)
+      - dtype / usecols: explicit column contract, passed to the parser
+      - schema: output of `infer_schema` (or True to infer one here); explicit
+        `dtype` entries take precedence over inferred ones
+      - compact: run `compact_df` on the result
+    If the inferred dtypes do not fit rows beyond the sample, the file is
+    re-read with parser inference instead.
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine '{engine}'; expected one of {ENGINES}.")
+    if delimiter is None:
+        delimiter = sniff_delimiter(file_bytes, encoding)
+    if schema is True:
+        schema = infer_schema(file_bytes, encoding, delimiter)
+    schema = schema or {}
+
+    merged = {**(schema.get("dtype") or {}), **(dtype or {})}
+    if usecols is not None:
+        merged = {c: t for c, t in merged.items() if c in usecols}
+
+    def read(col_types: Optional[Dict[str, Any]]) -> pd.DataFrame:
+        # Wrap bytes in a buffer for pandas
+        buf = io.BytesIO(file_bytes)
+        options: Dict[str, Any] = {"low_memory": False} if engine == "pandas" else {"engine": "pyarrow"}
+        return pd.read_csv(
+            buf,
+            sep=delimiter,
+            encoding=encoding,
+            on_bad_lines="skip",
+            dtype=col_types or None,
+            usecols=usecols,
+            **options,
+        )
+
+    try:
+        df = read(merged)
+    except (ValueError, TypeError) as e:
+        if not schema.get("dtype"):
+            raise
+        logger.warning("Inferred schema did not fit the whole file (%s); re-reading without it.", e)
+        df = read(dtype)
+    df = _parse_dates(df, schema.get("parse_dates") or {})
+    return compact_df(df) if compact else df
+
+
+def _downcast(s: pd.Series) -> pd.Series:
+    if pd.api.types.is_bool_dtype(s) or not isinstance(s.dtype, np.dtype):
+        return s
+    if s.dtype.kind in "iu":
+        # Signed stays signed: unsigned arithmetic would wrap on later subtraction.
+        return pd.to_numeric(s, downcast="integer" if s.dtype.kind == "i" else "unsigned")
+    if s.dtype.kind == "f" and s.dtype.itemsize > 4:
+        narrow = s.astype("float32")
+        # Only keep float32 if every value survives the round trip.
+        if ((narrow.astype(s.dtype) == s) | s.isna()).all():
+            return narrow
+    return s
+
+
+def compact_df(
+    df: pd.DataFrame,
+    category_ratio: float = 0.5,
+    max_categories: int = 1_000,
+    arrow_strings: bool = False,
+) -> pd.DataFrame:
+    """
+    Return a memory-compacted copy of df:
+      - text columns with at most `max_categories` distinct values and
+        distinct/non-null <= `category_ratio` become `category`
+      - integers shrink to the narrowest int/uint width that holds them;
+        float64 becomes float32 only when no value changes
+      - remaining text becomes Arrow-backed `string[pyarrow]` if `arrow_strings`
+    Values are unchanged. Bytes before/after (deep) and per-column changes
+    are logged and stored in `df.attrs["compact_df"]`.
+    """
+    before = int(df.memory_usage(deep=True).sum())
+    out = df.copy(deep=False)
+    changed: Dict[str, str] = {}
+    for col in out.columns:
+        s = out[col]
+        if isinstance(s.dtype, pd.CategoricalDtype):
+            continue
+        if pd.api.types.is_object_dtype(s) or pd.api.types.is_string_dtype(s):
+            non_null = s.notna().sum()
+            n_unique = s.nunique(dropna=True)
+            if non_null and n_unique <= max_categories and n_unique <= category_ratio * non_null:
+                new = s.astype("category")
+            elif arrow_strings and pd.api.types.infer_dtype(s, skipna=True) == "string":
+                new = s.astype("string[pyarrow]")
+            else:
+                continue
+        else:
+            new = _downcast(s)
+        if new.dtype != s.dtype:
+            changed[col] = f"{s.dtype}->{new.dtype}"
+            out[col] = new
+
+    after = int(out.memory_usage(deep=True).sum())
+    out.attrs["compact_df"] = {"bytes_before": before, "bytes_after": after, "columns": changed}
+    logger.info("compact_df: %d -> %d bytes (%d column(s) changed)", before, after, len(changed))
+    return out
+
+
 def to_csv_bytes(df: pd.DataFrame) -> bytes:
-    print(df)
-    return df.to_csv(index=False).encode("utf-8")
\ No newline at end of file
+    # Builds the whole file in memory; export.iter_export streams it (and compresses).
+    return df.to_csv(index=False).encode("utf-8")
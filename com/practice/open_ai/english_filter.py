@@ -0,0 +1,496 @@
+from __future__ import annotations
+
+import logging
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from filter_ast import AstValidationError, parse_ast
+from translation import Columns, parse_json_response
+
+logger = logging.getLogger(__name__)
+
+
+class FilterParseError(ValueError):
+    """An instruction the fast path does not understand (or reads more than one way)."""
+
+
+# -------------------------
+# Vocabulary
+# -------------------------
+# Comparator phrases (lower-case words / operator tokens) -> prompt comparator name.
+_PHRASES: Dict[str, List[str]] = {
+    "eq": ["is", "equals", "is equal to", "equal to", "is exactly", "=", "=="],
+    "neq": ["is not", "is not equal to", "not equal to", "does not equal", "!=", "< >"],
+    "gt": [
+        "greater than", "is greater than", "more than", "is more than", "higher than", "is higher than",
+        "above", "is above", "over", "is over", "exceeds", "after", "is after", ">",
+    ],
+    "gte": [
+        "greater than or equal to", "is greater than or equal to", "at least", "is at least",
+        "no less than", "is no less than", ">=",
+    ],
+    "lt": [
+        "less than", "is less than", "fewer than", "lower than", "is lower than",
+        "below", "is below", "under", "is under", "before", "is before", "<",
+    ],
+    "lte": [
+        "less than or equal to", "is less than or equal to", "at most", "is at most",
+        "no more than", "is no more than", "<=",
+    ],
+    "in": ["in", "is in", "one of", "is one of", "any of", "is any of"],
+    "not_in": ["not in", "is not in", "not one of", "is not one of", "none of", "is none of"],
+    "between": ["between", "is between"],
+    "contains": ["contains", "includes"],
+    "starts_with": ["starts with", "begins with"],
+    "ends_with": ["ends with"],
+}
+
+# Negated phrases without a comparator of their own: NOT(cmp).
+_NEGATED: Dict[str, List[str]] = {
+    "gt": ["is not greater than", "is not more than", "is not above", "does not exceed"],
+    "lt": ["is not less than", "is not below"],
+    "between": ["not between", "is not between"],
+    "contains": ["does not contain", "does not include"],
+    "starts_with": ["does not start with", "does not begin with"],
+    "ends_with": ["does not end with"],
+}
+
+_CMP_TABLE: Dict[Tuple[str, ...], Tuple[str, bool]] = {}
+for _negated, _table in ((False, _PHRASES), (True, _NEGATED)):
+    for _cmp, _phrases in _table.items():
+        for _phrase in _phrases:
+            _CMP_TABLE[tuple(_phrase.split())] = (_cmp, _negated)
+del _negated, _table, _cmp, _phrases, _phrase
+_MAX_PHRASE = max(len(k) for k in _CMP_TABLE)
+_CMP_STARTS = {k[0] for k in _CMP_TABLE}
+
+_AND = {"and", "&", "&&"}
+_OR = {"or", "|", "||"}
+_CLOSE = {")", "]"}
+_TEXT_CMPS = {"contains", "starts_with", "ends_with"}
+_ORDERING_CMPS = {"gt", "gte", "lt", "lte", "between"}
+# cmps for which "field is A or B" means "field is A or field is B"; after a
+# negated one ("is not A or B") the reading is unclear
+_REPEATABLE = {"eq", "contains", "starts_with", "ends_with"}
+_CONSTANTS = {"true": True, "false": False, "null": None, "none": None}
+_VERBS = {"filter", "show", "select", "find", "get", "keep", "return", "list", "give", "fetch", "display"}
+
+_TOKEN = re.compile(
+    r"""\s*(?:
+        (?P<str>"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')
+      | (?P<op>>=|<=|!=|==|=|>|<|\(|\)|\[|\]|,)
+      | (?P<word>[^\s"'()\[\],<>=!]+(?:'[^\s"'()\[\],<>=!]+)*)
+    )""",
+    re.X,
+)
+_NUMBER = re.compile(r"[+-]?(?:\d+(?:\.\d*)?|\.\d+)(?:[eE][+-]?\d+)?")
+_LEAD_IN = re.compile(
+    r"^(?:please\s+)?(?:(?:filter|show|select|find|get|keep|return|list|give\s+me|fetch|display)\b[^()\[\]\"']*?\s+)?"
+    r"(?:where|whose|with|having|such\s+that)\s+",
+    re.I,
+)
+_CONTRACTION = re.compile(r"\b(is|does|do|are)n't\b", re.I)
+
+
+def _strip_instruction(text: str) -> str:
+    text = (text or "").strip()
+    if text.startswith("[") and text.endswith("]"):
+        depth = 0
+        for i, ch in enumerate(text):
+            depth += {"[": 1, "]": -1}.get(ch, 0)
+            if depth == 0:
+                break
+        if i == len(text) - 1:  # the outer brackets wrap the whole instruction
+            text = text[1:-1].strip()
+    text = _CONTRACTION.sub(r"\1 not", text.rstrip(" .;"))
+    text = _LEAD_IN.sub("", text, count=1)
+    first = text.split(None, 1)[0].lower() if text else ""
+    if first in _VERBS:
+        raise FilterParseError(f"no condition found after '{first}'")
+    return text
+
+
+def _tokenize(text: str) -> List[Tuple[str, str]]:
+    tokens: List[Tuple[str, str]] = []
+    pos, end = 0, len(text.rstrip())
+    while pos < end:
+        m = _TOKEN.match(text, pos)
+        if m is None or m.end() == pos:
+            raise FilterParseError(f"unexpected character {text[pos:].lstrip()[:1]!r}")
+        kind = m.lastgroup
+        tokens.append((kind, m.group(kind)))
+        pos = m.end()
+    return tokens
+
+
+def _scalar(word: str) -> Any:
+    if _NUMBER.fullmatch(word):
+        number = float(word)
+        return int(number) if number.is_integer() and not re.search(r"[.eE]", word) else number
+    return _CONSTANTS.get(word.lower(), word)
+
+
+# -------------------------
+# Parser
+# -------------------------
+class _Parser:
+    """
+    Recursive descent over the token list:
+
+        expr       := and_expr (OR and_expr)*
+        and_expr   := not_expr (AND not_expr)*
+        not_expr   := "not" not_expr | "(" expr ")" | comparison
+        comparison := [field] comparator value (OR value)*   (no field: the previous one)
+    """
+
+    def __init__(self, tokens: List[Tuple[str, str]], columns: Columns):
+        self.tokens = tokens
+        self.i = 0
+        self.columns = None if not columns else {self._key(c): c for c in columns}
+        self.last_field: Optional[str] = None
+
+    @staticmethod
+    def _key(name: str) -> str:
+        return re.sub(r"[\s_]+", "_", name.strip().lower())
+
+    # ---------- tokens ----------
+    def _low(self, i: int) -> Optional[str]:
+        if i >= len(self.tokens) or self.tokens[i][0] == "str":
+            return None
+        return self.tokens[i][1].lower()
+
+    def _phrase(self, i: int) -> Optional[Tuple[int, str, bool]]:
+        """Longest comparator phrase starting at token i: (length, cmp, negated)."""
+        if self._low(i) not in _CMP_STARTS:
+            return None
+        for n in range(min(_MAX_PHRASE, len(self.tokens) - i), 0, -1):
+            words = tuple(self._low(j) for j in range(i, i + n))
+            if None not in words and words in _CMP_TABLE:
+                return (n,) + _CMP_TABLE[words]
+        return None
+
+    def _at_boundary(self, i: int) -> bool:
+        low = self._low(i)
+        return i >= len(self.tokens) or low in _AND or low in _OR or low in _CLOSE
+
+    def _expect(self, text: str) -> None:
+        if self._low(self.i) != text:
+            found = self.tokens[self.i][1] if self.i < len(self.tokens) else "end of input"
+            raise FilterParseError(f"expected '{text}', found '{found}'")
+        self.i += 1
+
+    # ---------- grammar ----------
+    def parse(self) -> Dict[str, Any]:
+        if not self.tokens:
+            raise FilterParseError("empty instruction")
+        node = self.expr()
+        if self.i < len(self.tokens):
+            raise FilterParseError(f"unexpected '{self.tokens[self.i][1]}'")
+        return node
+
+    def _chain(self, op: str, words: set, operand: Any) -> Dict[str, Any]:
+        children = [operand()]
+        while self._low(self.i) in words or (self._low(self.i) == "," and self._low(self.i + 1) in words):
+            self.i += 1 if self._low(self.i) in words else 2
+            children.append(operand())
+        return children[0] if len(children) == 1 else {"op": op, "children": children}
+
+    def expr(self) -> Dict[str, Any]:
+        return self._chain("OR", _OR, self.and_expr)
+
+    def and_expr(self) -> Dict[str, Any]:
+        return self._chain("AND", _AND, self.not_expr)
+
+    def not_expr(self) -> Dict[str, Any]:
+        low = self._low(self.i)
+        if low == "not" and self._phrase(self.i) is None:
+            self.i += 1
+            return {"op": "NOT", "children": [self.not_expr()]}
+        if low == "(":
+            self.i += 1
+            node = self.expr()
+            self._expect(")")
+            return node
+        return self.comparison()
+
+    def comparison(self) -> Dict[str, Any]:
+        start = j = self.i
+        found = None
+        while j < len(self.tokens) and not self._at_boundary(j):
+            found = self._phrase(j)
+            if found is not None or self.tokens[j][0] != "word":
+                break
+            j += 1
+
+        if found is None:
+            raise FilterParseError("no comparator found in condition")
+
+        n, cmp, negated = found
+        words = [self.tokens[k][1] for k in range(start, j)]
+        if words and words[0].lower() == "the":
+            words = words[1:]
+        if words:
+            field = self._field(words)
+        elif self.last_field is not None:
+            field = self.last_field  # "amount above 5 and below 10"
+        else:
+            raise FilterParseError("comparison without a field")
+        self.i = j + n
+        self.last_field = field
+        values = [self._value(cmp)]
+        if cmp in _REPEATABLE and not negated:
+            values += self._alternatives(cmp)
+        leaves = [self._leaf(field, cmp, negated, v) for v in values]
+        return leaves[0] if len(leaves) == 1 else {"op": "OR", "children": leaves}
+
+    def _alternatives(self, cmp: str) -> List[Any]:
+        """
+        "country is US or UK": lone values after "or" test the same field and
+        comparator, grouped with the comparison itself, so they bind tighter
+        than a surrounding "and".
+        """
+        values = []
+        while self._low(self.i) in _OR:
+            save = self.i
+            self.i += 1
+            try:
+                value = self._single(text=cmp in _TEXT_CMPS)
+                lone = self._at_boundary(self.i)
+            except FilterParseError:
+                lone = False
+            if not lone:
+                self.i = save  # "or city is X": a new condition
+                break
+            values.append(value)
+        return values
+
+    def _field(self, words: List[str]) -> str:
+        field = "_".join(words)
+        if self.columns is None:
+            return field
+        resolved = self.columns.get(self._key(" ".join(words)))
+        if resolved is None:
+            raise FilterParseError(f"unknown column '{' '.join(words)}'")
+        return resolved
+
+    def _leaf(self, field: str, cmp: str, negated: bool, value: Any) -> Dict[str, Any]:
+        node = {"op": "CMP", "field": field, "cmp": cmp, "value": value}
+        return {"op": "NOT", "children": [node]} if negated else node
+
+    # ---------- values ----------
+    def _value(self, cmp: str) -> Any:
+        if cmp in ("in", "not_in"):
+            return self._list()
+        if cmp == "between":
+            lo = self._single(ordered=True)
+            self._expect("and")
+            return [lo, self._single(ordered=True)]
+        value = self._single(text=cmp in _TEXT_CMPS, ordered=cmp in _ORDERING_CMPS)
+        if not self._at_boundary(self.i) and self._low(self.i) != ",":
+            raise FilterParseError(f"unexpected '{self.tokens[self.i][1]}' after value")
+        return value
+
+    def _single(self, text: bool = False, ordered: bool = False) -> Any:
+        if self.i >= len(self.tokens):
+            raise FilterParseError("missing value")
+        kind, raw = self.tokens[self.i]
+        if kind == "str":
+            self.i += 1
+            return re.sub(r"\\(.)", r"\1", raw[1:-1])
+        if kind != "word":
+            raise FilterParseError(f"expected a value, found '{raw}'")
+        words = [raw]
+        self.i += 1
+        # bare multi-word values ("New York") end at a connective, punctuation or a comparator word
+        while (
+            self.i < len(self.tokens)
+            and self.tokens[self.i][0] == "word"
+            and not self._at_boundary(self.i)
+            and self._low(self.i) not in _CMP_STARTS
+        ):
+            words.append(self.tokens[self.i][1])
+            self.i += 1
+        joined = " ".join(words)
+        if ordered and len(words) > 1:
+            # "greater than 500 dollars": a unit or a phrase, not a value to compare with
+            raise FilterParseError(f"'{joined}' is not a single value to compare with")
+        return joined if text or len(words) > 1 else _scalar(joined)
+
+    def _list(self) -> List[Any]:
+        low = self._low(self.i)
+        if low in ("[", "("):
+            close = "]" if low == "[" else ")"
+            self.i += 1
+            items = [self._single()]
+            while self._low(self.i) == ",":
+                self.i += 1
+                items.append(self._single())
+            self._expect(close)
+            return items
+
+        items = self._bare_list()
+        if len(items) < 2:
+            # "status is in progress", "name is not in the list": not a membership test
+            raise FilterParseError(f"'in' / 'not in' needs a list, got {items[0]!r}")
+        return items
+
+    def _bare_list(self) -> List[Any]:
+        items = [self._single()]
+        while True:
+            low = self._low(self.i)
+            if low == "," and self._low(self.i + 1) not in _AND | _OR:
+                self.i += 1
+                items.append(self._single())
+                continue
+            break
+        # "US, UK or CA": a final or / and joins the list only if a lone value follows it
+        joiner = self.i + 1 if low == "," else self.i
+        if self._low(joiner) not in _AND | _OR:
+            return items
+        save, self.i = self.i, joiner + 1
+        try:
+            item = self._single()
+        except FilterParseError:
+            self.i = save
+            return items
+        if self._at_boundary(self.i):
+            items.append(item)
+        else:
+            self.i = save
+        return items
+
+
+def parse_english_filter(instruction: str, columns: Columns = None) -> Dict[str, Any]:
+    """
+    Parse a plain-English filter ("status is not shipped and (amount greater
+    than 500 or country is US)") into the filter AST schema of first.json,
+    without calling the LLM. AND binds tighter than OR, "not" tighter than
+    both, and parentheses group; so "a and b or c" is "(a and b) or c".
+
+    Comparators follow the prompt's names: eq, neq, gt, gte, lt, lte, in,
+    not_in, between ("between X and Y"), contains, starts_with, ends_with;
+    negated phrasings ("does not contain") become NOT nodes. Values are
+    quoted strings, numbers, true / false / null or bare words; lists are
+    "[a, b]", "(a, b)" or "a, b or c". In "country is US or UK" the lone value repeats the
+    field and comparator, grouped with the comparison ("x and country is US
+    or UK" is "x and (country is US or country is UK)"); "amount above 5 and
+    below 10" repeats the field.
+    With `columns`, field names are resolved case-insensitively (spaces and
+    underscores alike) and an unknown one is an error.
+
+    Raises FilterParseError for anything outside that grammar, and where
+    the reading is not certain: "status is not shipped or cancelled", an
+    in / not in without a list ("status is in progress"), or an ordering
+    comparator against several bare words ("greater than 500 dollars").
+    Those go to the LLM (see `translate_filter`).
+    """
+    return _Parser(_tokenize(_strip_instruction(instruction)), columns).parse()
+
+
+def translate_filter(
+    instruction: str,
+    service: Any,
+    system_prompt: str,
+    columns: Columns = None,
+) -> Dict[str, Any]:
+    """
+    The filter AST for an English instruction: from `parse_english_filter`
+    when it understands the instruction (and the result passes strict AST
+    validation), otherwise from `service.translate(system_prompt, ...)`.
+    """
+    try:
+        ast = parse_english_filter(instruction, columns)
+        parse_ast(ast, strict=True)
+        return ast
+    except (FilterParseError, AstValidationError) as e:
+        logger.info("Fast filter parser declined (%s); asking the LLM.", e)
+    return parse_json_response(service.translate(system_prompt, instruction, columns))
+
+
+# -------------------------
+# Corpus
+# -------------------------
+def parse_corpus() -> Dict[str, Optional[Dict[str, Any]]]:
+    """
+    Instructions the fast path must parse, with their expected ASTs, and
+    ones it must leave to the LLM (None). Add a case with every new phrasing.
+    """
+    cmp = lambda field, op, value: {"op": "CMP", "field": field, "cmp": op, "value": value}
+    AND = lambda *c: {"op": "AND", "children": list(c)}
+    OR = lambda *c: {"op": "OR", "children": list(c)}
+    NOT = lambda c: {"op": "NOT", "children": [c]}
+    shipped, amount, us = cmp("status", "neq", "shipped"), cmp("amount", "gt", 500), cmp("country", "eq", "US")
+    return {
+        "country is US": us,
+        "[Filter all those records where status is not shipped and (amount greater than 500 or country is US)]":
+            AND(shipped, OR(amount, us)),
+        # AND binds tighter than OR
+        "[Filter all those records where status is not shipped and amount greater than 500 or country is US]":
+            OR(AND(shipped, amount), us),
+        "status != shipped && amount > 500": AND(shipped, amount),
+        "show rows where amount is at least 100": cmp("amount", "gte", 100),
+        "age >= 25 and age < 40": AND(cmp("age", "gte", 25), cmp("age", "lt", 40)),
+        "salary is less than or equal to 1.5e6": cmp("salary", "lte", 1.5e6),
+        "amount at most 99.5": cmp("amount", "lte", 99.5),
+        "age between 30 and 35": cmp("age", "between", [30, 35]),
+        "age between 30 and 35 or salary over 1000": OR(cmp("age", "between", [30, 35]), cmp("salary", "gt", 1000)),
+        "age is not between 30 and 35": NOT(cmp("age", "between", [30, 35])),
+        "city is one of Mumbai, Delhi or Pune": cmp("city", "in", ["Mumbai", "Delhi", "Pune"]),
+        "city in [Mumbai, 'New Delhi'] and age > 30": AND(cmp("city", "in", ["Mumbai", "New Delhi"]), cmp("age", "gt", 30)),
+        "status is not one of (shipped, cancelled)": cmp("status", "not_in", ["shipped", "cancelled"]),
+        "country is none of US, IN and amount below 10": AND(cmp("country", "not_in", ["US", "IN"]), cmp("amount", "lt", 10)),
+        "country is US or UK": OR(us, cmp("country", "eq", "UK")),
+        # a repeated value groups with its comparison, not across the "and"
+        "amount greater than 500 and country is US or UK": AND(amount, OR(us, cmp("country", "eq", "UK"))),
+        "status is shipped and country is US or UK or CA": AND(
+            cmp("status", "eq", "shipped"), OR(us, cmp("country", "eq", "UK"), cmp("country", "eq", "CA"))),
+        "name starts with A or B and age > 30": AND(
+            OR(cmp("name", "starts_with", "A"), cmp("name", "starts_with", "B")), cmp("age", "gt", 30)),
+        "country is US or city is Pune": OR(us, cmp("city", "eq", "Pune")),
+        "amount above 5 and below 10": AND(cmp("amount", "gt", 5), cmp("amount", "lt", 10)),
+        "not (country is US or amount greater than 500)": NOT(OR(us, amount)),
+        "email contains example and first name starts with A": AND(
+            cmp("email", "contains", "example"), cmp("first_name", "starts_with", "A")),
+        "company doesn't end with 'Ltd'": NOT(cmp("company", "ends_with", "Ltd")),
+        "city is New York and is_active is true": AND(cmp("city", "eq", "New York"), cmp("is_active", "eq", True)),
+        "zip code equals \"00501\"": cmp("zip_code", "eq", "00501"),
+        "created after 2024-01-01": cmp("created", "gt", "2024-01-01"),
+        # left to the LLM
+        "status is not shipped or cancelled": None,
+        "amount greater than 500 country is US": None,
+        "show the top 10 customers by amount": None,
+        "records from last week": None,
+        "(country is US": None,
+        "status is in progress": None,
+        "status is in transit": None,
+        "name is not in the list": None,
+        "amount greater than 500 dollars": None,
+        "age between 30 years and 40": None,
+    }
+
+
+def check_corpus(
+    corpus: Optional[Dict[str, Optional[Dict[str, Any]]]] = None,
+    columns: Columns = None,
+) -> Dict[str, str]:
+    """
+    Parse every instruction (default `parse_corpus()`) and return
+    {instruction: problem} for those whose canonical AST differs from the
+    expected one, or which parse / fail against expectation; empty means
+    the parser agrees with the corpus.
+    """
+    failures: Dict[str, str] = {}
+    for instruction, expected in (corpus if corpus is not None else parse_corpus()).items():
+        try:
+            got = parse_english_filter(instruction, columns)
+        except FilterParseError as e:
+            if expected is not None:
+                failures[instruction] = f"not parsed: {e}"
+            continue
+        if expected is None:
+            failures[instruction] = f"parsed, expected an LLM fallback: {got}"
+            continue
+        want, have = parse_ast(expected, strict=True), parse_ast(got, strict=True)
+        if want != have:
+            failures[instruction] = f"expected {want.canonical}, got {have.canonical}"
+    return failures
@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import os
+import tempfile
+import zlib
+from typing import Any, BinaryIO, Dict, Iterator, Optional, Union
+
+import pandas as pd
+
+DEFAULT_CHUNK_ROWS = 100_000
+DEFAULT_SPOOL_BYTES = 32 * 1024 * 1024
+
+# format -> (file extension, MIME type)
+EXPORT_FORMATS: Dict[str, tuple] = {
+    "csv": (".csv", "text/csv"),
+    "csv.gz": (".csv.gz", "application/gzip"),
+    "csv.zst": (".csv.zst", "application/zstd"),
+    "parquet": (".parquet", "application/vnd.apache.parquet"),
+}
+
+
+def file_name(stem: str, fmt: str) -> str:
+    return os.path.splitext(stem)[0] + EXPORT_FORMATS[fmt][0]
+
+
+def mime_type(fmt: str) -> str:
+    return EXPORT_FORMATS[fmt][1]
+
+
+def iter_csv(df: pd.DataFrame, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> Iterator[bytes]:
+    """UTF-8 CSV (header first, no index) serialized `chunk_rows` rows at a time."""
+    for start in range(0, max(len(df), 1), chunk_rows):
+        yield df.iloc[start:start + chunk_rows].to_csv(index=False, header=start == 0).encode("utf-8")
+
+
+def _compressor(fmt: str) -> Any:
+    if fmt == "csv.gz":
+        return zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)  # gzip container
+    try:
+        import zstandard
+    except ImportError as e:
+        raise ImportError("zstd export requires zstandard (pip install zstandard).") from e
+    return zstandard.ZstdCompressor(level=3).compressobj()
+
+
+class _Drain:
+    """Write-only file object that hands back what was written since the last drain."""
+
+    def __init__(self):
+        self.closed = False
+        self._parts = []
+        self._pos = 0
+
+    def write(self, data: Any) -> int:
+        data = bytes(data)
+        self._parts.append(data)
+        self._pos += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._pos
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        out = b"".join(self._parts)
+        self._parts = []
+        return out
+
+
+def iter_parquet(df: pd.DataFrame, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> Iterator[bytes]:
+    """Parquet file bytes, one row group per `chunk_rows` rows, yielded as each group is written."""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("Parquet export requires pyarrow (pip install pyarrow).") from e
+
+    schema = pa.Schema.from_pandas(df, preserve_index=False)
+    sink = _Drain()
+    with pq.ParquetWriter(sink, schema) as writer:
+        for start in range(0, len(df), chunk_rows):
+            chunk = df.iloc[start:start + chunk_rows]
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+            data = sink.drain()
+            if data:
+                yield data
+    yield sink.drain()
+
+
+def iter_export(df: pd.DataFrame, fmt: str = "csv", chunk_rows: int = DEFAULT_CHUNK_ROWS) -> Iterator[bytes]:
+    """
+    Serialize df as `fmt` (see EXPORT_FORMATS) in pieces, so the whole file
+    never has to exist in memory at once. Nothing runs until iterated.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format '{fmt}'; use one of {sorted(EXPORT_FORMATS)}.")
+    if fmt == "parquet":
+        yield from iter_parquet(df, chunk_rows)
+        return
+    if fmt == "csv":
+        yield from iter_csv(df, chunk_rows)
+        return
+
+    compressor = _compressor(fmt)
+    for piece in iter_csv(df, chunk_rows):
+        data = compressor.compress(piece)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def write_export(
+    df: pd.DataFrame,
+    fmt: str,
+    target: Union[str, "os.PathLike[str]", BinaryIO],
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+) -> int:
+    """Stream df to a path or binary file object; returns bytes written."""
+    total = 0
+    f: Optional[BinaryIO] = None
+    try:
+        f = target if hasattr(target, "write") else open(target, "wb")
+        for data in iter_export(df, fmt, chunk_rows):
+            f.write(data)
+            total += len(data)
+    finally:
+        if f is not None and f is not target:
+            f.close()
+    return total
+
+
+def spool_export(
+    df: pd.DataFrame,
+    fmt: str = "csv",
+    max_memory: int = DEFAULT_SPOOL_BYTES,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+) -> BinaryIO:
+    """
+    Stream df into a temporary file (kept in memory up to `max_memory` bytes,
+    on disk beyond) and return it rewound; the caller closes it.
+    """
+    f = tempfile.SpooledTemporaryFile(max_size=max_memory)
+    try:
+        write_export(df, fmt, f, chunk_rows)
+    except BaseException:
+        f.close()
+        raise
+    f.seek(0)
+    return f
+
+
+def export_bytes(df: pd.DataFrame, fmt: str = "csv", chunk_rows: int = DEFAULT_CHUNK_ROWS) -> bytes:
+    """The whole export as one bytes object, for APIs that need one (e.g. st.download_button)."""
+    return b"".join(iter_export(df, fmt, chunk_rows))
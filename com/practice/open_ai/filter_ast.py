@@ -0,0 +1,326 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+
+from filter_plan import (
+    TEXT_CMPS,
+    BatchPlan,
+    FilterPlan,
+    between_bounds,
+    compile_filter_ast,
+    compile_filter_asts,
+    normalize_cmp,
+)
+
+logger = logging.getLogger(__name__)
+
+LOGICAL_OPS = {"AND", "OR", "NOT", "CMP"}
+LIST_CMPS = {"in", "not_in"}
+DEFAULT_PLAN_CACHE_SIZE = 256
+
+
+class AstValidationError(ValueError):
+    """A filter AST that does not follow the schema; `errors` lists "path: problem" strings."""
+
+    def __init__(self, errors: List[str]):
+        super().__init__("Invalid filter AST: " + "; ".join(errors))
+        self.errors = errors
+
+
+def _plain(value: Any) -> Any:
+    """NumPy scalars / tuples as plain JSON types, so equal filters serialize identically."""
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (list, tuple)):
+        return [_plain(v) for v in value]
+    if isinstance(value, dict):
+        return {str(k): _plain(v) for k, v in value.items()}
+    return value
+
+
+def _canonical_json(obj: Any) -> str:
+    return json.dumps(obj, sort_keys=True, separators=(",", ":"), default=repr)
+
+
+# -------------------------
+# Nodes
+# -------------------------
+class AstNode:
+    """
+    Immutable, canonical filter AST node. Equality and hashing are structural
+    (on `canonical`, the node's canonical JSON), so filters that only differ
+    in comparator spelling, nesting of AND/OR or child order compare equal.
+    """
+
+    __slots__ = ("canonical",)
+
+    def to_dict(self) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    def _seal(self) -> None:
+        self.canonical = _canonical_json(self.to_dict())
+
+    @property
+    def digest(self) -> str:
+        return hashlib.sha256(self.canonical.encode("utf-8")).hexdigest()
+
+    def __eq__(self, other: Any) -> bool:
+        return isinstance(other, AstNode) and self.canonical == other.canonical
+
+    def __hash__(self) -> int:
+        return hash(self.canonical)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.canonical})"
+
+
+class Const(AstNode):
+    """Always True (empty AND) or always False (empty NOT)."""
+
+    __slots__ = ("value",)
+
+    def __init__(self, value: bool):
+        self.value = bool(value)
+        self._seal()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"op": "AND", "children": []} if self.value else {"op": "NOT", "children": []}
+
+
+class Cmp(AstNode):
+    __slots__ = ("field", "cmp", "value")
+
+    def __init__(self, field: str, cmp: str, value: Any):
+        self.field = field
+        self.cmp = cmp
+        self.value = value
+        self._seal()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"op": "CMP", "field": self.field, "cmp": self.cmp, "value": self.value}
+
+
+class Not(AstNode):
+    __slots__ = ("child",)
+
+    def __init__(self, child: AstNode):
+        self.child = child
+        self._seal()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"op": "NOT", "children": [self.child.to_dict()]}
+
+
+class Logic(AstNode):
+    """AND / OR over two or more children, flattened, de-duplicated and sorted."""
+
+    __slots__ = ("op", "children")
+
+    def __init__(self, op: str, children: Tuple[AstNode, ...]):
+        self.op = op
+        self.children = children
+        self._seal()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"op": self.op, "children": [c.to_dict() for c in self.children]}
+
+
+# -------------------------
+# Canonicalization
+# -------------------------
+def _cmp_node(field: str, cmp: str, value: Any) -> AstNode:
+    value = _plain(value)
+    if cmp in LIST_CMPS:
+        if value is None:
+            return Const(False)  # evaluated as "no rows" by FilterPlan
+        if isinstance(value, list):
+            # membership is order- and duplicate-insensitive
+            # sorted / de-duplicated on the canonical JSON, but the values themselves are
+            # kept: Timestamps and dates serialize as repr strings that would match nothing
+            value = [v for _, v in sorted({_canonical_json(v): v for v in value}.items())]
+    elif cmp == "between":
+        try:
+            lo, hi = between_bounds(value)
+        except ValueError:
+            return Cmp(field, cmp, value)  # evaluated (and reported) as "no rows"
+        value = {k: v for k, v in (("min", lo), ("max", hi)) if v is not None}
+    return Cmp(field, cmp, value)
+
+
+def _logic(op: str, parts: List[AstNode]) -> AstNode:
+    if not parts:
+        return Const(True)  # nothing to test: no-op filter, whatever the op
+    neutral = op == "AND"
+    flat: Dict[str, AstNode] = {}
+    for part in parts:
+        if isinstance(part, Const):
+            if part.value != neutral:
+                return Const(not neutral)
+            continue
+        for child in (part.children if isinstance(part, Logic) and part.op == op else (part,)):
+            flat[child.canonical] = child
+    if not flat:
+        return Const(neutral)
+    if len(flat) == 1:
+        return next(iter(flat.values()))
+    return Logic(op, tuple(flat[k] for k in sorted(flat)))
+
+
+def _negate(node: AstNode) -> AstNode:
+    if isinstance(node, Const):
+        return Const(not node.value)
+    if isinstance(node, Not):
+        return node.child
+    return Not(node)
+
+
+def parse_ast(raw: Any, strict: bool = False) -> AstNode:
+    """
+    Validate a filter AST (the `t.apply_filter_ast` schema) and return its
+    canonical form:
+
+    - comparator aliases map to one name (neq / != -> ne, gte / >= -> ge, ...);
+    - CMP nodes with children become the AND of the predicate and children;
+    - nested AND-in-AND / OR-in-OR are flattened, duplicate children dropped
+      and children sorted, so child order does not matter;
+    - constants are folded and double negations removed;
+    - in / not_in value lists are sorted and de-duplicated, and between
+      values become {"min", "max"} (open bounds dropped).
+
+    With strict=True any schema problem raises AstValidationError. Otherwise
+    problems are logged and handled exactly as FilterPlan does (unknown op
+    -> AND, unknown comparator -> matches nothing, non-object node -> no-op),
+    so the canonical AST always filters the same rows as the raw one.
+    """
+    errors: List[str] = []
+
+    def problem(path: str, message: str) -> None:
+        errors.append(f"{path}: {message}")
+        if not strict:
+            logger.warning("Filter AST %s: %s", path, message)
+
+    def build(node: Any, path: str) -> AstNode:
+        if not isinstance(node, dict):
+            problem(path, f"expected an object, got {type(node).__name__}")
+            return Const(True)
+
+        op = str(node.get("op") or "AND").upper()
+        if op not in LOGICAL_OPS:
+            problem(path, f"unknown op '{op}' (treated as AND)")
+            op = "AND"
+        field, cmp = node.get("field"), node.get("cmp")
+        parts: List[AstNode] = []
+        if field is not None and cmp is not None:
+            canonical = normalize_cmp(cmp) if isinstance(cmp, str) else None
+            if not isinstance(field, str):
+                problem(path, f"field must be a string, got {type(field).__name__}")
+            if canonical is None:
+                problem(path, f"unknown comparator '{cmp}' (matches no rows)")
+                parts.append(Const(False))
+            else:
+                value = node.get("value")
+                if canonical in LIST_CMPS and not isinstance(value, (list, tuple)):
+                    problem(path, f"'{canonical}' expects a list value")
+                elif canonical in TEXT_CMPS and not isinstance(value, str):
+                    problem(path, f"'{canonical}' expects a string value")
+                elif canonical == "between":
+                    try:
+                        between_bounds(value)
+                    except ValueError as e:
+                        problem(path, str(e))
+                parts.append(_cmp_node(field, canonical, node.get("value")))
+        elif (field is None) != (cmp is None) or (op == "CMP" and field is None):
+            problem(path, "a comparison needs both 'field' and 'cmp'")
+
+        children = node.get("children")
+        if children is not None and not isinstance(children, list):
+            problem(path, "'children' must be a list")
+            # FilterPlan iterates whatever it was given; each element is a no-op child
+            parts.extend(Const(True) for _ in (children if hasattr(children, "__len__") else ()))
+            children = []
+        parts.extend(build(child, f"{path}.children[{i}]") for i, child in enumerate(children or []))
+
+        if op == "NOT":
+            return _negate(_logic("AND", parts))
+        return _logic("OR" if op == "OR" else "AND", parts)
+
+    root = build(raw, "$") if raw else Const(True)
+    if strict and errors:
+        raise AstValidationError(errors)
+    return root
+
+
+# -------------------------
+# Compiled plan cache
+# -------------------------
+class PlanCache:
+    """LRU of compiled FilterPlans keyed by canonical AST, shared by every caller."""
+
+    def __init__(self, max_entries: int = DEFAULT_PLAN_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._plans: "OrderedDict[str, FilterPlan]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, node: AstNode) -> FilterPlan:
+        with self._lock:
+            plan = self._plans.get(node.canonical)
+            if plan is not None:
+                self._plans.move_to_end(node.canonical)
+                self.hits += 1
+                return plan
+            self.misses += 1
+        plan = compile_filter_ast(node.to_dict())
+        with self._lock:
+            self._plans[node.canonical] = plan
+            while len(self._plans) > self.max_entries:
+                self._plans.popitem(last=False)
+        return plan
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._plans)}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._plans.clear()
+
+
+PLAN_CACHE = PlanCache()
+
+
+def canonical_ast(ast: Union[Dict[str, Any], AstNode, None]) -> AstNode:
+    return ast if isinstance(ast, AstNode) else parse_ast(ast)
+
+
+def compiled_plan(ast: Union[Dict[str, Any], AstNode, FilterPlan, None]) -> FilterPlan:
+    """The shared compiled plan for a raw or canonical AST (a FilterPlan is returned as is)."""
+    if isinstance(ast, FilterPlan):
+        return ast
+    return PLAN_CACHE.get(canonical_ast(ast))
+
+
+def compiled_batch(asts: Iterable[Union[Dict[str, Any], AstNode, None]]) -> BatchPlan:
+    """
+    One BatchPlan for many raw or canonical ASTs. Filters are canonicalized
+    first, so equivalent ones are evaluated once, and leaves shared between
+    filters (after alias normalization) are evaluated once per frame.
+    """
+    unique: List[AstNode] = []
+    position: Dict[str, int] = {}
+    slots: List[int] = []
+    for ast in asts:
+        node = canonical_ast(ast)
+        if node.canonical not in position:
+            position[node.canonical] = len(unique)
+            unique.append(node)
+        slots.append(position[node.canonical])
+    return compile_filter_asts([node.to_dict() for node in unique], slots)
@@ -0,0 +1,577 @@
+from __future__ import annotations
+
+import logging
+import operator
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+if TYPE_CHECKING:
+    from frame_index import FrameIndex
+    from tracing import Trace
+
+logger = logging.getLogger(__name__)
+
+# -------------------------
+# Comparator kernels
+# -------------------------
+# Aliases accepted in the AST, mapped to one canonical comparator name.
+CMP_ALIASES: Dict[str, str] = {
+    "in": "in",
+    "not_in": "not_in", "nin": "not_in",
+    "==": "eq", "eq": "eq",
+    "!=": "ne", "ne": "ne", "neq": "ne",
+    ">": "gt", "gt": "gt",
+    ">=": "ge", "ge": "ge", "gte": "ge",
+    "<": "lt", "lt": "lt",
+    "<=": "le", "le": "le", "lte": "le",
+    "between": "between",
+    "contains": "contains",
+    "starts_with": "starts_with", "startswith": "starts_with",
+    "ends_with": "ends_with", "endswith": "ends_with",
+}
+
+TEXT_CMPS = {"contains", "starts_with", "ends_with"}
+
+_NUMPY_OPS = {
+    "eq": np.equal, "ne": np.not_equal,
+    "gt": np.greater, "ge": np.greater_equal,
+    "lt": np.less, "le": np.less_equal,
+}
+
+_SERIES_OPS = {
+    "eq": operator.eq, "ne": operator.ne,
+    "gt": operator.gt, "ge": operator.ge,
+    "lt": operator.lt, "le": operator.le,
+}
+
+# Rough fraction of rows that pass each comparator; only used for ordering.
+_SELECTIVITY = {
+    "eq": 0.1, "ne": 0.9, "gt": 0.33, "ge": 0.33, "lt": 0.33, "le": 0.33,
+    "between": 0.25, "contains": 0.2, "starts_with": 0.1, "ends_with": 0.1,
+}
+
+# Below this fraction of undecided rows, later siblings run on a gathered subset
+# instead of the full column.
+_SUBSET_FRACTION = 0.5
+
+
+def normalize_cmp(cmp: Optional[str]) -> Optional[str]:
+    """Return the canonical comparator name, or None if it is not supported."""
+    return CMP_ALIASES.get((cmp or "").lower())
+
+
+def _is_numpy_native(s: pd.Series, value: Any) -> bool:
+    return (
+        isinstance(s.dtype, np.dtype)
+        and s.dtype.kind in "biuf"
+        and isinstance(value, (int, float, np.number))
+    )
+
+
+def _strong(value: Any) -> Any:
+    """
+    A Python number as a NumPy scalar, so it is compared at its own precision:
+    a bare 0.1 against a float32 column would be rounded to float32 first
+    (NEP 50), and 1000 against an int8 column would not fit.
+    """
+    return np.asarray(value)[()] if isinstance(value, (int, float)) and not isinstance(value, bool) else value
+
+
+def _by_category(sub: pd.Series, hit: np.ndarray, missing: bool) -> np.ndarray:
+    """Broadcast a per-category result through the codes of categorical `sub`."""
+    codes = sub.cat.codes.to_numpy()
+    return np.where(codes >= 0, hit[np.maximum(codes, 0)] if len(hit) else False, missing)
+
+
+def between_bounds(value: Any) -> Tuple[Any, Any]:
+    """
+    (min, max) of a `between` value: {"min": a, "max": b} or [a, b]. Either
+    bound may be None (open). Raises ValueError if neither is given.
+    """
+    if isinstance(value, dict):
+        lo, hi = value.get("min"), value.get("max")
+    elif isinstance(value, (list, tuple)) and len(value) == 2:
+        lo, hi = value
+    else:
+        raise ValueError(f"between expects {{'min', 'max'}} or [min, max], got {value!r}")
+    if lo is None and hi is None:
+        raise ValueError("between needs at least one of min / max")
+    return lo, hi
+
+
+def _range(s: pd.Series, lo: Any, hi: Any, rows: Optional[np.ndarray]) -> np.ndarray:
+    """lo <= s <= hi (inclusive, either bound optional); missing values never match."""
+    if all(_is_numpy_native(s, b) for b in (lo, hi) if b is not None):
+        arr = s.to_numpy()
+        if rows is not None:
+            arr = arr[rows]
+    else:
+        arr = s if rows is None else s.iloc[rows]
+        if arr.dtype.kind == "M":
+            lo, hi = (None if b is None else pd.Timestamp(b) for b in (lo, hi))
+    out = np.ones(len(arr), dtype=bool)
+    for bound, op in ((lo, operator.ge), (hi, operator.le)):
+        if bound is not None:
+            res = op(arr, _strong(bound) if isinstance(arr, np.ndarray) else bound)
+            out &= res.to_numpy(dtype=bool, na_value=False) if isinstance(res, pd.Series) else res
+    return out
+
+
+def text_values(s: pd.Series) -> pd.Series:
+    """
+    `s` as an Arrow-backed string Series (missing stays missing; other values
+    are compared on their string form), so the .str kernels below run in
+    Arrow compute instead of a per-row Python loop. Falls back to pandas'
+    own string dtype when pyarrow is not installed. Narrow floats are widened
+    first, so a float32 column (data_io.compact_df) reads as the float64 it
+    was compacted from.
+    """
+    if isinstance(s.dtype, pd.StringDtype) and s.dtype.storage == "pyarrow":
+        return s
+    if isinstance(s.dtype, np.dtype) and s.dtype.kind == "f" and s.dtype.itemsize < 8:
+        s = s.astype(np.float64)
+    try:
+        return s.astype("string[pyarrow]")
+    except ImportError:
+        return s.astype("string")
+
+
+def _text_match(s: pd.Series, cmp: str, value: Any) -> np.ndarray:
+    pattern = value if isinstance(value, str) else str(value)
+    if cmp == "contains":
+        res = s.str.contains(pattern, regex=False)
+    elif cmp == "starts_with":
+        res = s.str.startswith(pattern)
+    else:
+        res = s.str.endswith(pattern)
+    return res.to_numpy(dtype=bool, na_value=False)
+
+
+def eval_text(s: pd.Series, cmp: str, value: Any, rows: Optional[np.ndarray] = None) -> np.ndarray:
+    """contains / starts_with / ends_with (case-sensitive, literal); missing values never match."""
+    if value is None:
+        raise ValueError(f"{cmp} needs a string value")
+    sub = s if rows is None else s.iloc[rows]
+    if isinstance(sub.dtype, pd.CategoricalDtype):
+        # test each category once, then broadcast through the codes
+        return _by_category(sub, _text_match(text_values(pd.Series(sub.cat.categories)), cmp, value), False)
+    return _text_match(text_values(sub), cmp, value)
+
+
+def eval_predicate(s: pd.Series, cmp: str, value: Any, rows: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Evaluate a canonical comparator against `s` and return a NumPy bool array.
+    If `rows` is given, only those positions are evaluated (result has len(rows)).
+    Missing values never match (except for ne / not_in), whatever the dtype's
+    missing-value semantics. Unordered categoricals (e.g. from
+    data_io.compact_df) compare on their values, like the text column they
+    came from. Raises on type errors.
+    """
+    if (
+        isinstance(s.dtype, pd.CategoricalDtype)
+        and not s.cat.ordered
+        and cmp not in TEXT_CMPS
+        and cmp not in ("in", "not_in")
+    ):
+        # pandas refuses < / > on unordered categories: evaluate each category once instead
+        sub = s if rows is None else s.iloc[rows]
+        return _by_category(sub, eval_predicate(pd.Series(sub.cat.categories), cmp, value), cmp == "ne")
+
+    if cmp == "between":
+        lo, hi = between_bounds(value)
+        return _range(s, lo, hi, rows)
+
+    if cmp in TEXT_CMPS:
+        return eval_text(s, cmp, value, rows)
+
+    if cmp in ("in", "not_in"):
+        sub = s if rows is None else s.iloc[rows]
+        hit = sub.isin(list(value)).to_numpy(dtype=bool)
+        return ~hit if cmp == "not_in" else hit
+
+    if _is_numpy_native(s, value):
+        arr = s.to_numpy()
+        if rows is not None:
+            arr = arr[rows]
+        return _NUMPY_OPS[cmp](arr, _strong(value))
+
+    sub = s if rows is None else s.iloc[rows]
+    res = _SERIES_OPS[cmp](sub, value)
+    # pd.NA dtypes (string, Int64, ...) give NA for missing values: != still matches them
+    return res.to_numpy(dtype=bool, na_value=cmp == "ne")
+
+
+def _freeze(value: Any) -> Any:
+    """Hashable, type-aware key for a predicate value (so 1, 1.0 and True differ)."""
+    if isinstance(value, (list, tuple)):
+        return ("list", tuple(_freeze(v) for v in value))
+    if isinstance(value, dict):
+        return ("dict", tuple(sorted((str(k), _freeze(v)) for k, v in value.items())))
+    try:
+        hash(value)
+    except TypeError:
+        return ("repr", repr(value))
+    return (type(value).__name__, value)
+
+
+# -------------------------
+# Plan nodes
+# -------------------------
+class Predicate:
+    """A unique (field, cmp, value) leaf shared by every node that references it."""
+
+    def __init__(self, pid: int, field: str, cmp: str, value: Any):
+        self.pid = pid
+        self.field = field
+        self.cmp = cmp
+        self.value = value
+        self.refcount = 0
+
+    @property
+    def selectivity(self) -> float:
+        cmp = normalize_cmp(self.cmp)
+        if cmp in ("in", "not_in"):
+            n = len(self.value) if isinstance(self.value, (list, tuple, set)) else 1
+            est = min(0.1 * n, 0.9)
+            return est if cmp == "in" else 1.0 - est
+        return _SELECTIVITY.get(cmp, 0.5)
+
+    def __repr__(self) -> str:
+        return f"Predicate({self.field!r} {self.cmp} {self.value!r})"
+
+
+class _Node:
+    selectivity: float = 0.5
+
+    @property
+    def label(self) -> str:
+        return type(self).__name__.strip("_").upper()
+
+    def evaluate(self, ctx: "_EvalContext", rows: Optional[np.ndarray]) -> np.ndarray:
+        raise NotImplementedError
+
+
+class _Const(_Node):
+    def __init__(self, value: bool):
+        self.value = value
+        self.selectivity = 1.0 if value else 0.0
+
+    @property
+    def label(self) -> str:
+        return str(self.value).upper()
+
+    def evaluate(self, ctx, rows):
+        return np.full(ctx.n if rows is None else len(rows), self.value, dtype=bool)
+
+
+class _Leaf(_Node):
+    def __init__(self, pred: Predicate):
+        self.pred = pred
+        self.selectivity = pred.selectivity
+
+    @property
+    def label(self) -> str:
+        return f"{self.pred.field} {self.pred.cmp} {self.pred.value!r}"
+
+    def evaluate(self, ctx, rows):
+        return ctx.predicate(self.pred, rows)
+
+
+class _Not(_Node):
+    def __init__(self, child: _Node):
+        self.child = child
+        self.selectivity = 1.0 - child.selectivity
+
+    def evaluate(self, ctx, rows):
+        return ~ctx.run(self.child, rows)
+
+
+class _Logic(_Node):
+    """AND/OR over children; later children only see rows that are still undecided."""
+
+    def __init__(self, op: str, children: List[_Node]):
+        self.op = op
+        # AND: most selective first; OR: most permissive first.
+        self.children = sorted(children, key=lambda c: c.selectivity, reverse=(op == "OR"))
+        if op == "AND":
+            self.selectivity = float(np.prod([c.selectivity for c in children]))
+        else:
+            self.selectivity = 1.0 - float(np.prod([1.0 - c.selectivity for c in children]))
+
+    @property
+    def label(self) -> str:
+        return self.op
+
+    def evaluate(self, ctx, rows):
+        is_and = self.op == "AND"
+        n = ctx.n if rows is None else len(rows)
+        out = np.full(n, is_and, dtype=bool)
+        for child in self.children:
+            # AND: rows still True are undecided; OR: rows still False are.
+            live = np.flatnonzero(out) if is_and else np.flatnonzero(~out)
+            if live.size == 0:
+                break
+            if live.size >= n * _SUBSET_FRACTION:
+                res = ctx.run(child, rows)
+                if is_and:
+                    out &= res
+                else:
+                    out |= res
+            else:
+                out[live] = ctx.run(child, live if rows is None else rows[live])
+        return out
+
+
+class _EvalContext:
+    """Per-evaluation state: column lookups and results of shared predicates."""
+
+    def __init__(self, df: pd.DataFrame, trace: Optional["Trace"] = None, index: Optional["FrameIndex"] = None):
+        self.df = df
+        self.n = len(df)
+        self.trace = trace
+        self.index = index if index is not None and index.covers(df) else None
+        self._cache: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+
+    def run(self, node: _Node, rows: Optional[np.ndarray]) -> np.ndarray:
+        if self.trace is None:
+            return node.evaluate(self, rows)
+        with self.trace.span(node.label, kind="filter_node") as span:
+            out = node.evaluate(self, rows)
+            selected = int(np.count_nonzero(out))
+            span.attrs.update(rows=len(out), selected=selected, selectivity=selected / len(out) if len(out) else 0.0)
+        return out
+
+    def _compute(self, pred: Predicate, rows: Optional[np.ndarray]) -> np.ndarray:
+        size = self.n if rows is None else len(rows)
+        if pred.field not in self.df.columns:
+            logger.warning("Predicate skipped: column '%s' not found.", pred.field)
+            return np.zeros(size, dtype=bool)
+        cmp = normalize_cmp(pred.cmp)
+        if cmp is None:
+            logger.warning("Unknown comparator '%s'; predicate skipped.", pred.cmp)
+            return np.zeros(size, dtype=bool)
+        if cmp in ("in", "not_in") and pred.value is None:
+            logger.warning("Predicate '%s' skipped: value is None.", cmp)
+            return np.zeros(size, dtype=bool)
+        if self.index is not None:
+            hit = self.index.lookup(pred.field, cmp, pred.value)
+            if hit is not None:
+                return hit if rows is None else hit[rows]
+        try:
+            return eval_predicate(self.df[pred.field], cmp, pred.value, rows)
+        except Exception as e:
+            logger.warning("Predicate evaluation error on column '%s' with cmp '%s': %s", pred.field, pred.cmp, e)
+            return np.zeros(size, dtype=bool)
+
+    def predicate(self, pred: Predicate, rows: Optional[np.ndarray]) -> np.ndarray:
+        if pred.refcount < 2:
+            return self._compute(pred, rows)
+
+        # Shared leaf: remember every row already computed, only fill the gaps.
+        if pred.pid not in self._cache:
+            self._cache[pred.pid] = (np.zeros(self.n, dtype=bool), np.zeros(self.n, dtype=bool))
+        values, known = self._cache[pred.pid]
+        want = np.arange(self.n) if rows is None else rows
+        need = want[~known[want]]
+        if need.size:
+            values[need] = self._compute(pred, None if need.size == self.n else need)
+            known[need] = True
+        return values if rows is None else values[rows]
+
+
+# -------------------------
+# Compilation
+# -------------------------
+class FilterPlan:
+    """
+    A compiled filter AST. Compile once with `compile_filter_ast` and call
+    `evaluate`/`mask` on as many frames (or chunks) as needed.
+    """
+
+    def __init__(self, root: _Node, predicates: List[Predicate]):
+        self.root = root
+        self.predicates = predicates
+
+    @property
+    def columns(self) -> List[str]:
+        """Columns referenced by the plan, in first-seen order."""
+        return list(dict.fromkeys(p.field for p in self.predicates))
+
+    def evaluate(
+        self,
+        df: pd.DataFrame,
+        trace: Optional["Trace"] = None,
+        index: Optional["FrameIndex"] = None,
+    ) -> np.ndarray:
+        """
+        Return the filter result as a NumPy bool array of len(df).
+        With a `tracing.Trace`, every node records its time and selectivity.
+        With a `frame_index.FrameIndex` built over df, leaves it can answer
+        are looked up instead of scanned.
+        """
+        if len(df) == 0:
+            return np.ones(0, dtype=bool)
+        ctx = _EvalContext(df, trace, index)
+        return np.asarray(ctx.run(self.root, None), dtype=bool)
+
+    def mask(
+        self,
+        df: pd.DataFrame,
+        trace: Optional["Trace"] = None,
+        index: Optional["FrameIndex"] = None,
+    ) -> pd.Series:
+        """Return the filter result as a boolean Series aligned to df.index."""
+        return pd.Series(self.evaluate(df, trace, index), index=df.index, dtype=bool)
+
+
+def _and(parts: List[_Node]) -> _Node:
+    return _combine("AND", parts)
+
+
+def _combine(op: str, parts: List[_Node]) -> _Node:
+    if not parts:
+        # No predicate and no children: no-op filter.
+        return _Const(True)
+    # Fold constants: True is neutral for AND, False for OR; the other absorbs.
+    neutral = op == "AND"
+    kept: List[_Node] = []
+    for p in parts:
+        if isinstance(p, _Const):
+            if p.value != neutral:
+                return _Const(not neutral)
+            continue
+        kept.append(p)
+    if not kept:
+        return _Const(neutral)
+    if len(kept) == 1:
+        return kept[0]
+    return _Logic(op, kept)
+
+
+class _Compiler:
+    """Builds plan nodes over one predicate table, shared by every AST compiled with it."""
+
+    def __init__(self):
+        self.table: Dict[Any, Predicate] = {}
+
+    def leaf(self, field: str, cmp: str, value: Any) -> _Leaf:
+        key = (field, normalize_cmp(cmp) or cmp, _freeze(value))
+        pred = self.table.get(key)
+        if pred is None:
+            pred = self.table[key] = Predicate(len(self.table), field, cmp, value)
+        pred.refcount += 1
+        return _Leaf(pred)
+
+    def build(self, node: Any) -> _Node:
+        if not isinstance(node, dict):
+            return _Const(True)
+
+        op = (node.get("op") or "AND").upper()
+        field = node.get("field")
+        cmp = node.get("cmp")
+        parts: List[_Node] = []
+        if field is not None and cmp is not None:
+            parts.append(self.leaf(field, cmp, node.get("value")))
+        parts.extend(self.build(child) for child in node.get("children") or [])
+
+        if op == "NOT":
+            # NOT inverts the AND of its predicate/children (or True if none).
+            inner = _and(parts)
+            return _Const(not inner.value) if isinstance(inner, _Const) else _Not(inner)
+        if op not in ("AND", "OR"):
+            if op != "CMP":
+                logger.warning("Unknown logical op '%s'; defaulting to AND.", op)
+            op = "AND"
+        return _combine(op, parts)
+
+    def root(self, ast: Any) -> _Node:
+        return self.build(ast) if isinstance(ast, dict) else _Const(True)
+
+
+def compile_filter_ast(ast: Optional[Dict[str, Any]]) -> FilterPlan:
+    """
+    Compile a filter AST (same schema as `t.apply_filter_ast`) into a FilterPlan.
+    Identical (field, cmp, value) leaves are evaluated once per call, AND/OR
+    children are ordered by estimated selectivity, and masks are combined on
+    NumPy arrays.
+    """
+    compiler = _Compiler()
+    root = compiler.root(ast)
+    return FilterPlan(root, list(compiler.table.values()))
+
+
+# -------------------------
+# Batches
+# -------------------------
+class BatchPlan:
+    """
+    Several filters compiled over one predicate table, for evaluating many
+    filters (say one per segment) on the same frame. Unlike FilterPlan, which
+    short-circuits AND/OR on row subsets, every distinct leaf is evaluated
+    once over the whole frame and each filter is then a few vectorized
+    boolean ops over those masks: a leaf shared by 50 filters costs one scan,
+    not 50. `evaluate` returns one mask row per filter, in input order.
+    """
+
+    def __init__(self, roots: List[_Node], predicates: List[Predicate], slots: Optional[List[int]] = None):
+        self.roots = roots
+        self.predicates = predicates
+        # input position -> index into roots (identical filters share a root)
+        self.slots = slots if slots is not None else list(range(len(roots)))
+
+    def __len__(self) -> int:
+        return len(self.slots)
+
+    @property
+    def columns(self) -> List[str]:
+        return list(dict.fromkeys(p.field for p in self.predicates))
+
+    def evaluate(
+        self,
+        df: pd.DataFrame,
+        trace: Optional["Trace"] = None,
+        index: Optional["FrameIndex"] = None,
+    ) -> np.ndarray:
+        """Bool array of shape (len(self), len(df)): row i is filter i's mask."""
+        out = np.ones((len(self.roots), len(df)), dtype=bool)
+        if not len(df):
+            return out[self.slots]
+        ctx = _EvalContext(df, trace, index)
+        if trace is None:
+            leaves = {p.pid: ctx._compute(p, None) for p in self.predicates}
+        else:
+            leaves = {p.pid: ctx.run(_Leaf(p), None) for p in self.predicates}
+
+        def combine(node: _Node, dest: np.ndarray) -> np.ndarray:
+            if isinstance(node, _Const):
+                dest[:] = node.value
+            elif isinstance(node, _Leaf):
+                np.copyto(dest, leaves[node.pred.pid])
+            elif isinstance(node, _Not):
+                np.logical_not(combine(node.child, dest), out=dest)
+            else:
+                combine(node.children[0], dest)
+                scratch = np.empty_like(dest)
+                for child in node.children[1:]:
+                    if node.op == "AND":
+                        dest &= combine(child, scratch)
+                    else:
+                        dest |= combine(child, scratch)
+            return dest
+
+        for i, root in enumerate(self.roots):
+            combine(root, out[i])
+        return out[self.slots]
+
+    def counts(self, df: pd.DataFrame, index: Optional["FrameIndex"] = None) -> np.ndarray:
+        """Matching rows per filter."""
+        return self.evaluate(df, index=index).sum(axis=1)
+
+
+def compile_filter_asts(asts: List[Optional[Dict[str, Any]]], slots: Optional[List[int]] = None) -> BatchPlan:
+    """Compile filter ASTs into one BatchPlan (leaves shared across all of them)."""
+    compiler = _Compiler()
+    roots = [compiler.root(ast) for ast in asts]
+    return BatchPlan(roots, list(compiler.table.values()), slots)
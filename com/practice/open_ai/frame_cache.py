@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import logging
+import os
+import tempfile
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = os.path.join(tempfile.gettempdir(), "data_zen_cache")
+DEFAULT_MAX_BYTES = 4 * 1024 ** 3
+
+
+class FrameCache:
+    """
+    On-disk cache of parsed DataFrames keyed by file hash.
+
+    Frames are stored as uncompressed Feather (Arrow IPC), so a hit skips CSV
+    parsing and type inference, and they survive worker restarts. A hit is
+    not zero-copy: the file is memory-mapped, only the requested columns are
+    paged in, and converting them to pandas copies them once into memory the
+    frame owns. Every file named "<key>.*" belongs to that entry; entries are
+    evicted least-recently-used first once the directory exceeds `max_bytes`.
+    Without pyarrow the cache is disabled and `get` always misses.
+
+    Defaults come from DATA_ZEN_CACHE_DIR / DATA_ZEN_CACHE_MAX_BYTES.
+    """
+
+    def __init__(self, directory: Optional[str] = None, max_bytes: Optional[int] = None):
+        self.directory = directory or os.environ.get("DATA_ZEN_CACHE_DIR") or DEFAULT_CACHE_DIR
+        self.max_bytes = int(max_bytes or os.environ.get("DATA_ZEN_CACHE_MAX_BYTES") or DEFAULT_MAX_BYTES)
+        try:
+            import pyarrow.feather as feather
+        except ImportError:
+            logger.warning("pyarrow not installed; on-disk frame cache disabled.")
+            feather = None
+        self._feather = feather
+        if self.enabled:
+            os.makedirs(self.directory, exist_ok=True)
+
+    @property
+    def enabled(self) -> bool:
+        return self._feather is not None
+
+    def path(self, key: str, suffix: str = ".feather") -> str:
+        if not key or not key.isalnum():
+            raise ValueError(f"Invalid cache key '{key}'.")
+        return os.path.join(self.directory, key + suffix)
+
+    def get(self, key: str, columns: Optional[List[str]] = None) -> Optional[pd.DataFrame]:
+        """Return a copy of the cached frame (optionally only `columns`) in pandas memory, or None on a miss."""
+        if not self.enabled:
+            return None
+        path = self.path(key)
+        try:
+            table = self._feather.read_table(path, columns=columns, memory_map=True)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning("Discarding unreadable cache entry '%s': %s", path, e)
+            self.delete(key)
+            return None
+        self.touch(key)
+        return table.to_pandas()
+
+    def put(self, key: str, df: pd.DataFrame) -> bool:
+        """Store df under key; returns False if the frame cannot be written as Arrow."""
+        if not self.enabled:
+            return False
+        path = self.path(key)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        try:
+            self._feather.write_feather(df, tmp, compression="uncompressed")
+            os.replace(tmp, path)
+        except Exception as e:
+            logger.warning("Frame not cached (%s).", e)
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            return False
+        self.evict()
+        return True
+
+    def touch(self, key: str) -> None:
+        """Mark an entry as recently used."""
+        try:
+            os.utime(self.path(key))
+        except OSError:
+            pass
+
+    def delete(self, key: str) -> None:
+        for name in os.listdir(self.directory):
+            if name.split(".", 1)[0] == key:
+                os.remove(os.path.join(self.directory, name))
+
+    def _entries(self) -> Dict[str, Tuple[float, int]]:
+        """key -> (last use, total bytes across the entry's files)."""
+        entries: Dict[str, Tuple[float, int]] = {}
+        for name in os.listdir(self.directory):
+            if name.endswith(".tmp"):
+                continue
+            try:
+                st = os.stat(os.path.join(self.directory, name))
+            except OSError:
+                continue
+            key = name.split(".", 1)[0]
+            used, size = entries.get(key, (0.0, 0))
+            entries[key] = (max(used, st.st_mtime), size + st.st_size)
+        return entries
+
+    def evict(self) -> None:
+        """Drop least-recently-used entries until the directory fits in max_bytes."""
+        entries = self._entries()
+        total = sum(size for _, size in entries.values())
+        for key, (_, size) in sorted(entries.items(), key=lambda kv: kv[1][0]):
+            if total <= self.max_bytes:
+                break
+            self.delete(key)
+            total -= size
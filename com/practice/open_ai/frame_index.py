@@ -0,0 +1,414 @@
+from __future__ import annotations
+
+import datetime as dt
+import hashlib
+import io
+import logging
+import os
+import weakref
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from filter_plan import between_bounds
+
+if TYPE_CHECKING:
+    from frame_cache import FrameCache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BITMAP_VALUES = 256
+
+# Comparators each index kind answers; ne / not_in are the complement of eq / in
+# (missing values included), exactly as the scan kernels in filter_plan behave.
+SORTED_CMPS = {"eq", "ne", "gt", "ge", "lt", "le", "in", "not_in", "between"}
+BITMAP_CMPS = {"eq", "ne", "in", "not_in", "contains", "starts_with", "ends_with"}
+TEXT_CMPS = {"eq", "ne", "in", "not_in", "starts_with", "ends_with"}
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float, np.number)) and not isinstance(value, (bool, np.bool_)) and not pd.isna(value)
+
+
+class SortedIndex:
+    """Non-missing values of a numeric/datetime column in sorted order, with their row positions."""
+
+    kind = "sorted"
+    cmps = SORTED_CMPS
+
+    def __init__(self, values: np.ndarray, positions: np.ndarray, n: int):
+        self.values = values
+        self.positions = positions
+        self.n = n
+
+    @staticmethod
+    def supports(s: pd.Series) -> bool:
+        return isinstance(s.dtype, np.dtype) and (s.dtype.kind in "iuf" or s.dtype.kind == "M")
+
+    @classmethod
+    def build(cls, s: pd.Series) -> "SortedIndex":
+        arr = s.to_numpy(dtype="datetime64[ns]") if s.dtype.kind == "M" else s.to_numpy()
+        valid = np.flatnonzero(~pd.isna(arr)) if arr.dtype.kind in "fM" else np.arange(len(arr))
+        order = valid[np.argsort(arr[valid], kind="stable")]
+        return cls(arr[order], order.astype(np.int32 if len(arr) < 2 ** 31 else np.int64), len(arr))
+
+    def _key(self, value: Any, member: bool = False) -> Any:
+        if self.values.dtype.kind == "M":
+            # as the scan: comparisons parse strings, membership (isin) does not, and
+            # plain dates equal no datetime
+            if not isinstance(value, (dt.datetime, np.datetime64, str)) or (member and isinstance(value, str)):
+                return None
+            try:
+                ts = pd.Timestamp(value)
+            except (TypeError, ValueError):
+                return None
+            return None if pd.isna(ts) or ts.tz is not None else ts.to_datetime64()
+        return value if _is_number(value) else None
+
+    def _mark(self, out: np.ndarray, lo: int, hi: int) -> None:
+        out[self.positions[lo:hi]] = True
+
+    def _between(self, value: Any) -> Optional[np.ndarray]:
+        try:
+            lo, hi = between_bounds(value)
+        except ValueError:
+            return None
+        keys = [None if b is None else self._key(b) for b in (lo, hi)]
+        if any(k is None and b is not None for k, b in zip(keys, (lo, hi))):
+            return None
+        start = 0 if keys[0] is None else int(np.searchsorted(self.values, keys[0], side="left"))
+        stop = len(self.values) if keys[1] is None else int(np.searchsorted(self.values, keys[1], side="right"))
+        out = np.zeros(self.n, dtype=bool)
+        self._mark(out, start, max(start, stop))
+        return out
+
+    def lookup(self, cmp: str, value: Any) -> Optional[np.ndarray]:
+        if cmp == "between":
+            return self._between(value)
+        if cmp in ("ne", "not_in"):
+            hit = self.lookup("eq" if cmp == "ne" else "in", value)
+            return None if hit is None else ~hit
+        if cmp == "in" and not isinstance(value, (list, tuple, set)):
+            return None
+        values = list(value) if cmp == "in" else [value]
+        keys = [self._key(v, member=cmp == "in") for v in values]
+        if any(k is None for k in keys):
+            return None
+
+        out = np.zeros(self.n, dtype=bool)
+        for key in keys:
+            left = int(np.searchsorted(self.values, key, side="left"))
+            right = int(np.searchsorted(self.values, key, side="right"))
+            lo, hi = {
+                "eq": (left, right), "in": (left, right),
+                "gt": (right, len(self.values)), "ge": (left, len(self.values)),
+                "lt": (0, left), "le": (0, right),
+            }[cmp]
+            self._mark(out, lo, hi)
+        return out
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        return {"values": self.values, "positions": self.positions}
+
+    @classmethod
+    def from_arrays(cls, data: Any, n: int) -> "SortedIndex":
+        return cls(data["values"], data["positions"], n)
+
+
+class BitmapIndex:
+    """One packed bitmap of row positions per distinct value of a low-cardinality text column."""
+
+    kind = "bitmap"
+    cmps = BITMAP_CMPS
+
+    def __init__(self, values: np.ndarray, bits: np.ndarray, n: int):
+        self.values = values
+        self.bits = bits
+        self.n = n
+        self._slot = {v: i for i, v in enumerate(values.tolist())}
+
+    @staticmethod
+    def supports(s: pd.Series) -> bool:
+        return (
+            isinstance(s.dtype, pd.CategoricalDtype)
+            or pd.api.types.is_object_dtype(s)
+            or pd.api.types.is_string_dtype(s)
+        )
+
+    @classmethod
+    def build(cls, s: pd.Series, max_values: int = DEFAULT_MAX_BITMAP_VALUES) -> Optional["BitmapIndex"]:
+        codes, uniques = pd.factorize(s)
+        uniques = list(uniques)
+        if len(uniques) > max_values or not all(isinstance(u, str) for u in uniques):
+            return None
+        order = np.argsort(codes, kind="stable")
+        bounds = np.searchsorted(codes[order], np.arange(len(uniques) + 1))
+        bits = np.empty((len(uniques), (len(codes) + 7) // 8), dtype=np.uint8)
+        for i in range(len(uniques)):
+            hit = np.zeros(len(codes), dtype=bool)
+            hit[order[bounds[i]:bounds[i + 1]]] = True
+            bits[i] = np.packbits(hit)
+        return cls(np.array(uniques, dtype=str), bits, len(codes))
+
+    def _text_slots(self, cmp: str, value: str) -> List[int]:
+        if cmp == "contains":
+            hit = np.char.find(self.values, value) >= 0
+        elif cmp == "starts_with":
+            hit = np.char.startswith(self.values, value)
+        else:
+            hit = np.char.endswith(self.values, value)
+        return np.flatnonzero(hit).tolist()
+
+    def lookup(self, cmp: str, value: Any) -> Optional[np.ndarray]:
+        if cmp in ("in", "not_in") and not isinstance(value, (list, tuple, set)):
+            return None
+        values = list(value) if cmp in ("in", "not_in") else [value]
+        if not all(isinstance(v, str) for v in values):
+            return None
+        if cmp in ("contains", "starts_with", "ends_with"):
+            # test each distinct value once, then OR their bitmaps
+            slots = self._text_slots(cmp, value)
+        else:
+            slots = [self._slot[v] for v in values if v in self._slot]
+        if slots:
+            packed = np.bitwise_or.reduce(self.bits[slots], axis=0)
+            out = np.unpackbits(packed, count=self.n).astype(bool)
+        else:
+            out = np.zeros(self.n, dtype=bool)
+        return ~out if cmp in ("ne", "not_in") else out
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        return {"values": self.values, "bits": self.bits}
+
+    @classmethod
+    def from_arrays(cls, data: Any, n: int) -> "BitmapIndex":
+        return cls(data["values"], data["bits"], n)
+
+
+def _prefix_range(values: np.ndarray, prefix: str) -> Tuple[int, int]:
+    """Positions [start, stop) of the sorted `values` that start with `prefix`."""
+    start = int(np.searchsorted(values, prefix, side="left"))
+    if not prefix:
+        return start, len(values)
+    last = ord(prefix[-1])
+    if last == 0x10FFFF:
+        stop = start
+        while stop < len(values) and str(values[stop]).startswith(prefix):
+            stop += 1
+        return start, stop
+    return start, int(np.searchsorted(values, prefix[:-1] + chr(last + 1), side="left"))
+
+
+class TextIndex:
+    """
+    Sorted non-missing values of a high-cardinality text column, and the same
+    values reversed, with their row positions: eq / in and starts_with by
+    binary search on the first, ends_with by a prefix search on the second.
+    """
+
+    kind = "text"
+    cmps = TEXT_CMPS
+
+    def __init__(self, values: np.ndarray, positions: np.ndarray, rvalues: np.ndarray, rpositions: np.ndarray, n: int):
+        self.values = values
+        self.positions = positions
+        self.rvalues = rvalues
+        self.rpositions = rpositions
+        self.n = n
+
+    @classmethod
+    def build(cls, s: pd.Series) -> Optional["TextIndex"]:
+        arr = s.to_numpy(dtype=object, na_value=None)
+        valid = np.flatnonzero(pd.notna(arr))
+        present = arr[valid]
+        if not all(isinstance(v, str) for v in present):
+            return None
+        text = present.astype(str)
+        order = np.argsort(text, kind="stable")
+        rtext = np.array([v[::-1] for v in present], dtype=str) if len(present) else text
+        rorder = np.argsort(rtext, kind="stable")
+        dtype = np.int32 if len(arr) < 2 ** 31 else np.int64
+        return cls(text[order], valid[order].astype(dtype), rtext[rorder], valid[rorder].astype(dtype), len(arr))
+
+    def _range(self, positions: np.ndarray, start: int, stop: int) -> np.ndarray:
+        out = np.zeros(self.n, dtype=bool)
+        out[positions[start:stop]] = True
+        return out
+
+    def lookup(self, cmp: str, value: Any) -> Optional[np.ndarray]:
+        if cmp in ("ne", "not_in"):
+            hit = self.lookup("eq" if cmp == "ne" else "in", value)
+            return None if hit is None else ~hit
+        if cmp == "in" and not isinstance(value, (list, tuple, set)):
+            return None
+        values = list(value) if cmp == "in" else [value]
+        if not all(isinstance(v, str) for v in values):
+            return None
+        if cmp == "starts_with":
+            return self._range(self.positions, *_prefix_range(self.values, value))
+        if cmp == "ends_with":
+            return self._range(self.rpositions, *_prefix_range(self.rvalues, value[::-1]))
+        out = np.zeros(self.n, dtype=bool)
+        for v in values:
+            left = int(np.searchsorted(self.values, v, side="left"))
+            right = int(np.searchsorted(self.values, v, side="right"))
+            out[self.positions[left:right]] = True
+        return out
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        return {"values": self.values, "positions": self.positions, "rvalues": self.rvalues, "rpositions": self.rpositions}
+
+    @classmethod
+    def from_arrays(cls, data: Any, n: int) -> "TextIndex":
+        return cls(data["values"], data["positions"], data["rvalues"], data["rpositions"], n)
+
+
+ColumnIndex = Union[SortedIndex, BitmapIndex, TextIndex]
+_INDEX_KINDS = {cls.kind: cls for cls in (SortedIndex, BitmapIndex, TextIndex)}
+
+
+class FrameIndex:
+    """
+    Secondary indexes over one loaded DataFrame, for running many filter ASTs
+    against the same data.
+
+    Numeric and datetime columns get a SortedIndex (eq / in / range /
+    between by binary search); text and categorical columns with at most
+    `max_bitmap_values` distinct values get a BitmapIndex (eq / in and the
+    string operators by OR-ing the bitmaps of matching values); other text
+    columns get a TextIndex (eq / in / starts_with / ends_with by binary
+    search over sorted and reversed values). Each index is built the first time a predicate needs it. With
+    a FrameCache and the dataset's cache key, it is saved next to the cached
+    frame as "<key>.idx.<kind>.<column hash>.npz", so it is loaded instead of
+    rebuilt on later runs and evicted together with the frame.
+
+    Attach it with `attach_index(df, ...)`; `t.apply_filter_ast` then uses it
+    for that frame object (not for copies or slices of it). The frame must
+    not be modified in place afterwards.
+    """
+
+    def __init__(
+        self,
+        df: pd.DataFrame,
+        cache: Optional["FrameCache"] = None,
+        key: Optional[str] = None,
+        max_bitmap_values: int = DEFAULT_MAX_BITMAP_VALUES,
+    ):
+        self._frame = weakref.ref(df)
+        self.n = len(df)
+        self.cache = cache if cache is not None and cache.enabled and key else None
+        self.key = key
+        self.max_bitmap_values = max_bitmap_values
+        self._indexes: Dict[str, Optional[ColumnIndex]] = {}
+
+    @property
+    def frame(self) -> Optional[pd.DataFrame]:
+        return self._frame()
+
+    def covers(self, df: pd.DataFrame) -> bool:
+        return self._frame() is df
+
+    # ---------- persistence ----------
+    def _path(self, col: str, kind: str) -> str:
+        digest = hashlib.sha1(str(col).encode("utf-8")).hexdigest()[:16]
+        return self.cache.path(self.key, f".idx.{kind}.{digest}.npz")
+
+    @staticmethod
+    def _fingerprint(s: pd.Series) -> str:
+        return f"{s.name}|{s.dtype}|{len(s)}"
+
+    def _load(self, s: pd.Series, kind: str) -> Optional[ColumnIndex]:
+        try:
+            with np.load(self._path(s.name, kind)) as data:
+                if str(data["fingerprint"]) != self._fingerprint(s):
+                    return None
+                return _INDEX_KINDS[kind].from_arrays(data, len(s))
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning("Ignoring unreadable index for column '%s': %s", s.name, e)
+            return None
+
+    def _save(self, s: pd.Series, index: ColumnIndex) -> None:
+        path = self._path(s.name, index.kind)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        try:
+            buf = io.BytesIO()
+            np.savez(buf, fingerprint=np.array(self._fingerprint(s)), **index.arrays())
+            with open(tmp, "wb") as f:
+                f.write(buf.getbuffer())
+            os.replace(tmp, path)
+        except Exception as e:
+            logger.warning("Index for column '%s' not saved (%s).", s.name, e)
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            return
+        self.cache.evict()
+
+    # ---------- build / lookup ----------
+    def column_index(self, col: str) -> Optional[ColumnIndex]:
+        """The index for `col`, loading or building it on first use; None if the column is not indexable."""
+        if col in self._indexes:
+            return self._indexes[col]
+        df = self._frame()
+        if df is None or col not in df.columns or not isinstance(df[col], pd.Series):
+            return None
+
+        s = df[col]
+        if SortedIndex.supports(s):
+            builders = [("sorted", SortedIndex.build)]
+        elif BitmapIndex.supports(s):
+            # few distinct values: bitmaps; otherwise sorted / reversed text
+            builders = [("bitmap", lambda x: BitmapIndex.build(x, self.max_bitmap_values)), ("text", TextIndex.build)]
+        else:
+            builders = []
+        index: Optional[ColumnIndex] = None
+        if self.cache is not None:
+            index = next((i for i in (self._load(s, kind) for kind, _ in builders) if i is not None), None)
+        if index is None:
+            for _, build in builders:
+                index = build(s)
+                if index is not None:
+                    break
+            if index is not None and self.cache is not None:
+                self._save(s, index)
+        self._indexes[col] = index
+        return index
+
+    def lookup(self, col: str, cmp: str, value: Any) -> Optional[np.ndarray]:
+        """
+        Rows matching `col <cmp> value` (canonical comparator) as a bool array
+        of len(frame), or None when no index can answer it (caller scans).
+        """
+        if cmp not in SORTED_CMPS | BITMAP_CMPS | TEXT_CMPS:
+            return None
+        index = self.column_index(col)
+        if index is None or cmp not in index.cmps:
+            return None
+        return index.lookup(cmp, value)
+
+    def build(self, columns: Optional[List[str]] = None) -> "FrameIndex":
+        """Eagerly build (or load) indexes for `columns` (default: all)."""
+        df = self._frame()
+        for col in (columns if columns is not None else list(df.columns) if df is not None else []):
+            self.column_index(col)
+        return self
+
+
+# Frame object id -> FrameIndex; entries go away with the frame.
+_ATTACHED: Dict[int, FrameIndex] = {}
+
+
+def attach_index(df: pd.DataFrame, index: Optional[FrameIndex] = None, **kwargs: Any) -> FrameIndex:
+    """Register an index for df (built lazily; kwargs go to FrameIndex) and return it."""
+    index = index if index is not None else FrameIndex(df, **kwargs)
+    _ATTACHED[id(df)] = index
+    weakref.finalize(df, _ATTACHED.pop, id(df), None)
+    return index
+
+
+def index_for(df: pd.DataFrame) -> Optional[FrameIndex]:
+    """The index attached to this exact frame object, if any."""
+    index = _ATTACHED.get(id(df))
+    return index if index is not None and index.covers(df) else None
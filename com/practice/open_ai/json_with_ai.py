@@ -1,14 +1,13 @@
-# pip install langchain-openai langchain langchain-openai openai python-dotenv langchain-community
+# pip install openai python-dotenv
 
-from langchain.prompts import PromptTemplate
-from langchain.chat_models import ChatOpenAI
-from langchain.chains import LLMChain
 import json
 import random
 
 from dotenv import load_dotenv
 import os
 
+from translation import TranslationService, parse_json_response
+
 
 # Load environment variables from .env file
 load_dotenv()
@@ -21,13 +20,11 @@ if not api_key:
 
 os.environ["OPENAI_API_KEY"] = api_key
 
-# Define the prompt template
+# System prompt; the user's prompt goes in the user message
 prompt_template = """
 You are a dataset schema generator. Based on the user's prompt, return a structured JSON schema specifying the dataset structure and metadata. 
 Do NOT generate sample data points.
 
-User Prompt: {user_prompt}
-
 Expected Output:
 The JSON schema should include:
 - "row_count": Number of rows to generate (integer)
@@ -37,49 +34,50 @@ The JSON schema should include:
   - "constraints" (if applicable): Additional constraints or rules for the field, such as "greater than 18" or "set of values".
 
 Example Output:
-{{
+{
   "row_count": 10,
   "fields": [
-    {{
+    {
       "name": "name",
       "type": "String"
-    }},
-    {{
+    },
+    {
       "name": "age",
       "type": "Integer",
       "constraints": ">18"
-    }},
-    {{
+    },
+    {
       "name": "salary",
       "type": "Decimal",
       "constraints": "2"
-    }},
-    {{
+    },
+    {
       "name": "department",
       "type": "String",
       "constraints": "SET[HR,IT,FINANCE]"
-    }}
+    }
   ]
-}}
+}
 
 Expectations: Json sould also included the any additional fileds not mentioned in given sample example but may occure in user prompt.
 """
 
-# Create a LangChain prompt template
-prompt = PromptTemplate(input_variables=["user_prompt"], template=prompt_template)
-
-# Initialize the GPT-4o LLM
-llm = ChatOpenAI(temperature=0, model="gpt-4o-mini")
+# Shared, cached translation service (process-wide async client pool), created on first use
+_service = None
 
-# Define the LangChain LLM chain
-chain = LLMChain(llm=llm, prompt=prompt)
+def _schema_service():
+    global _service
+    if _service is None:
+        # temperature 0, as the LangChain chain had: the first reply is cached for good
+        _service = TranslationService(user_template="User Prompt: {instruction}", temperature=0)
+    return _service
 
 # Function to process user prompt and generate dataset schema
 def generate_dataset_schema(user_prompt):
-    response = chain.run(user_prompt=user_prompt)
+    response = _schema_service().translate(prompt_template, user_prompt)
     try:
         # Parse the JSON response if possible
-        schema = json.loads(response)
+        schema = parse_json_response(response)
         return schema
     except json.JSONDecodeError:
         print("Error: Could not parse the schema.")
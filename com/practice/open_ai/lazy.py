@@ -0,0 +1,292 @@
+from __future__ import annotations
+
+import datetime as dt
+import io
+import logging
+import os
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from data_io import load_df, sniff_delimiter
+from filter_ast import AstNode, Cmp, Const, Logic, Not, compiled_plan, parse_ast
+from filter_plan import between_bounds
+from streaming import csv_columns, infer_stream_dtypes, iter_csv_chunks, read_sample
+from t import run_cleaning_plan, select_rows, split_step, step_columns
+
+logger = logging.getLogger(__name__)
+
+Source = Union[str, "os.PathLike[str]", bytes, io.IOBase, pd.DataFrame]
+
+# (min, max, null count, rows) of one column in one Parquet row group; min/max
+# are None when the row group has no non-null value or no statistics.
+ColumnStats = Tuple[Any, Any, Optional[int], int]
+
+
+# -------------------------
+# Row-group pruning
+# -------------------------
+def _leaf_may_match(node: Cmp, stats: Optional[ColumnStats]) -> bool:
+    """False only if no row of a row group with these statistics can satisfy the leaf."""
+    lo, hi, nulls, rows = stats
+    cmp, value = node.cmp, node.value
+    if lo is None:
+        if nulls is None or nulls < rows:
+            return True  # no statistics
+        # every value is missing: only ne / not_in / in [None] match
+        return cmp in ("ne", "not_in") or (cmp == "in" and any(v is None for v in value or []))
+    if isinstance(lo, pd.Timestamp):
+        value = [pd.Timestamp(v) if isinstance(v, str) else v for v in value] if isinstance(value, list) else (
+            pd.Timestamp(value) if isinstance(value, str) else value)
+    if cmp == "eq":
+        return lo <= value <= hi
+    if cmp == "ne":
+        return not (lo == hi == value and not nulls)
+    if cmp == "gt":
+        return hi > value
+    if cmp == "ge":
+        return hi >= value
+    if cmp == "lt":
+        return lo < value
+    if cmp == "le":
+        return lo <= value
+    if cmp == "between":
+        b_lo, b_hi = between_bounds(value)
+        if isinstance(lo, pd.Timestamp):
+            b_lo, b_hi = (pd.Timestamp(b) if isinstance(b, str) else b for b in (b_lo, b_hi))
+        return (b_lo is None or hi >= b_lo) and (b_hi is None or lo <= b_hi)
+    if cmp == "in":
+        return any((v is None and nulls) or (v is not None and lo <= v <= hi) for v in value or [])
+    if cmp == "starts_with" and isinstance(lo, str) and isinstance(value, str):
+        return hi >= value and lo[:len(value)] <= value
+    return True  # not_in, contains, ends_with: no bound from min / max
+
+
+def may_match(node: AstNode, stats: Dict[str, Optional[ColumnStats]]) -> bool:
+    """
+    Conservative test of a canonical filter against row-group statistics
+    (column -> ColumnStats, or None when unknown): False only if no row can
+    match, so skipping the row group cannot change the result. Columns
+    missing from `stats` are missing from the file, where FilterPlan matches
+    nothing.
+    """
+    if isinstance(node, Const):
+        return node.value
+    if isinstance(node, Logic):
+        test = all if node.op == "AND" else any
+        return test(may_match(c, stats) for c in node.children)
+    if isinstance(node, Not):
+        return True  # would need "every row matches the child"; not worth it
+    if node.field not in stats:
+        return False
+    if stats[node.field] is None:
+        return True
+    try:
+        return bool(_leaf_may_match(node, stats[node.field]))
+    except (TypeError, ValueError):
+        return True  # values the statistics cannot be compared with: read it
+
+
+def _row_group_stats(metadata: Any, i: int, columns: List[str]) -> Dict[str, Optional[ColumnStats]]:
+    group = metadata.row_group(i)
+    out: Dict[str, Optional[ColumnStats]] = {}
+    for j in range(group.num_columns):
+        chunk = group.column(j)
+        name = chunk.path_in_schema
+        if name not in columns:
+            continue
+        s = chunk.statistics
+        if s is None:
+            out[name] = None
+            continue
+        lo, hi = (s.min, s.max) if s.has_min_max else (None, None)
+        if isinstance(lo, (dt.date, dt.datetime)):
+            lo, hi = pd.Timestamp(lo), pd.Timestamp(hi)
+        out[name] = (lo, hi, s.null_count if s.has_null_count else None, group.num_rows)
+    return out
+
+
+# -------------------------
+# Plan
+# -------------------------
+class ScanPlan:
+    """
+    What a config needs from its source, decided before anything is parsed:
+
+    - projection: only the columns the filter, the cleaning steps and the
+      requested output touch are read (`usecols` for CSV, a column list for
+      Parquet / Feather). Without `columns`, or with a drop_duplicates step
+      without a subset (it compares whole rows), every column is needed.
+    - predicate pushdown: rows are filtered as they are read. Parquet row
+      groups whose min / max statistics rule the filter out are skipped
+      without being read; in the others the filter columns are read first,
+      and the rest only for row groups with at least one match. CSV rows are
+      dropped chunk by chunk when a `chunksize` is given.
+
+    The filter is always evaluated exactly (FilterPlan) on what is read, so
+    the result equals `t.process` on the whole file, restricted to the
+    output columns. `stats` records what the last `scan` read and skipped.
+    """
+
+    def __init__(self, config: Optional[Dict[str, Any]], columns: Optional[List[str]] = None):
+        config = config or {}
+        self.filter = parse_ast(config.get("filter_ast"))
+        self.cleaning_plan = config.get("cleaning_plan")
+        self.output = list(columns) if columns is not None else None
+        self.filter_columns = compiled_plan(self.filter).columns
+        steps = ((self.cleaning_plan or {}).get("pandas") or {}).get("steps") or []
+        steps = steps if isinstance(steps, list) else []
+        self.step_columns = list(dict.fromkeys(c for step in steps for c in step_columns(step)))
+        whole_rows = any(split_step(s)[0] == "drop_duplicates" and not split_step(s)[1].get("subset") for s in steps)
+        self.all_columns = self.output is None or whole_rows
+        self.stats: Dict[str, int] = {}
+
+    def columns(self, available: List[str]) -> List[str]:
+        """Columns to read from a source with `available` columns, in source order."""
+        if self.all_columns:
+            return list(available)
+        wanted = set(self.filter_columns) | set(self.step_columns) | set(self.output)
+        return [c for c in available if c in wanted]
+
+    def explain(self, available: Optional[List[str]] = None) -> Dict[str, Any]:
+        out: Dict[str, Any] = {
+            "filter": self.filter.canonical,
+            "filter_columns": self.filter_columns,
+            "step_columns": self.step_columns,
+            "output_columns": self.output,
+        }
+        if available is not None:
+            read = self.columns(available)
+            out.update(read_columns=read, skipped_columns=[c for c in available if c not in read])
+        return out
+
+    # ---------- scans ----------
+    def _keep(self, df: pd.DataFrame) -> pd.DataFrame:
+        plan = compiled_plan(self.filter)
+        return select_rows(df, plan.evaluate(df))
+
+    def _finish(self, df: pd.DataFrame, rows_scanned: int, columns_total: int) -> pd.DataFrame:
+        self.stats.update(rows_scanned=rows_scanned, rows_kept=len(df), columns_read=df.shape[1], columns_total=columns_total)
+        return df
+
+    def scan(
+        self,
+        source: Source,
+        encoding: str = "utf-8",
+        delimiter: Optional[str] = None,
+        engine: str = "pandas",
+        chunksize: Optional[int] = None,
+    ) -> pd.DataFrame:
+        """
+        Read the filtered rows of the needed columns (df_filtered before the
+        output projection). `source` is a DataFrame, a CSV path / bytes /
+        file object, or a Parquet / Feather path. `engine` is load_df's CSV
+        parser; with `chunksize`, CSV rows are read and filtered that many
+        at a time (dtypes unified in a first pass over the needed columns,
+        as in streaming.process_stream) so unmatched rows are never held.
+        """
+        self.stats = {}
+        if isinstance(source, pd.DataFrame):
+            return self._finish(self._keep(source[self.columns(list(source.columns))]), len(source), source.shape[1])
+        path = None if isinstance(source, (bytes, bytearray)) or hasattr(source, "read") else os.fspath(source)
+        if path is not None and path.lower().endswith((".parquet", ".pq")):
+            return self._scan_parquet(path)
+        if path is not None and path.lower().endswith((".feather", ".arrow")):
+            import pyarrow.feather as feather
+
+            available = feather.read_table(path, memory_map=True).schema.names
+            table = feather.read_table(path, columns=self.columns(available), memory_map=True)
+            return self._finish(self._keep(table.to_pandas()), table.num_rows, len(available))
+        return self._scan_csv(source, encoding, delimiter, engine, chunksize)
+
+    def _scan_csv(self, source: Source, encoding: str, delimiter: Optional[str], engine: str, chunksize: Optional[int]) -> pd.DataFrame:
+        if delimiter is None:
+            delimiter = sniff_delimiter(read_sample(source), encoding)
+        available = csv_columns(source, encoding, delimiter)
+        usecols = None if self.all_columns else self.columns(available)
+
+        if chunksize is None:
+            if isinstance(source, (bytes, bytearray)):
+                data = bytes(source)
+            elif hasattr(source, "read"):
+                source.seek(0)
+                data = source.read()
+            else:
+                with open(source, "rb") as f:
+                    data = f.read()
+            df = load_df(data, encoding=encoding, delimiter=delimiter, engine=engine, usecols=usecols)
+            return self._finish(self._keep(df), len(df), len(available))
+
+        dtype = infer_stream_dtypes(source, chunksize, encoding, delimiter, usecols=usecols)
+        parts, rows = [], 0
+        for chunk in iter_csv_chunks(source, chunksize, encoding, delimiter, dtype, usecols=usecols):
+            rows += len(chunk)
+            parts.append(self._keep(chunk))
+        df = pd.concat(parts) if parts else pd.DataFrame(columns=usecols or available)
+        return self._finish(df, rows, len(available))
+
+    def _scan_parquet(self, path: str) -> pd.DataFrame:
+        import pyarrow.parquet as pq
+
+        pf = pq.ParquetFile(path)
+        available = pf.schema_arrow.names
+        needed = self.columns(available)
+        first = [c for c in needed if c in self.filter_columns]
+        rest = [c for c in needed if c not in first]
+        plan = compiled_plan(self.filter)
+
+        parts, offset, pruned, rows = [], 0, 0, 0
+        for i in range(pf.num_row_groups):
+            n = pf.metadata.row_group(i).num_rows
+            start, offset = offset, offset + n
+            if not may_match(self.filter, _row_group_stats(pf.metadata, i, available)):
+                pruned += 1
+                continue
+            rows += n
+            if not first:  # no filter column in the file: the filter is constant
+                part = pf.read_row_group(i, columns=needed).to_pandas()
+                part.index = pd.RangeIndex(start, start + n)
+                parts.append(self._keep(part))
+                continue
+            head = pf.read_row_group(i, columns=first).to_pandas()
+            keep = np.flatnonzero(plan.evaluate(head))
+            if not len(keep):
+                continue
+            part = head.iloc[keep]
+            if rest:
+                tail = pf.read_row_group(i, columns=rest).take(keep).to_pandas()
+                tail.index = part.index
+                part = pd.concat([part, tail], axis=1)[needed]
+            part.index = start + keep
+            parts.append(part)
+
+        df = pd.concat(parts) if parts else pf.schema_arrow.empty_table().select(needed).to_pandas()
+        self.stats.update(row_groups=pf.num_row_groups, row_groups_pruned=pruned)
+        return self._finish(df, rows, len(available))
+
+
+def lazy_process(
+    source: Source,
+    config: Optional[Dict[str, Any]],
+    columns: Optional[List[str]] = None,
+    encoding: str = "utf-8",
+    delimiter: Optional[str] = None,
+    engine: str = "pandas",
+    chunksize: Optional[int] = None,
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    `t.process(load_df(source), config)` restricted to the output `columns`
+    (all if None), reading only what the config needs (see ScanPlan):
+    returns (df_filtered, df_cleaned) with those columns.
+    """
+    plan = ScanPlan(config, columns)
+    df_filtered = plan.scan(source, encoding, delimiter, engine, chunksize)
+    df_cleaned = run_cleaning_plan(df_filtered, plan.cleaning_plan)
+    if plan.output is None:
+        return df_filtered, df_cleaned
+    output = [c for c in plan.output if c in df_filtered.columns]
+    missing = [c for c in plan.output if c not in df_filtered.columns]
+    if missing:
+        logger.warning("Requested output column(s) not found: %s", missing)
+    return df_filtered[output], df_cleaned[[c for c in output if c in df_cleaned.columns]]
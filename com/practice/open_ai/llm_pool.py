@@ -0,0 +1,260 @@
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import hashlib
+import inspect
+import json
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL = "gpt-4o-mini"
+DEFAULT_MAX_CONCURRENCY = 8
+DEFAULT_TIMEOUT = 60.0
+
+# Status codes / exception names worth retrying (rate limits, timeouts, 5xx).
+_RETRY_STATUS = {408, 409, 429, 500, 502, 503, 504}
+_RETRY_NAMES = {"RateLimitError", "APIConnectionError", "APITimeoutError", "InternalServerError"}
+
+
+def _is_retryable(exc: BaseException) -> bool:
+    if isinstance(exc, (ConnectionError, TimeoutError, asyncio.TimeoutError)):
+        return True
+    if getattr(exc, "status_code", None) in _RETRY_STATUS:
+        return True
+    return type(exc).__name__ in _RETRY_NAMES
+
+
+def _is_rate_limit(exc: BaseException) -> bool:
+    return getattr(exc, "status_code", None) == 429 or type(exc).__name__ == "RateLimitError"
+
+
+def _retry_after(exc: BaseException) -> Optional[float]:
+    """Seconds the server asked us to wait (retry-after-ms / retry-after headers), if any."""
+    headers = getattr(getattr(exc, "response", None), "headers", None) or {}
+    for name, scale in (("retry-after-ms", 1e-3), ("retry-after", 1.0)):
+        value = headers.get(name)
+        if value is None:
+            continue
+        try:
+            return max(float(value) * scale, 0.0)
+        except ValueError:
+            continue  # an HTTP date; fall back to our own backoff
+    return None
+
+
+def request_key(model: str, messages: List[Dict[str, str]], temperature: Optional[float] = None) -> str:
+    # temperature only joins the key when set, so default-sampling keys are unchanged
+    raw = json.dumps([model, messages] + ([temperature] if temperature is not None else []), sort_keys=True)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class PoolMetrics:
+    """Counters and recent per-call latencies (one entry per HTTP attempt)."""
+
+    def __init__(self, window: int = 1000):
+        self.requests = 0
+        self.coalesced = 0
+        self.calls = 0
+        self.retries = 0
+        self.rate_limited = 0
+        self.failures = 0
+        self.latencies: Deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def add(self, field: str, n: int = 1) -> None:
+        with self._lock:
+            setattr(self, field, getattr(self, field) + n)
+
+    def record_call(self, seconds: float) -> None:
+        with self._lock:
+            self.calls += 1
+            self.latencies.append(seconds)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            lat = sorted(self.latencies)
+            out: Dict[str, Any] = {
+                "requests": self.requests, "coalesced": self.coalesced, "calls": self.calls,
+                "retries": self.retries, "rate_limited": self.rate_limited, "failures": self.failures,
+            }
+        pick = lambda q: round(lat[min(int(q * len(lat)), len(lat) - 1)] * 1000, 1) if lat else None
+        out.update({"latency_p50_ms": pick(0.5), "latency_p95_ms": pick(0.95), "latency_max_ms": pick(1.0)})
+        return out
+
+
+class LLMPool:
+    """
+    One shared chat-completions client for every English -> JSON call site.
+
+    Requests from any thread (Streamlit sessions, batch jobs) run on the
+    pool's own event loop in a background thread, over one async client with
+    pooled keep-alive connections:
+
+    - at most `max_concurrency` requests are on the wire at once;
+    - identical requests (same key) already in flight share one call;
+    - rate-limit / transient errors are retried with exponential backoff,
+      honouring the server's retry-after header; a 429 pauses every caller
+      until the wait is over, not just the one that hit it;
+    - `metrics` keeps counts and per-call latencies.
+
+    `temperature` (per call) is sent to the API when given; otherwise the
+    model's default sampling applies.
+
+    `client` may be an async client (AsyncOpenAI) or a sync one (OpenAI,
+    translation.StubClient); sync calls run in worker threads. Without one,
+    an AsyncOpenAI client is created on first use (API key / base URL from
+    the usual OPENAI_* environment variables).
+    """
+
+    def __init__(
+        self,
+        client: Any = None,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        max_retries: int = 3,
+        backoff: float = 0.5,
+        timeout: float = DEFAULT_TIMEOUT,
+    ):
+        self._client = client
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.metrics = PoolMetrics()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._inflight: Dict[str, asyncio.Task] = {}  # touched only on the pool loop
+        self._resume_at = 0.0
+        self._lock = threading.Lock()
+
+    # ---------- client / loop ----------
+    @property
+    def client(self) -> Any:
+        if self._client is None:
+            import httpx
+            from openai import AsyncOpenAI
+
+            limits = httpx.Limits(max_connections=self.max_concurrency, max_keepalive_connections=self.max_concurrency)
+            # retries are the pool's job (shared 429 pause, metrics); the SDK's own would hide them
+            self._client = AsyncOpenAI(max_retries=0, http_client=httpx.AsyncClient(limits=limits, timeout=self.timeout))
+        return self._client
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="llm-pool", daemon=True).start()
+                self._semaphore = asyncio.Semaphore(self.max_concurrency)
+                self._loop = loop
+            return self._loop
+
+    def close(self) -> None:
+        with self._lock:
+            loop, self._loop = self._loop, None
+        if loop is None:
+            return
+        close = getattr(self._client, "close", None)
+        if close is not None and inspect.iscoroutinefunction(close):
+            asyncio.run_coroutine_threadsafe(close(), loop).result(self.timeout)
+        loop.call_soon_threadsafe(loop.stop)
+
+    # ---------- calls (pool loop) ----------
+    async def _create(self, model: str, messages: List[Dict[str, str]], temperature: Optional[float]) -> str:
+        create = self.client.chat.completions.create
+        kwargs: Dict[str, Any] = {"model": model, "messages": messages}
+        if temperature is not None:
+            kwargs["temperature"] = temperature
+        # the SDK wraps its async create in a (sync) decorator: look through it
+        if inspect.iscoroutinefunction(inspect.unwrap(create)):
+            response = await create(**kwargs)
+        else:
+            response = await asyncio.to_thread(create, **kwargs)
+        return response.choices[0].message.content
+
+    async def _attempts(self, model: str, messages: List[Dict[str, str]], temperature: Optional[float]) -> str:
+        for attempt in range(self.max_retries + 1):
+            wait = self._resume_at - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            async with self._semaphore:
+                start = time.perf_counter()
+                try:
+                    return await asyncio.wait_for(self._create(model, messages, temperature), self.timeout)
+                except Exception as e:
+                    if attempt == self.max_retries or not _is_retryable(e):
+                        self.metrics.add("failures")
+                        raise
+                    delay = _retry_after(e)
+                    if delay is None:
+                        delay = self.backoff * (2 ** attempt) * (1 + random.random() * 0.25)
+                    if _is_rate_limit(e):
+                        self.metrics.add("rate_limited")
+                        self._resume_at = max(self._resume_at, time.monotonic() + delay)
+                    self.metrics.add("retries")
+                    logger.warning("LLM call failed (%s); retrying in %.2fs.", e, delay)
+                finally:
+                    self.metrics.record_call(time.perf_counter() - start)
+            await asyncio.sleep(delay)
+
+    async def _complete(self, key: str, model: str, messages: List[Dict[str, str]], temperature: Optional[float]) -> str:
+        self.metrics.add("requests")
+        task = self._inflight.get(key)
+        if task is not None:
+            self.metrics.add("coalesced")
+        else:
+            task = self._inflight[key] = asyncio.ensure_future(self._attempts(model, messages, temperature))
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # shield: one caller giving up must not cancel the call for the others
+        return await asyncio.shield(task)
+
+    # ---------- public API (any thread) ----------
+    def submit(
+        self,
+        messages: List[Dict[str, str]],
+        model: str = DEFAULT_MODEL,
+        key: Optional[str] = None,
+        temperature: Optional[float] = None,
+    ) -> concurrent.futures.Future:
+        """Schedule a completion; the future resolves to the reply text."""
+        key = key or request_key(model, messages, temperature)
+        return asyncio.run_coroutine_threadsafe(self._complete(key, model, messages, temperature), self._ensure_loop())
+
+    def complete(
+        self,
+        messages: List[Dict[str, str]],
+        model: str = DEFAULT_MODEL,
+        key: Optional[str] = None,
+        temperature: Optional[float] = None,
+    ) -> str:
+        """Blocking completion, for sync callers."""
+        return self.submit(messages, model, key, temperature).result()
+
+    async def acomplete(
+        self,
+        messages: List[Dict[str, str]],
+        model: str = DEFAULT_MODEL,
+        key: Optional[str] = None,
+        temperature: Optional[float] = None,
+    ) -> str:
+        """Completion awaitable from any event loop."""
+        return await asyncio.wrap_future(self.submit(messages, model, key, temperature))
+
+
+_SHARED: Optional[LLMPool] = None
+_SHARED_LOCK = threading.Lock()
+
+
+def shared_pool() -> LLMPool:
+    """The process-wide pool (concurrency via DATA_ZEN_LLM_CONCURRENCY)."""
+    global _SHARED
+    with _SHARED_LOCK:
+        if _SHARED is None:
+            _SHARED = LLMPool(max_concurrency=int(os.environ.get("DATA_ZEN_LLM_CONCURRENCY", DEFAULT_MAX_CONCURRENCY)))
+        return _SHARED
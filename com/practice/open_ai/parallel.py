@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from filter_ast import compiled_plan
+from t import copy_on_write, is_global_step, process, run_cleaning_plan, select_rows, step_columns
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PARTITION_ROWS = 250_000
+
+# ---------------------------------------
+# Shared-memory column transport
+# ---------------------------------------
+# Columns with a plain NumPy dtype are copied once into a SharedMemory block and
+# workers slice their partition out of it; nothing row-sized is pickled for them.
+# Object / extension columns (Python strings, pd.NA, categoricals, tz-aware
+# datetimes) are written once as an Arrow IPC stream into a SharedMemory block;
+# workers map it, take their row range and convert back to the column's dtype.
+# Columns Arrow cannot hold (mixed Python types), and every such column when
+# pyarrow is missing, fall back to pickling their partition slice into each task.
+ColumnSpec = Tuple[str, Any]  # ("shm", (name, dtype, length)) | ("arrow", (name, dtype)) | ("obj", Series slice)
+
+
+def _shareable(s: pd.Series) -> bool:
+    return isinstance(s.dtype, np.dtype) and s.dtype.kind in "biufcmM"
+
+
+def _share_arrow(s: pd.Series, blocks: List[shared_memory.SharedMemory]) -> Optional[str]:
+    """Write s into a new SharedMemory block as an Arrow IPC stream; None if Arrow cannot hold it."""
+    try:
+        import pyarrow as pa
+    except ImportError:
+        return None
+    try:
+        table = pa.Table.from_pandas(s.to_frame("c"), preserve_index=False)
+    except (pa.ArrowException, TypeError, ValueError):
+        return None
+
+    def write(sink: Any) -> None:
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+
+    size = pa.MockOutputStream()
+    write(size)
+    shm = shared_memory.SharedMemory(create=True, size=max(size.size(), 1))
+    blocks.append(shm)
+    buf = pa.py_buffer(shm.buf)
+    try:
+        write(pa.FixedSizeBufferWriter(buf))
+    finally:
+        del buf
+    return shm.name
+
+
+def _arrow_rows(buf: Any, dtype: Any, index: pd.RangeIndex) -> pd.Series:
+    import pyarrow as pa
+
+    column = pa.ipc.open_stream(pa.py_buffer(buf)).read_all().column(0)
+    # take() copies the rows out: once this returns, nothing refers to `buf`
+    part = column.take(pa.array(np.arange(index.start, index.stop)))
+    if dtype == object:
+        # to_pandas() would infer "str"; keep the Python objects (and None) as they were
+        return pd.Series(part.to_numpy(zero_copy_only=False), index=index, dtype=object)
+    values = part.to_pandas().set_axis(index)
+    return values if values.dtype == dtype else values.astype(dtype)
+
+
+def _attach(spec: ColumnSpec, start: int, stop: int) -> pd.Series:
+    kind, payload = spec
+    index = pd.RangeIndex(start, stop)
+    if kind == "obj":
+        return payload.set_axis(index)
+    if kind == "arrow":
+        name, dtype = payload
+        shm = shared_memory.SharedMemory(name=name)
+        try:
+            return _arrow_rows(shm.buf, dtype, index)
+        finally:
+            shm.close()
+    name, dtype, length = payload
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        arr = np.ndarray((length,), dtype=np.dtype(dtype), buffer=shm.buf)
+        return pd.Series(arr[start:stop].copy(), index=index, copy=False)
+    finally:
+        shm.close()
+
+
+def _run_partition(task: Tuple[int, int, Dict[str, ColumnSpec], Any, List[Any], List[str]]):
+    """Worker: filter one row range and run the row-local steps on it."""
+    start, stop, specs, ast, steps, out_columns = task
+    frame = pd.DataFrame(
+        {name: _attach(spec, start, stop) for name, spec in specs.items()},
+        index=pd.RangeIndex(start, stop),
+    )
+    mask = compiled_plan(ast).evaluate(frame)
+    cleaned = run_cleaning_plan(select_rows(frame, mask), {"pandas": {"steps": steps}}, inplace=True)
+    return mask, cleaned.index.to_numpy(), {c: cleaned[c] for c in out_columns if c in cleaned.columns}
+
+
+# --------------
+# Orchestration
+# --------------
+def process_parallel(
+    df: pd.DataFrame,
+    config: Dict[str, Any],
+    workers: Optional[int] = None,
+    partition_rows: int = DEFAULT_PARTITION_ROWS,
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Parallel counterpart of `t.process`, returning the same (df_filtered, df_cleaned).
+
+    The frame is split into row partitions of `partition_rows`; a pool of
+    `workers` processes (default: CPU count) evaluates filter_ast and the
+    leading run of row-local cleaning steps on each one, reading only the
+    columns those need. Results are reassembled in row order and any steps
+    from the first global one (median fill, winsorize_iqr, drop_duplicates)
+    onward run serially on the result. Output matches the serial path exactly.
+    The original df is never mutated.
+    """
+    config = config or {}
+    workers = workers or os.cpu_count() or 1
+    n = len(df)
+    if workers <= 1 or n <= partition_rows:
+        return process(df, config)
+
+    ast = config.get("filter_ast")
+    cleaning_plan = config.get("cleaning_plan") or {}
+    steps = (cleaning_plan.get("pandas") or {}).get("steps") or []
+    if not isinstance(steps, list):
+        return process(df, config)
+    split = next((i for i, step in enumerate(steps) if is_global_step(step)), len(steps))
+    local_steps, rest = steps[:split], steps[split:]
+
+    out_columns = [c for step in local_steps for c in step_columns(step) if c in df.columns]
+    out_columns = list(dict.fromkeys(out_columns))
+    needed = list(dict.fromkeys(compiled_plan(ast).columns + out_columns))
+    needed = [c for c in needed if c in df.columns]
+
+    blocks: List[shared_memory.SharedMemory] = []
+    try:
+        shared: Dict[str, ColumnSpec] = {}
+        for col in needed:
+            s = df[col]
+            if _shareable(s):
+                values = s.to_numpy()
+                shm = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+                blocks.append(shm)
+                np.ndarray(values.shape, dtype=values.dtype, buffer=shm.buf)[:] = values
+                shared[col] = ("shm", (shm.name, values.dtype.str, n))
+            else:
+                name = _share_arrow(s, blocks)
+                if name is not None:
+                    shared[col] = ("arrow", (name, s.dtype))
+
+        tasks = []
+        for start in range(0, n, partition_rows):
+            stop = min(start + partition_rows, n)
+            specs = {
+                col: shared[col] if col in shared else ("obj", df[col].iloc[start:stop])
+                for col in needed
+            }
+            tasks.append((start, stop, specs, ast, local_steps, out_columns))
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_run_partition, tasks))
+    finally:
+        for shm in blocks:
+            shm.close()
+            shm.unlink()
+
+    mask = np.concatenate([r[0] for r in results])
+    df_filtered = select_rows(df, mask)
+
+    # Surviving rows come back as positions in df (workers index by position).
+    kept = np.concatenate([r[1] for r in results]).astype(np.int64)
+    df_cleaned = df.iloc[kept] if copy_on_write() else df.iloc[kept].copy()
+    for col in out_columns:
+        # Empty partitions keep the pre-step dtype; leave them out so they cannot upcast the concat.
+        parts = [r[2][col] for r in results if col in r[2] and len(r[2][col])]
+        if parts:
+            df_cleaned[col] = pd.concat(parts).set_axis(df_cleaned.index)
+
+    if rest:
+        df_cleaned = run_cleaning_plan(df_cleaned, {"pandas": {"steps": rest}}, inplace=True)
+    return df_filtered, df_cleaned
@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import pandas as pd
+
+from filter_ast import canonical_ast
+from t import apply_filter_ast, is_column_step, run_cleaning_plan, select_rows
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ENTRIES = 64
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+
+
+def stage_key(*parts: Any) -> str:
+    """Hash of a stage's inputs: the parent key(s) plus its config fragment as canonical JSON."""
+    raw = json.dumps(parts, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _size(value: Any) -> int:
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True).sum())
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    return 0
+
+
+class Node:
+    """The output of one stage, identified by the hash of everything it depends on."""
+
+    __slots__ = ("key", "stage", "value")
+
+    def __init__(self, key: str, stage: str, value: Any):
+        self.key = key
+        self.stage = stage
+        self.value = value
+
+
+class Pipeline:
+    """
+    Dependency-tracked stage cache for the Streamlit app:
+
+        load -> filter -> clean (one node per run of steps) -> profile
+
+    Every node's key hashes its parent's key with its own config fragment, so
+    a node is recomputed only when something upstream of it changed. Cleaning
+    is cached per run of consecutive column steps (fused into one pass, see
+    t.run_cleaning_plan) and per row step: editing a step reuses the runs
+    before it and reruns its own run onward. Editing the filter reruns filter
+    and clean but not load. Results are kept
+    in memory, least recently used first out, within `max_entries` and
+    `max_bytes` (frames are counted in full even though cleaning steps share
+    unchanged columns, so the bound is conservative).
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Tuple[Node, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def _cached(self, key: str) -> Optional[Node]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def _store(self, node: Node) -> None:
+        size = _size(node.value)
+        with self._lock:
+            if node.key in self._entries:
+                return
+            self._entries[node.key] = (node, size)
+            self._bytes += size
+            while len(self._entries) > 1 and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+
+    def node(self, stage: str, key: str, compute: Callable[[], Any]) -> Node:
+        """Return the cached node for key, computing (and caching) it on a miss."""
+        cached = self._cached(key)
+        if cached is not None:
+            return cached
+        with self._lock:
+            self.misses += 1
+        logger.info("Recomputing stage '%s'.", stage)
+        node = Node(key, stage, compute())
+        self._store(node)
+        return node
+
+    # ---------- stages ----------
+    def load(self, file_key: str, load: Callable[[], pd.DataFrame]) -> Node:
+        """Loaded frame, keyed by the upload's content hash."""
+        return self.node("load", stage_key("load", file_key), load)
+
+    def filter(self, parent: Node, ast: Optional[Dict[str, Any]]) -> Node:
+        """Keyed by the canonical AST, so rephrased but equivalent filters share one result."""
+        if not ast:
+            return parent
+        node = canonical_ast(ast)
+        return self.node(
+            "filter",
+            stage_key(parent.key, "filter", node.canonical),
+            lambda: select_rows(parent.value, apply_filter_ast(parent.value, node)),
+        )
+
+    def clean(self, parent: Node, cleaning_plan: Optional[Dict[str, Any]]) -> Node:
+        """
+        One node per run of consecutive column steps and one per row step
+        (drop_duplicates, drop_invalid), so only the last frame of each run is
+        cached and a changed step only invalidates its run and later ones.
+        """
+        steps = ((cleaning_plan or {}).get("pandas") or {}).get("steps") or []
+        if not isinstance(steps, list):
+            logger.warning("cleaning_plan.pandas.steps is not a list; skipping.")
+            return parent
+        runs = []
+        for i, step in enumerate(steps):
+            if runs and is_column_step(step) and is_column_step(runs[-1][1][-1]):
+                runs[-1][1].append(step)
+            else:
+                runs.append((i, [step]))
+        node = parent
+        for start, run in runs:
+            prev = node
+            node = self.node(
+                f"clean[{start}:{start + len(run)}]",
+                stage_key(prev.key, "clean", run),
+                lambda: run_cleaning_plan(prev.value, {"pandas": {"steps": run}}),
+            )
+        return node
+
+    def derive(self, parent: Node, name: str, fn: Callable[[Any], Any], *config: Any) -> Any:
+        """A profile product of parent (e.g. a missing-value table), cached per parent and config."""
+        return self.node(name, stage_key(parent.key, name, config), lambda: fn(parent.value, *config)).value
+
+    def peek(self, parent: Node, name: str, *config: Any) -> Optional[Any]:
+        """What derive(parent, name, fn, *config) would return if it is already cached, else None (never computes)."""
+        cached = self._cached(stage_key(parent.key, name, config))
+        return None if cached is None else cached.value
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries), "bytes": self._bytes}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
@@ -0,0 +1,209 @@
+from __future__ import annotations
+
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from viz_data import DEFAULT_BINS, column_bins
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SAMPLE_ROWS = 100_000
+PREVIEW_MIN_ROWS = 500_000  # below this, exact statistics are fast enough for first paint
+Z_95 = 1.959963984540054
+
+
+# -------------------------
+# Sampling
+# -------------------------
+class Sample:
+    """A uniform (or proportionally stratified) row sample and the size of the frame it came from."""
+
+    __slots__ = ("frame", "population")
+
+    def __init__(self, frame: pd.DataFrame, population: int):
+        self.frame = frame
+        self.population = population
+
+    @property
+    def exact(self) -> bool:
+        return len(self.frame) >= self.population
+
+
+def sample_rows(
+    df: pd.DataFrame,
+    n: int = DEFAULT_SAMPLE_ROWS,
+    seed: int = 0,
+    stratify: Optional[str] = None,
+) -> Sample:
+    """
+    Up to `n` rows drawn without replacement, kept in their original order.
+    With `stratify`, each value of that column (missing values included) gets
+    rows in proportion to its share of df, so small groups are not missed by
+    chance; proportional allocation keeps the sample self-weighting, so the
+    estimators below apply unchanged.
+    """
+    total = len(df)
+    if total <= n:
+        return Sample(df, total)
+    rng = np.random.default_rng(seed)
+    if stratify is None or stratify not in df.columns:
+        if stratify is not None:
+            logger.warning("Stratify column '%s' not found; sampling uniformly.", stratify)
+        picked = rng.choice(total, size=n, replace=False)
+    else:
+        codes = pd.factorize(df[stratify], use_na_sentinel=False)[0]
+        order = np.argsort(codes, kind="stable")
+        bounds = np.searchsorted(codes[order], np.arange(codes.max() + 2))
+        sizes = np.diff(bounds)
+        quota = np.floor(sizes * n / total).astype(np.int64)
+        # hand out the rows lost to rounding to the largest remainders
+        short = n - int(quota.sum())
+        quota[np.argsort(-(sizes * n / total - quota), kind="stable")[:short]] += 1
+        picked = np.concatenate([
+            order[lo + rng.choice(size, size=q, replace=False)]
+            for lo, size, q in zip(bounds[:-1], sizes, quota) if q
+        ])
+    picked.sort()
+    return Sample(df.take(picked), total)
+
+
+# -------------------------
+# Interval helpers
+# -------------------------
+def proportion_interval(hits: np.ndarray, n: int, population: int, z: float = Z_95) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Wilson score interval for hits / n, with the finite population
+    correction (sampling without replacement). Zero width when n covers the
+    whole population.
+    """
+    hits = np.asarray(hits, dtype=float)
+    if n >= population or n == 0:
+        p = hits / n if n else np.zeros_like(hits)
+        return p, p
+    n_eff = n * (population - 1) / (population - n)
+    p = hits / n
+    denom = 1 + z * z / n_eff
+    centre = (p + z * z / (2 * n_eff)) / denom
+    half = z * np.sqrt(p * (1 - p) / n_eff + z * z / (4 * n_eff * n_eff)) / denom
+    return np.clip(centre - half, 0, 1), np.clip(centre + half, 0, 1)
+
+
+# -------------------------
+# Estimates
+# -------------------------
+def missing_estimate(sample: Sample) -> pd.DataFrame:
+    """Like app._missing_table, plus a 95% interval for each column's missing percentage."""
+    frame, population = sample.frame, sample.population
+    n = len(frame)
+    hits = frame.isna().sum()
+    low, high = proportion_interval(hits.to_numpy(), n, population)
+    pct = hits / n * 100 if n else hits.astype(float)
+    out = pd.DataFrame({
+        "missing_count": (pct / 100 * population).round().astype("int64"),
+        "missing_pct": pct.round(2),
+        "pct_low": (low * 100).round(2),
+        "pct_high": (high * 100).round(2),
+    }, index=hits.index)
+    return out.sort_values("missing_pct", ascending=False)
+
+
+def histogram_estimate(sample: Sample, column: str, bins: int = DEFAULT_BINS, method: str = "fixed") -> pd.DataFrame:
+    """
+    Estimated row counts per bin with 95% intervals. Bins are those
+    viz_data.histogram would draw for the sample (same `method`, edges from
+    the sample's values); values outside the sample's range fall in no bin.
+    """
+    n = len(sample.frame)
+    values, edges = column_bins(sample.frame[column], bins, method)
+    if edges is None:
+        return pd.DataFrame(columns=["left", "right", "count", "count_low", "count_high"])
+    counts, _ = np.histogram(values, bins=edges)
+    low, high = proportion_interval(counts, n, sample.population)
+    scale = sample.population / n
+    return pd.DataFrame({
+        "left": edges[:-1],
+        "right": edges[1:],
+        "count": np.round(counts * scale).astype("int64"),
+        "count_low": np.floor(low * sample.population).astype("int64"),
+        "count_high": np.ceil(high * sample.population).astype("int64"),
+    })
+
+
+def corr_estimate(sample: Sample, columns: Optional[list] = None, z: float = Z_95) -> Dict[str, pd.DataFrame]:
+    """
+    Pearson correlations on the sample (pairwise-complete, as DataFrame.corr),
+    with Fisher-z 95% intervals from each pair's row count. Returns frames
+    "r", "low", "high" and "n".
+    """
+    num = sample.frame[columns] if columns is not None else sample.frame.select_dtypes("number")
+    r = num.corr()
+    present = num.notna().to_numpy(dtype=np.float64)
+    pairs = pd.DataFrame(present.T @ present, index=r.index, columns=r.columns)
+    if sample.exact:
+        return {"r": r, "low": r, "high": r, "n": pairs}
+    with np.errstate(divide="ignore", invalid="ignore"):
+        fz = np.arctanh(r.clip(-1, 1))
+        half = z / np.sqrt(pairs - 3)
+        low, high = np.tanh(fz - half), np.tanh(fz + half)
+    low, high = low.where(pairs > 3), high.where(pairs > 3)
+    return {"r": r, "low": low, "high": high, "n": pairs}
+
+
+# -------------------------
+# Background refinement
+# -------------------------
+class Refiner:
+    """
+    Fire-and-forget exact computations on background threads, at most one in
+    flight per key, so a preview can be painted now and the exact result
+    shown on a later rerun. Results are not kept here: the submitted function
+    should store its own (e.g. via Pipeline.derive, read back with
+    Pipeline.peek). pandas releases the GIL in most heavy kernels, so this
+    keeps the UI responsive without a separate process. A key whose
+    computation raised is remembered (`failed`) and not run again.
+    """
+
+    def __init__(self, max_workers: int = 2):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="refine")
+        self._running: Dict[Hashable, Future] = {}
+        self._failed: Dict[Hashable, BaseException] = {}
+        self._lock = threading.Lock()
+
+    def _done(self, key: Hashable, future: Future) -> None:
+        error = future.exception()
+        with self._lock:
+            self._running.pop(key, None)
+            if error is not None:
+                self._failed[key] = error
+        if error is not None:
+            logger.warning("Background refinement %r failed: %s", key, error)
+
+    def submit(self, key: Hashable, fn: Callable[..., Any], *args: Any) -> Future:
+        with self._lock:
+            future = self._running.get(key)
+            if future is None and key in self._failed:
+                future = Future()
+                future.set_exception(self._failed[key])
+            if future is not None:
+                return future
+            future = self._running[key] = self._pool.submit(fn, *args)
+        future.add_done_callback(lambda f: self._done(key, f))
+        return future
+
+    def running(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._running
+
+    def failed(self, key: Hashable) -> Optional[BaseException]:
+        """The exception the computation for `key` raised, if it did."""
+        with self._lock:
+            return self._failed.get(key)
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._running)
@@ -0,0 +1,608 @@
+from __future__ import annotations
+
+import logging
+import math
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from streaming import DEFAULT_CHUNKSIZE, Source, iter_csv_chunks
+from t import pick_mode
+
+logger = logging.getLogger(__name__)
+
+# ------------------------------------------------------------------
+# Mergeable accumulators
+# ------------------------------------------------------------------
+# Every accumulator has update(chunk values) and merge(other), so a profile
+# can be built in one pass over chunks, or per partition / file and merged.
+# Results are exact while the data is small (see each class) and carry an
+# error bound once they are not.
+
+
+class Moments:
+    """Count, mean, sum of squared deviations (Welford / Chan), min and max."""
+
+    __slots__ = ("n", "mean", "m2", "min", "max")
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def _combine(self, n: int, mean: float, m2: float, lo: float, hi: float) -> None:
+        if n == 0:
+            return
+        total = self.n + n
+        delta = mean - self.mean
+        self.mean += delta * n / total
+        self.m2 += m2 + delta * delta * self.n * n / total
+        self.n = total
+        self.min = min(self.min, lo)
+        self.max = max(self.max, hi)
+
+    def update(self, x: np.ndarray) -> None:
+        """Add non-missing float64 values."""
+        if len(x):
+            mean = float(x.mean())
+            self._combine(len(x), mean, float(((x - mean) ** 2).sum()), float(x.min()), float(x.max()))
+
+    def merge(self, other: "Moments") -> None:
+        self._combine(other.n, other.mean, other.m2, other.min, other.max)
+
+    def var(self, ddof: int = 1) -> float:
+        return self.m2 / (self.n - ddof) if self.n > ddof else float("nan")
+
+    def with_constant(self, count: int, value: float) -> "Moments":
+        """These moments plus `count` copies of `value` (e.g. after imputing missing values)."""
+        out = Moments()
+        out.merge(self)
+        out._combine(count, value, 0.0, value, value)
+        return out
+
+
+class QuantileSketch:
+    """
+    KLL-style quantile sketch: levels of compactors, where an item at level h
+    stands for 2**h input values. A level holding more than `k` items is
+    sorted and every other item (random offset) is promoted. Exact until the
+    first compaction; afterwards `rank_error` bounds the absolute rank error
+    of any query (in practice it is far smaller, since offsets are random).
+    """
+
+    def __init__(self, k: int = 4096, seed: int = 0):
+        self.k = k
+        self.n = 0
+        self.rank_error = 0
+        self.levels: List[np.ndarray] = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    @property
+    def exact(self) -> bool:
+        return len(self.levels) == 1
+
+    def _compress(self) -> None:
+        h = 0
+        while h < len(self.levels):
+            buf = self.levels[h]
+            if len(buf) > self.k:
+                buf = np.sort(buf)
+                keep = buf[len(buf) - len(buf) % 2:]
+                promoted = buf[self._rng.integers(2):len(buf) - len(buf) % 2:2]
+                self.levels[h] = keep
+                if h + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                self.levels[h + 1] = np.concatenate([self.levels[h + 1], promoted])
+                self.rank_error += 2 ** h
+            h += 1
+
+    def update(self, x: np.ndarray) -> None:
+        if len(x):
+            self.levels[0] = np.concatenate([self.levels[0], x])
+            self.n += len(x)
+            self._compress()
+
+    def merge(self, other: "QuantileSketch") -> None:
+        for h, buf in enumerate(other.levels):
+            if h == len(self.levels):
+                self.levels.append(np.empty(0))
+            self.levels[h] = np.concatenate([self.levels[h], buf])
+        self.n += other.n
+        self.rank_error += other.rank_error
+        self._compress()
+
+    def _weighted(self):
+        values = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(b), 2 ** h, dtype=np.int64) for h, b in enumerate(self.levels)])
+        order = np.argsort(values, kind="stable")
+        return values[order], np.cumsum(weights[order])
+
+    def quantiles(self, qs: List[float]) -> List[float]:
+        """Linear-interpolated quantiles when exact (like Series.quantile), nearest rank otherwise."""
+        if self.n == 0:
+            return [float("nan")] * len(qs)
+        if self.exact:
+            return np.quantile(self.levels[0], qs).tolist()
+        values, cum = self._weighted()
+        idx = np.searchsorted(cum, np.asarray(qs) * cum[-1], side="left")
+        return values[np.minimum(idx, len(values) - 1)].tolist()
+
+    def count_below(self, x: float) -> float:
+        """Approximate number of values < x."""
+        if self.exact:
+            return float((self.levels[0] < x).sum())
+        values, cum = self._weighted()
+        i = np.searchsorted(values, x, side="left")
+        return float(cum[i - 1]) if i else 0.0
+
+    def count_above(self, x: float) -> float:
+        """Approximate number of values > x."""
+        if self.exact:
+            return float((self.levels[0] > x).sum())
+        values, cum = self._weighted()
+        i = np.searchsorted(values, x, side="right")
+        return float(cum[-1] - (cum[i - 1] if i else 0))
+
+
+class DistinctCounter:
+    """
+    HyperLogLog over 64-bit value hashes (2**p registers, relative standard
+    error 1.04 / sqrt(2**p)). The exact set of hashes is kept until it grows
+    past `exact_limit`, so small cardinalities are reported exactly.
+    """
+
+    def __init__(self, p: int = 14, exact_limit: int = 100_000):
+        self.p = p
+        self.registers = np.zeros(1 << p, dtype=np.uint8)
+        self.exact_limit = exact_limit
+        self.hashes: Optional[np.ndarray] = np.empty(0, dtype=np.uint64)
+
+    @property
+    def relative_error(self) -> float:
+        return 0.0 if self.hashes is not None else 1.04 / math.sqrt(1 << self.p)
+
+    def update(self, h: np.ndarray) -> None:
+        if not len(h):
+            return
+        h = h.astype(np.uint64, copy=False)
+        idx = (h >> np.uint64(64 - self.p)).astype(np.int64)
+        rest = h & np.uint64((1 << (64 - self.p)) - 1)
+        hi = (rest >> np.uint64(32)).astype(np.float64)
+        lo = (rest & np.uint64(0xFFFFFFFF)).astype(np.float64)
+        bit_length = np.where(hi > 0, 32 + np.frexp(hi)[1], np.frexp(lo)[1])
+        rank = (64 - self.p) - bit_length + 1
+        np.maximum.at(self.registers, idx, rank.astype(np.uint8))
+        if self.hashes is not None:
+            self.hashes = np.union1d(self.hashes, h)
+            if len(self.hashes) > self.exact_limit:
+                self.hashes = None
+
+    def merge(self, other: "DistinctCounter") -> None:
+        np.maximum(self.registers, other.registers, out=self.registers)
+        if self.hashes is None or other.hashes is None:
+            self.hashes = None
+        else:
+            self.hashes = np.union1d(self.hashes, other.hashes)
+            if len(self.hashes) > self.exact_limit:
+                self.hashes = None
+
+    def estimate(self) -> int:
+        if self.hashes is not None:
+            return int(len(self.hashes))
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        e = alpha * m * m / float(np.sum(np.ldexp(1.0, -self.registers.astype(np.int64))))
+        zeros = int((self.registers == 0).sum())
+        if e <= 2.5 * m and zeros:
+            e = m * math.log(m / zeros)
+        return int(round(e))
+
+
+class HeavyHitters:
+    """
+    Misra-Gries / mergeable summary of the `capacity` most frequent values.
+    Counts never overestimate and underestimate by at most `error`; with
+    error == 0 (at most `capacity` distinct values seen) they are exact.
+    """
+
+    def __init__(self, capacity: int = 1000):
+        self.capacity = capacity
+        self.counts = pd.Series(dtype="float64")
+        self.error = 0.0
+
+    def _trim(self, counts: pd.Series) -> pd.Series:
+        if len(counts) <= self.capacity:
+            return counts
+        counts = counts.sort_values(ascending=False, kind="stable")
+        cut = float(counts.iloc[self.capacity])
+        self.error += cut
+        counts = counts.iloc[:self.capacity] - cut
+        return counts[counts > 0]
+
+    def update(self, counts: pd.Series) -> None:
+        """Add one chunk's value_counts(dropna=True)."""
+        counts = self._trim(counts.astype("float64"))
+        self.counts = self._trim(self.counts.add(counts, fill_value=0) if len(self.counts) else counts)
+
+    def merge(self, other: "HeavyHitters") -> None:
+        self.error += other.error
+        self.update(other.counts)
+
+    def top(self, k: Optional[int] = None) -> pd.Series:
+        counts = self.counts.sort_values(ascending=False, kind="stable")
+        return counts if k is None else counts.iloc[:k]
+
+
+class CoMoments:
+    """
+    Pairwise-complete sums for a streaming covariance / Pearson correlation
+    matrix, as DataFrame.corr computes it (each pair over the rows where both
+    columns are present). Values are shifted by a per-column offset from the
+    first chunk to keep the one-pass sums numerically stable.
+    """
+
+    def __init__(self):
+        self.columns: List[str] = []
+        self.shift = np.empty(0)
+        self.n = self.sx = self.sxx = self.sxy = np.zeros((0, 0))
+
+    def _grow(self, names: List[str], shift: np.ndarray) -> None:
+        old = len(self.columns)
+        p = old + len(names)
+
+        def pad(a: np.ndarray) -> np.ndarray:
+            out = np.zeros((p, p))
+            out[:old, :old] = a
+            return out
+
+        self.columns = self.columns + names
+        self.shift = np.concatenate([self.shift, shift])
+        self.n, self.sx, self.sxx, self.sxy = (pad(a) for a in (self.n, self.sx, self.sxx, self.sxy))
+
+    def update(self, values: Dict[str, np.ndarray]) -> None:
+        new = [c for c in values if c not in self.columns]
+        if new:
+            shift = [np.nanmean(values[c]) if np.isfinite(values[c]).any() else 0.0 for c in new]
+            self._grow(new, np.nan_to_num(np.asarray(shift, dtype=float)))
+        if not values:
+            return
+        rows = len(next(iter(values.values())))
+        x = np.column_stack([values[c] if c in values else np.full(rows, np.nan) for c in self.columns]) - self.shift
+        present = np.isfinite(x)
+        if present.all():
+            # no missing values: the masked sums reduce to column sums and one Gram matrix
+            self.n += rows
+            self.sx += x.sum(axis=0)[:, None]
+            self.sxx += (x * x).sum(axis=0)[:, None]
+            self.sxy += x.T @ x
+            return
+        x0 = np.where(present, x, 0.0)
+        m = present.astype(np.float64)
+        self.n += m.T @ m
+        self.sx += x0.T @ m
+        self.sxx += (x0 * x0).T @ m
+        self.sxy += x0.T @ x0
+
+    def merge(self, other: "CoMoments") -> None:
+        if not other.columns:
+            return
+        new = [i for i, c in enumerate(other.columns) if c not in self.columns]
+        self._grow([other.columns[i] for i in new], other.shift[new])
+        pos = np.asarray([self.columns.index(c) for c in other.columns])
+        d = other.shift - self.shift[pos]  # re-express other's sums at our shift
+        n, sx = other.n, other.sx
+        sxx = other.sxx + 2 * d[:, None] * sx + (d * d)[:, None] * n
+        sxy = other.sxy + d[None, :] * sx + d[:, None] * sx.T + np.outer(d, d) * n
+        sx = sx + d[:, None] * n
+        ix = np.ix_(pos, pos)
+        self.n[ix] += n
+        self.sx[ix] += sx
+        self.sxx[ix] += sxx
+        self.sxy[ix] += sxy
+
+    def corr(self, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        columns = [c for c in (columns or self.columns) if c in self.columns]
+        pos = np.asarray([self.columns.index(c) for c in columns], dtype=np.int64)
+        ix = np.ix_(pos, pos)
+        n, sx, sxx, sxy = self.n[ix], self.sx[ix], self.sxx[ix], self.sxy[ix]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mean_i, mean_j = sx / n, sx.T / n
+            cov = sxy / n - mean_i * mean_j
+            var_i = np.maximum(sxx / n - mean_i ** 2, 0.0)
+            var_j = np.maximum(sxx.T / n - mean_j ** 2, 0.0)
+            r = np.clip(cov / np.sqrt(var_i * var_j), -1.0, 1.0)
+        r[(n < 2) | (var_i == 0) | (var_j == 0)] = np.nan
+        return pd.DataFrame(r, index=columns, columns=columns)
+
+
+# ------------------------------------------------------------------
+# Per-column and per-dataset profiles
+# ------------------------------------------------------------------
+def _value_hashes(values: pd.Series, numeric: bool) -> np.ndarray:
+    if numeric:
+        return pd.util.hash_array(values.to_numpy(dtype="float64"))
+    return pd.util.hash_array(values.astype(str).to_numpy(dtype=object))
+
+
+class ColumnProfile:
+    """Accumulators for one column."""
+
+    def __init__(self, capacity: int = 1000, sketch_k: int = 4096):
+        self.rows = 0
+        self.nulls = 0
+        self.dtypes: List[str] = []
+        self.numeric = True
+        self.moments = Moments()
+        self.sketch = QuantileSketch(sketch_k)
+        self.distinct = DistinctCounter()
+        self.top = HeavyHitters(capacity)
+
+    def update(self, s: pd.Series) -> Optional[np.ndarray]:
+        """Add a chunk of the column; returns its float64 values if it is numeric."""
+        dtype = str(s.dtype)
+        if dtype not in self.dtypes:
+            self.dtypes.append(dtype)
+        numeric = pd.api.types.is_numeric_dtype(s) and not pd.api.types.is_bool_dtype(s)
+        self.numeric = self.numeric and numeric
+        self.rows += len(s)
+        present = s.dropna()
+        self.nulls += len(s) - len(present)
+        self.distinct.update(_value_hashes(present, numeric))
+        self.top.update(present.value_counts(dropna=True))
+        if not self.numeric:
+            return None
+        x = present.to_numpy(dtype="float64")
+        self.moments.update(x)
+        self.sketch.update(x)
+        return s.to_numpy(dtype="float64", na_value=np.nan)
+
+    def merge(self, other: "ColumnProfile") -> None:
+        self.rows += other.rows
+        self.nulls += other.nulls
+        self.dtypes += [d for d in other.dtypes if d not in self.dtypes]
+        self.numeric = self.numeric and other.numeric
+        self.moments.merge(other.moments)
+        self.sketch.merge(other.sketch)
+        self.distinct.merge(other.distinct)
+        self.top.merge(other.top)
+
+    @property
+    def dtype(self) -> str:
+        if len(self.dtypes) == 1:
+            return self.dtypes[0]
+        return "float64" if self.numeric else "object"
+
+
+class Profiler:
+    """
+    Single-pass dataset profile built from chunks (`update`) or merged from
+    other profiles (`merge`), then rendered for a DemoDP profiling_plan with
+    `report`.
+    """
+
+    def __init__(self, capacity: int = 1000, sketch_k: int = 4096):
+        self.capacity = capacity
+        self.sketch_k = sketch_k
+        self.rows = 0
+        self.chunks = 0
+        self.columns: Dict[str, ColumnProfile] = {}
+        self.comoments = CoMoments()
+
+    def update(self, chunk: pd.DataFrame) -> "Profiler":
+        self.rows += len(chunk)
+        self.chunks += 1
+        numeric: Dict[str, np.ndarray] = {}
+        for col in chunk.columns:
+            prof = self.columns.get(col)
+            if prof is None:
+                prof = self.columns[col] = ColumnProfile(self.capacity, self.sketch_k)
+            values = prof.update(chunk[col])
+            if values is not None:
+                numeric[col] = values
+        self.comoments.update(numeric)
+        return self
+
+    def merge(self, other: "Profiler") -> "Profiler":
+        self.rows += other.rows
+        self.chunks += other.chunks
+        for col, prof in other.columns.items():
+            if col in self.columns:
+                self.columns[col].merge(prof)
+            else:
+                self.columns[col] = prof
+        self.comoments.merge(other.comoments)
+        return self
+
+    # ---------- sections ----------
+    def numeric_columns(self) -> List[str]:
+        return [c for c, p in self.columns.items() if p.numeric]
+
+    def _existing(self, columns: Optional[List[str]]) -> List[str]:
+        if not columns:
+            return list(self.columns)
+        missing = [c for c in columns if c not in self.columns]
+        if missing:
+            logger.warning("Skipping missing column(s): %s", missing)
+        return [c for c in columns if c in self.columns]
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            "rows": self.rows,
+            "columns": len(self.columns),
+            "dtypes": {c: p.dtype for c, p in self.columns.items()},
+            "non_null": {c: p.rows - p.nulls for c, p in self.columns.items()},
+        }
+
+    def describe(self) -> Dict[str, Dict[str, Any]]:
+        out: Dict[str, Dict[str, Any]] = {}
+        for col, p in self.columns.items():
+            d: Dict[str, Any] = {"count": p.rows - p.nulls}
+            if p.numeric:
+                q1, q2, q3 = p.sketch.quantiles([0.25, 0.5, 0.75])
+                d.update({
+                    "mean": p.moments.mean if p.moments.n else float("nan"),
+                    "std": math.sqrt(p.moments.var(1)) if p.moments.n > 1 else float("nan"),
+                    "min": p.moments.min if p.moments.n else float("nan"),
+                    "25%": q1, "50%": q2, "75%": q3,
+                    "max": p.moments.max if p.moments.n else float("nan"),
+                    "quantile_rank_error": p.sketch.rank_error / p.sketch.n if p.sketch.n else 0.0,
+                })
+            else:
+                top = p.top.top()
+                d.update({
+                    "unique": p.distinct.estimate(),
+                    "unique_relative_error": p.distinct.relative_error,
+                    "top": pick_mode(top) if len(top) else None,
+                    "freq": float(top.max()) if len(top) else None,
+                    "freq_max_undercount": p.top.error,
+                })
+            out[col] = d
+        return out
+
+    def missingness(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            c: {"missing_count": p.nulls, "missing_pct": round(p.nulls / p.rows * 100, 2) if p.rows else 0.0}
+            for c, p in self.columns.items()
+        }
+
+    def value_counts(self, columns: Optional[List[str]] = None, dropna: bool = True, top: Optional[int] = None) -> Dict[str, Any]:
+        out = {}
+        for col in self._existing(columns):
+            p = self.columns[col]
+            counts = {str(k): float(v) for k, v in p.top.top(top).items()}
+            if not dropna and p.nulls:
+                counts["NaN"] = float(p.nulls)
+            out[col] = {"counts": counts, "max_undercount": p.top.error}
+        return out
+
+    def outliers(self, columns: Optional[List[str]] = None, k: float = 1.5) -> Dict[str, Any]:
+        out = {}
+        for col in self._existing(columns):
+            p = self.columns[col]
+            if not p.numeric:
+                logger.warning("outliers skipped for non-numeric column '%s'.", col)
+                continue
+            q1, q3 = p.sketch.quantiles([0.25, 0.75])
+            iqr = q3 - q1
+            lower, upper = q1 - k * iqr, q3 + k * iqr
+            out[col] = {
+                "q1": q1, "q3": q3, "iqr": iqr, "lower_fence": lower, "upper_fence": upper,
+                "count": int(round(p.sketch.count_below(lower) + p.sketch.count_above(upper))),
+                "exact": p.sketch.exact,
+            }
+        return out
+
+    def correlations(self, round_to: Optional[int] = None) -> Dict[str, Dict[str, float]]:
+        corr = self.comoments.corr(self.numeric_columns())
+        if round_to is not None:
+            corr = corr.round(round_to)
+        return {c: {k: (None if pd.isna(v) else float(v)) for k, v in row.items()} for c, row in corr.to_dict().items()}
+
+    def sklearn_checks(self, checks: Dict[str, Any]) -> Dict[str, Any]:
+        """The DemoDP scikit_learn.checks section, from the same accumulators (median imputation)."""
+        numeric = self.numeric_columns()
+        categorical = [c for c in self.columns if c not in numeric]
+        medians = {c: self.columns[c].sketch.quantiles([0.5])[0] for c in numeric}
+        imputed = {c: self.columns[c].moments.with_constant(self.columns[c].nulls, medians[c]) for c in numeric if self.columns[c].moments.n}
+        out: Dict[str, Any] = {}
+        if checks.get("identify_types"):
+            out["types"] = {"numeric": numeric, "categorical": categorical}
+        if checks.get("missing_rate"):
+            out["missing_rate"] = {c: (p.nulls / p.rows if p.rows else 0.0) for c, p in self.columns.items()}
+        imputers = checks.get("imputers")
+        if imputers and imputers.get("report_statistics", True):
+            out["imputers"] = {
+                "numeric_median": medians,
+                "categorical_most_frequent": {c: pick_mode(self.columns[c].top.top()) for c in categorical},
+            }
+        if checks.get("variance_threshold") is not None:
+            threshold = (checks.get("variance_threshold") or {}).get("threshold", 0.0)
+            out["near_constant"] = [c for c, m in imputed.items() if m.var(0) <= threshold]
+        if checks.get("standard_scaler_report"):
+            out["standard_scaler"] = {c: {"mean": m.mean, "std": math.sqrt(m.var(0))} for c, m in imputed.items()}
+        return out
+
+    def report(self, profiling_plan: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Render a DemoDP profiling_plan (or a whole DemoDP reply containing
+        one). Without a plan, info / describe_all / missingness_summary and
+        correlations are reported.
+        """
+        plan = profiling_plan or {}
+        plan = plan.get("profiling_plan", plan)
+        steps = (plan.get("pandas") or {}).get("steps")
+        if steps is None:
+            steps = ["info", "describe_all", "missingness_summary", {"correlations": {}}]
+
+        out: Dict[str, Any] = {"pandas": {}}
+        for step in steps:
+            if isinstance(step, str):
+                name, params = step, {}
+            elif isinstance(step, dict) and len(step) == 1:
+                name, params = next(iter(step.items()))
+                params = params if isinstance(params, dict) else {}
+            else:
+                name, params = None, {}
+            if name == "info":
+                out["pandas"]["info"] = self.info()
+            elif name == "describe_all":
+                out["pandas"]["describe_all"] = self.describe()
+            elif name == "missingness_summary":
+                out["pandas"]["missingness_summary"] = self.missingness()
+            elif name == "value_counts":
+                out["pandas"]["value_counts"] = self.value_counts(params.get("columns"), params.get("dropna", True), params.get("top"))
+            elif name == "outliers":
+                out["pandas"]["outliers"] = self.outliers(params.get("columns"), params.get("iqr_multiplier", 1.5))
+            elif name == "correlations":
+                out["pandas"]["correlations"] = self.correlations(params.get("round"))
+            else:
+                logger.warning("Unknown profiling step '%s'; skipping.", step)
+
+        checks = (plan.get("scikit_learn") or {}).get("checks")
+        if checks:
+            out["scikit_learn"] = self.sklearn_checks(checks)
+        if (plan.get("ydata_profiling") or {}).get("enabled"):
+            out["ydata_profiling"] = {"skipped": "needs the full frame in memory; not run by the streaming profiler"}
+        return out
+
+
+# -------------------------
+# Entry points
+# -------------------------
+def profile_chunks(chunks: Iterable[pd.DataFrame], profiling_plan: Optional[Dict[str, Any]] = None, **kwargs: Any) -> Dict[str, Any]:
+    profiler = Profiler(**kwargs)
+    for chunk in chunks:
+        profiler.update(chunk)
+    return profiler.report(profiling_plan)
+
+
+def profile_frame(
+    df: pd.DataFrame,
+    profiling_plan: Optional[Dict[str, Any]] = None,
+    chunk_rows: int = 1_000_000,
+    **kwargs: Any,
+) -> Dict[str, Any]:
+    """Profile an in-memory frame with the same accumulators, `chunk_rows` rows at a time."""
+    chunks = (df.iloc[i:i + chunk_rows] for i in range(0, len(df), chunk_rows))
+    return profile_chunks(chunks, profiling_plan, **kwargs)
+
+
+def profile_stream(
+    source: Source,
+    profiling_plan: Optional[Dict[str, Any]] = None,
+    chunksize: int = DEFAULT_CHUNKSIZE,
+    encoding: str = "utf-8",
+    delimiter: Optional[str] = None,
+    dtype: Optional[Dict[str, Any]] = None,
+    **kwargs: Any,
+) -> Dict[str, Any]:
+    """
+    Profile a CSV (path, bytes or file object) in one pass of `chunksize`
+    rows, without loading it. Memory is bounded by the chunk plus a fixed
+    amount of state per column (sketch, HLL registers, top-k table) and a
+    numeric-columns-squared covariance matrix.
+    """
+    return profile_chunks(iter_csv_chunks(source, chunksize, encoding, delimiter, dtype), profiling_plan, **kwargs)
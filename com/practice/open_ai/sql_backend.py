@@ -0,0 +1,762 @@
+from __future__ import annotations
+
+import datetime as dt
+import io
+import logging
+import os
+import re
+import tempfile
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from data_io import sniff_delimiter
+from filter_ast import AstNode, Const, Logic, Not, parse_ast
+from filter_plan import TEXT_CMPS, between_bounds, normalize_cmp
+from t import GLOBAL_FILL_STRATEGIES, dedupe_keep, split_step
+
+logger = logging.getLogger(__name__)
+
+Source = Union[str, "os.PathLike[str]", bytes, io.IOBase, pd.DataFrame]
+
+ROW_ID = "__dz_row"
+
+# pandas.read_csv's default missing-value markers, so both engines see the same NULLs.
+NA_STRINGS = [
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN",
+    "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null",
+]
+# Types DuckDB's CSV sniffer may pick: what pandas infers (no dates; those stay text).
+CSV_TYPES = ["BOOLEAN", "BIGINT", "DOUBLE", "VARCHAR"]
+# Characters str.strip() removes.
+WHITESPACE = " \t\n\r\x0b\x0c"
+
+_NUMERIC_TYPES = re.compile(r"^(U?(TINY|SMALL|BIG|HUGE)?INT(EGER)?|FLOAT|DOUBLE|REAL|DECIMAL.*)$")
+
+
+def _import_duckdb():
+    try:
+        import duckdb
+    except ImportError as e:
+        raise ImportError("The duckdb engine requires duckdb (pip install duckdb).") from e
+    return duckdb
+
+
+def connect(memory_limit: Optional[str] = None, threads: Optional[int] = None, temp_directory: Optional[str] = None) -> Any:
+    """
+    An in-process DuckDB connection. Queries run multi-threaded and spill to
+    `temp_directory` once `memory_limit` (e.g. "4GB") is reached; defaults
+    come from DATA_ZEN_DUCKDB_MEMORY_LIMIT / DATA_ZEN_DUCKDB_THREADS /
+    DATA_ZEN_DUCKDB_TEMP_DIR, else DuckDB's own.
+    """
+    duckdb = _import_duckdb()
+    config: Dict[str, Any] = {}
+    memory_limit = memory_limit or os.environ.get("DATA_ZEN_DUCKDB_MEMORY_LIMIT")
+    threads = threads or os.environ.get("DATA_ZEN_DUCKDB_THREADS")
+    temp_directory = temp_directory or os.environ.get("DATA_ZEN_DUCKDB_TEMP_DIR")
+    if memory_limit:
+        config["memory_limit"] = str(memory_limit)
+    if threads:
+        config["threads"] = int(threads)
+    if temp_directory:
+        config["temp_directory"] = str(temp_directory)
+    return duckdb.connect(config=config)
+
+
+# -------------------------
+# SQL text
+# -------------------------
+def ident(name: Any) -> str:
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def literal(value: Any) -> str:
+    """A SQL literal for a JSON-ish config value (values are inlined, never formatted raw)."""
+    if isinstance(value, np.generic):
+        value = value.item()
+    if value is None:
+        return "NULL"
+    if isinstance(value, bool):
+        return "TRUE" if value else "FALSE"
+    if isinstance(value, int):
+        return str(value)
+    if isinstance(value, float):
+        return repr(value) if np.isfinite(value) else f"'{value}'::DOUBLE"
+    if isinstance(value, (pd.Timestamp, dt.datetime)):
+        return f"TIMESTAMP '{pd.Timestamp(value).isoformat(sep=' ')}'"
+    if isinstance(value, dt.date):
+        return f"DATE '{value.isoformat()}'"
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def _kind(sql_type: str) -> str:
+    """Coarse class of a DuckDB column type: number | bool | text | time | other."""
+    t = sql_type.upper()
+    if _NUMERIC_TYPES.match(t):
+        return "number"
+    if t == "BOOLEAN":
+        return "bool"
+    if t == "VARCHAR" or t.startswith("ENUM"):
+        return "text"
+    if t.startswith(("TIMESTAMP", "DATE", "TIME")):
+        return "time"
+    return "other"
+
+
+def _value_kind(value: Any) -> str:
+    if isinstance(value, (bool, np.bool_)):
+        return "bool"
+    if isinstance(value, (int, float, np.number)):
+        return "number"
+    if isinstance(value, str):
+        return "text"
+    if isinstance(value, (dt.date, pd.Timestamp)):
+        return "time"
+    return "other"
+
+
+def _comparable(col_kind: str, value: Any) -> bool:
+    """Whether pandas compares this column with this value (rather than raising / never matching)."""
+    kind = _value_kind(value)
+    if col_kind in ("number", "bool"):
+        return kind in ("number", "bool")
+    if col_kind == "time":
+        return kind in ("time", "text")
+    return col_kind == kind
+
+
+# -------------------------
+# Filter AST -> WHERE
+# -------------------------
+_SQL_OPS = {"eq": "=", "ne": "<>", "gt": ">", "ge": ">=", "lt": "<", "le": "<="}
+_TEXT_FUNCS = {"contains": "contains", "starts_with": "starts_with", "ends_with": "ends_with"}
+
+
+def _operand(col: str, col_kind: str, value: Any) -> str:
+    if col_kind == "number" and isinstance(value, (bool, np.bool_)):
+        value = int(value)
+    if col_kind == "time" and isinstance(value, str):
+        return f"TRY_CAST({literal(value)} AS TIMESTAMP)"
+    return literal(value)
+
+
+def predicate_sql(field: str, cmp: str, value: Any, types: Dict[str, str]) -> Optional[str]:
+    """
+    SQL for one canonical comparison that is TRUE / FALSE, never NULL, with
+    `eval_predicate` semantics: missing values only match ne / not_in, text
+    operators compare the string form of the value, and a comparison pandas
+    would raise on returns None (the caller decides what that means).
+    Raises KeyError if the column is not in `types`.
+    """
+    col, col_kind = ident(field), _kind(types[field])
+    if cmp == "between":
+        lo, hi = between_bounds(value)
+        bounds = [(b, op) for b, op in ((lo, ">="), (hi, "<=")) if b is not None]
+        if not all(_comparable(col_kind, b) for b, _ in bounds):
+            return None
+        return "COALESCE(" + " AND ".join(f"{col} {op} {_operand(col, col_kind, b)}" for b, op in bounds) + ", FALSE)"
+    if cmp in TEXT_CMPS:
+        if value is None:
+            return None
+        text = col if col_kind == "text" else f"CAST({col} AS VARCHAR)"
+        return f"COALESCE({_TEXT_FUNCS[cmp]}({text}, {literal(str(value))}), FALSE)"
+    if cmp in ("in", "not_in"):
+        values = [v for v in value if v is None or _comparable(col_kind, v)]
+        terms = []
+        present = [v for v in values if v is not None and not (isinstance(v, float) and np.isnan(v))]
+        if present:
+            terms.append(f"COALESCE({col} IN ({', '.join(_operand(col, col_kind, v) for v in present)}), FALSE)")
+        if len(present) < len(values):
+            terms.append(f"{col} IS NULL")
+        hit = " OR ".join(terms) or "FALSE"
+        return f"NOT ({hit})" if cmp == "not_in" else f"({hit})"
+    if not _comparable(col_kind, value):
+        # pandas: == never matches, != always does, ordering raises
+        return {"eq": "FALSE", "ne": "TRUE"}.get(cmp)
+    operand = _operand(col, col_kind, value)
+    if cmp == "ne":
+        return f"({col} IS DISTINCT FROM {operand})"
+    return f"COALESCE({col} {_SQL_OPS[cmp]} {operand}, FALSE)"
+
+
+def filter_sql(ast: Union[Dict[str, Any], AstNode, None], types: Dict[str, str]) -> str:
+    """
+    A WHERE condition equivalent to `t.apply_filter_ast` on a table with
+    column `types` (name -> DuckDB type). The AST is canonicalized first;
+    leaves on missing columns, and comparisons pandas would raise on, match
+    no rows (with a warning), as in FilterPlan.
+    """
+    root = ast if isinstance(ast, AstNode) else parse_ast(ast)
+
+    def build(node: AstNode) -> str:
+        if isinstance(node, Const):
+            return "TRUE" if node.value else "FALSE"
+        if isinstance(node, Not):
+            return f"NOT ({build(node.child)})"
+        if isinstance(node, Logic):
+            return "(" + f" {node.op} ".join(build(c) for c in node.children) + ")"
+        if node.field not in types:
+            logger.warning("Predicate skipped: column '%s' not found.", node.field)
+            return "FALSE"
+        try:
+            sql = predicate_sql(node.field, node.cmp, node.value, types)
+        except (ValueError, TypeError) as e:
+            sql, reason = None, e
+        else:
+            reason = f"cannot compare {types[node.field]} with {node.value!r}"
+        if sql is None:
+            logger.warning("Predicate evaluation error on column '%s' with cmp '%s': %s", node.field, node.cmp, reason)
+            return "FALSE"
+        return sql
+
+    return build(root)
+
+
+# -------------------------
+# Cleaning plan -> CTE chain
+# -------------------------
+class _Chain:
+    """
+    The cleaning plan as a chain of CTEs over `base`, one per step. Each
+    step is a SELECT over the previous one; statistics (median, IQR fences,
+    mode) are scalar subqueries over the previous stage, so the whole plan is
+    one query that DuckDB plans, parallelizes and spills as it sees fit.
+    """
+
+    def __init__(self, con: Any, base: str):
+        self.con = con
+        self.ctes: List[Tuple[str, str]] = [("s0", f"SELECT * FROM {base}")]
+        self._types: Optional[Dict[str, str]] = None
+
+    @property
+    def last(self) -> str:
+        return self.ctes[-1][0]
+
+    def sql(self, select: Optional[str] = None) -> str:
+        ctes = ",\n".join(f"{name} AS ({body})" for name, body in self.ctes)
+        return f"WITH {ctes}\n{select or f'SELECT * FROM {self.last}'}"
+
+    def types(self) -> Dict[str, str]:
+        if self._types is None:
+            rows = self.con.execute(f"DESCRIBE {self.sql()}").fetchall()
+            self._types = {r[0]: r[1] for r in rows}
+        return self._types
+
+    def scalar(self, select: str) -> Any:
+        """Run a query over the current stage now (for decisions that change a column's type)."""
+        return self.con.execute(self.sql(select)).fetchone()[0]
+
+    def push(self, body: str) -> None:
+        self.ctes.append((f"s{len(self.ctes)}", body))
+        self._types = None
+
+    def replace(self, exprs: Dict[str, str]) -> None:
+        if exprs:
+            cols = ", ".join(f"{e} AS {ident(c)}" for c, e in exprs.items())
+            self.push(f"SELECT * REPLACE ({cols}) FROM {self.last}")
+
+
+def _numeric(col: str, kind: str) -> str:
+    """The column as a number, non-numeric text -> NULL (pd.to_numeric(errors="coerce"))."""
+    if kind == "number":
+        return col
+    return f"TRY_CAST(trim({col}, {literal(WHITESPACE)}) AS DOUBLE)" if kind == "text" else f"TRY_CAST({col} AS DOUBLE)"
+
+
+def _clip(value: str, lo: Optional[str], hi: Optional[str]) -> str:
+    # CASE keeps NULL as NULL (greatest / least would skip it)
+    whens = [f"WHEN {value} < {b} THEN {b}" for b in (lo,) if b is not None]
+    whens += [f"WHEN {value} > {b} THEN {b}" for b in (hi,) if b is not None]
+    return f"CASE {' '.join(whens)} ELSE {value} END" if whens else value
+
+
+def _converts(chain: _Chain, col: str, expr: str) -> bool:
+    """True if every non-NULL value of col survives the conversion `expr`."""
+    return not chain.scalar(f"SELECT count(*) FROM {chain.last} WHERE {col} IS NOT NULL AND ({expr}) IS NULL")
+
+
+def _datetime_expr(col: str, kind: str, params: Dict[str, Any]) -> str:
+    from data_io import date_formats
+
+    if kind == "time":
+        return f"CAST({col} AS TIMESTAMP)"
+    text = f"NULLIF(trim(CAST({col} AS VARCHAR), {literal(WHITESPACE)}), '')"
+    fmt = params.get("format")
+    formats = [fmt] if fmt else date_formats(bool(params.get("dayfirst", False)))
+    parts = [f"TRY_STRPTIME({text}, {literal(f)})" for f in formats]
+    if not fmt:
+        parts.append(f"TRY_CAST({text} AS TIMESTAMP)")  # stands in for pandas' format="mixed"
+    return f"COALESCE({', '.join(parts)})"
+
+
+def _column_step(chain: _Chain, name: str, params: Dict[str, Any], col_name: str) -> Optional[str]:
+    """SQL for one column-local step on one column, or None to leave the column alone."""
+    col, kind = ident(col_name), _kind(chain.types()[col_name])
+    prev = chain.last
+
+    if name == "coerce_numeric":
+        if kind == "number":
+            return None
+        expr = _numeric(col, kind)
+        if params.get("errors", "coerce") != "coerce" and not _converts(chain, col, expr):
+            if params.get("errors") == "raise":
+                logger.warning("%s failed for column '%s': some values are not numbers", name, col_name)
+            return None
+        return expr
+    if name == "parse_datetime":
+        expr = _datetime_expr(col, kind, params)
+        if params.get("errors") == "raise" and not _converts(chain, col, expr):
+            logger.warning("%s failed for column '%s': some values are not dates", name, col_name)
+            return None
+        return expr
+    if name in ("strip_whitespace", "lowercase_text"):
+        if kind != "text":
+            return None
+        return f"trim({col}, {literal(WHITESPACE)})" if name == "strip_whitespace" else f"lower({col})"
+    if name == "standardize_categories":
+        mapping = params.get("mapping") or {}
+        if params.get("case_insensitive", True):
+            mapping = {(k.lower() if isinstance(k, str) else k): v for k, v in mapping.items()}
+            key = f"lower({col})"
+        else:
+            key = col
+        mapping = {k: v for k, v in mapping.items() if isinstance(k, str) and v is not None}
+        if kind != "text" or not mapping:
+            return None
+        whens = " ".join(f"WHEN {literal(k)} THEN {literal(str(v))}" for k, v in mapping.items())
+        return f"CASE {key} {whens} ELSE {col} END"
+    if name == "clip_values":
+        return _clip(_numeric(col, kind), literal(params.get("min")) if params.get("min") is not None else None,
+                     literal(params.get("max")) if params.get("max") is not None else None)
+    if name == "winsorize_iqr":
+        value = _numeric(col, kind)
+        k = literal(float(params.get("iqr_multiplier", 1.5)))
+        q = f"(SELECT quantile_cont({value}, [0.25, 0.75]) AS q FROM {prev})"
+        lo = f"(SELECT q[1] - {k} * (q[2] - q[1]) FROM {q})"
+        hi = f"(SELECT q[2] + {k} * (q[2] - q[1]) FROM {q})"
+        return _clip(value, lo, hi)
+    if name in ("fillna_numeric", "fillna_categorical"):
+        strategy = params.get("strategy", "constant")
+        if strategy == "constant":
+            value = params.get("value")
+            if not _comparable(kind, value):
+                logger.warning("%s skipped for column '%s': value %r does not fit a %s column.", name, col_name, value, chain.types()[col_name])
+                return None
+            fill = _operand(col, kind, value)
+        elif strategy == "most_frequent":
+            fill = f"(SELECT {col} FROM {prev} WHERE {col} IS NOT NULL GROUP BY {col} ORDER BY count(*) DESC, {col} LIMIT 1)"
+        else:
+            if kind != "number":
+                logger.warning("%s skipped for column '%s': %s of a %s column.", name, col_name, strategy, chain.types()[col_name])
+                return None
+            fill = f"(SELECT {'avg' if strategy == 'mean' else 'median'}({col}) FROM {prev})"
+        return f"COALESCE({col}, {fill})"
+    return None
+
+
+def _step_is_runnable(name: str, params: Dict[str, Any]) -> bool:
+    if name in ("fillna_numeric", "fillna_categorical"):
+        strategy = params.get("strategy", "constant")
+        if strategy != "constant" and strategy not in GLOBAL_FILL_STRATEGIES:
+            logger.warning("Unsupported strategy '%s' for %s; skipping.", strategy, name)
+            return False
+        if strategy == "constant" and params.get("value") is None:
+            logger.warning("fillna 'constant' skipped: value is None.")
+            return False
+    return True
+
+
+_COLUMN_STEPS = {
+    "coerce_numeric", "parse_datetime", "strip_whitespace", "lowercase_text", "standardize_categories",
+    "clip_values", "winsorize_iqr", "fillna_numeric", "fillna_categorical",
+}
+
+
+def _drop_duplicates(chain: _Chain, params: Dict[str, Any]) -> None:
+    columns = [c for c in chain.types() if c != ROW_ID]
+    subset = params.get("subset")
+    if subset:
+        missing = [c for c in subset if c not in columns]
+        if missing:
+            logger.warning("Skipping missing column(s): %s", missing)
+        columns = [c for c in subset if c in columns]
+        if not columns:
+            logger.warning("drop_duplicates skipped: none of the subset columns exist.")
+            return
+    keys = ", ".join(ident(c) for c in columns)
+    keep = dedupe_keep(params.get("keep", "first"))
+    if keep is False:
+        cond = f"count(*) OVER (PARTITION BY {keys}) = 1"
+    else:
+        cond = f"row_number() OVER (PARTITION BY {keys} ORDER BY {ROW_ID}{' DESC' if keep == 'last' else ''}) = 1"
+    chain.push(f"SELECT * FROM {chain.last} QUALIFY {cond}")
+
+
+def _drop_invalid(chain: _Chain, params: Dict[str, Any]) -> None:
+    types = chain.types()
+    conds = []
+    for rule in params.get("rules") or []:
+        if not isinstance(rule, dict):
+            logger.warning("Malformed drop_invalid rule '%s'; skipping.", rule)
+            continue
+        col, cmp, value = rule.get("column"), normalize_cmp(rule.get("cmp")), rule.get("value")
+        if col not in types:
+            logger.warning("drop_invalid rule skipped: column '%s' not found.", col)
+            continue
+        if cmp is None or (cmp in ("in", "not_in") and value is None):
+            logger.warning("drop_invalid rule on '%s' skipped: unsupported cmp '%s' / value '%s'.", col, rule.get("cmp"), value)
+            continue
+        try:
+            ok = predicate_sql(col, cmp, value, types)
+        except (ValueError, TypeError) as e:
+            ok, reason = None, e
+        else:
+            reason = f"cannot compare {types[col]} with {value!r}"
+        if ok is None:
+            logger.warning("drop_invalid rule on '%s' skipped: %s", col, reason)
+            continue
+        conds.append(f"({ok} OR {ident(col)} IS NULL)")
+    if conds:
+        chain.push(f"SELECT * FROM {chain.last} WHERE {' AND '.join(conds)}")
+
+
+def cleaning_sql(con: Any, base: str, cleaning_plan: Optional[Dict[str, Any]], row_id: bool = True) -> str:
+    """
+    One SQL query applying cleaning_plan['pandas']['steps'] (the
+    `t.run_cleaning_plan` vocabulary) to the table / view `base`, which must
+    carry the ROW_ID column; rows come out in ROW_ID order, with ROW_ID
+    unless row_id=False. Malformed or unsupported steps are skipped with a
+    warning, as in the pandas engine.
+
+    Differences from the pandas engine, all on inputs the DemoDC prompt does
+    not produce: columns stay single-typed, so a fillna value of another type,
+    or a mapping onto non-text columns, is skipped; parse_datetime's fallback
+    for unknown layouts is DuckDB's own timestamp cast, not pandas'
+    format="mixed" parser.
+    """
+    chain = _Chain(con, base)
+    steps = ((cleaning_plan or {}).get("pandas") or {}).get("steps") or [] if cleaning_plan else []
+    if not isinstance(steps, list):
+        logger.warning("cleaning_plan.pandas.steps is not a list; skipping.")
+        steps = []
+    for step in steps:
+        name, params = split_step(step)
+        if name is None:
+            logger.warning("Malformed step '%s'; skipping.", step)
+        elif name in _COLUMN_STEPS:
+            if not _step_is_runnable(name, params):
+                continue
+            columns = params.get("columns") or ([params["column"]] if params.get("column") is not None else [])
+            missing = [c for c in columns if c not in chain.types()]
+            if missing:
+                logger.warning("Skipping missing column(s): %s", missing)
+            exprs = {}
+            for col in columns:
+                if col in chain.types() and col != ROW_ID:
+                    expr = _column_step(chain, name, params, col)
+                    if expr is not None:
+                        exprs[col] = expr
+            chain.replace(exprs)
+        elif name == "drop_duplicates":
+            _drop_duplicates(chain, params)
+        elif name == "drop_invalid":
+            _drop_invalid(chain, params)
+        else:
+            logger.warning("Unknown step '%s'; skipping.", name)
+    exclude = "" if row_id else f" EXCLUDE ({ROW_ID})"
+    return chain.sql(f"SELECT *{exclude} FROM {chain.last} ORDER BY {ROW_ID}")
+
+
+# -------------------------
+# Sources
+# -------------------------
+def _scan(con: Any, source: Source, encoding: str, delimiter: Optional[str]) -> Tuple[str, Optional[pd.Index], Optional[str]]:
+    """
+    (table expression, index of a DataFrame source, temp file to remove).
+    Paths ending in .parquet / .pq are read with read_parquet, .feather /
+    .arrow (frame_cache entries) through a memory-mapped Arrow table, anything
+    else as CSV. Bytes and file objects are spilled to a temp file first.
+    """
+    if isinstance(source, pd.DataFrame):
+        con.register("__dz_source", source)
+        return "__dz_source", source.index, None
+
+    tmp = None
+    if isinstance(source, (bytes, bytearray)) or hasattr(source, "read"):
+        if hasattr(source, "read"):
+            source.seek(0)
+            data = source.read()
+            data = data.encode(encoding) if isinstance(data, str) else data
+        else:
+            data = bytes(source)
+        fd, tmp = tempfile.mkstemp(suffix=".csv")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        source = tmp
+
+    path = os.fspath(source)
+    lower = path.lower()
+    if lower.endswith((".parquet", ".pq")):
+        return f"read_parquet({literal(path)})", None, tmp
+    if lower.endswith((".feather", ".arrow")):
+        import pyarrow.feather as feather
+
+        con.register("__dz_source", feather.read_table(path, memory_map=True))
+        return "__dz_source", None, tmp
+    if delimiter is None:
+        with open(path, "rb") as f:
+            delimiter = sniff_delimiter(f.read(64 * 1024), encoding)
+    options = [
+        f"delim = {literal(delimiter)}", "header = true",
+        f"encoding = {literal(encoding.replace('_', '-').lower())}",
+        f"auto_type_candidates = [{', '.join(literal(t) for t in CSV_TYPES)}]",
+        f"nullstr = [{', '.join(literal(s) for s in NA_STRINGS)}]",
+        "ignore_errors = true",  # on_bad_lines="skip"
+    ]
+    return f"read_csv({literal(path)}, {', '.join(options)})", None, tmp
+
+
+def _to_frame(con: Any, sql: str, index: Optional[pd.Index]) -> pd.DataFrame:
+    """
+    Run sql and return the rows indexed by source row (or df.index label).
+    Results go through Arrow, which is several times faster than DuckDB's
+    own DataFrame conversion for text and yields the dtypes the pandas
+    reader would: str, int64 (float64 with missing values), object booleans
+    with missing values.
+    """
+    result = con.execute(sql)
+    fetch = getattr(result, "to_arrow_table", None) or result.fetch_arrow_table
+    df = fetch().to_pandas()
+    rows = df.pop(ROW_ID).to_numpy(dtype="int64")
+    for col in df.columns:
+        if df[col].dtype.kind == "M":
+            df[col] = df[col].astype("datetime64[ns]")
+    df.index = index[rows] if index is not None else pd.Index(rows)
+    return df
+
+
+# -------------------------
+# Orchestration
+# -------------------------
+_SCANNED = "__dz_scanned"
+_FILTERED = "__dz_filtered"
+
+
+def _prepare(con: Any, source: Source, config: Dict[str, Any], encoding: str, delimiter: Optional[str]):
+    """
+    Register the source as a view numbered by ROW_ID and materialize the
+    filtered rows (the only rows the cleaning statistics re-read) as a temp
+    table, which DuckDB spills to disk when it outgrows memory_limit.
+    Returns (source index, temp file to remove).
+    """
+    table, index, tmp = _scan(con, source, encoding, delimiter)
+    types = {r[0]: r[1] for r in con.execute(f"DESCRIBE SELECT * FROM {table}").fetchall()}
+    # enums (pandas categoricals) are cleaned as text, like their categories
+    select = ", ".join(
+        f"CAST({ident(c)} AS VARCHAR) AS {ident(c)}" if t.startswith("ENUM") else ident(c) for c, t in types.items()
+    )
+    types = {c: ("VARCHAR" if t.startswith("ENUM") else t) for c, t in types.items()}
+    where = filter_sql((config or {}).get("filter_ast"), types)
+    con.execute(f"CREATE OR REPLACE TEMP VIEW {_SCANNED} AS SELECT row_number() OVER () - 1 AS {ROW_ID}, {select} FROM {table}")
+    con.execute(f"CREATE OR REPLACE TEMP TABLE {_FILTERED} AS SELECT * FROM {_SCANNED} WHERE {where}")
+    return index, tmp
+
+
+def process_duckdb(
+    source: Source,
+    config: Dict[str, Any],
+    con: Any = None,
+    encoding: str = "utf-8",
+    delimiter: Optional[str] = None,
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    `t.process` on the DuckDB engine: returns (df_filtered, df_cleaned) with
+    the same rows, order and values. `source` is a DataFrame, a CSV path /
+    bytes / file object (read by DuckDB's parallel reader, not pandas) or a
+    Parquet / Feather path. Rows are indexed like `t.process` would index
+    them: by the DataFrame's labels, or by row position in the file.
+    Categorical columns come back as plain text.
+    """
+    own = con is None
+    con = con or connect()
+    tmp = None
+    try:
+        index, tmp = _prepare(con, source, config, encoding, delimiter)
+        df_filtered = _to_frame(con, f"SELECT * FROM {_FILTERED} ORDER BY {ROW_ID}", index)
+        df_cleaned = _to_frame(con, cleaning_sql(con, _FILTERED, (config or {}).get("cleaning_plan")), index)
+        return df_filtered, df_cleaned
+    finally:
+        if own:
+            con.close()
+        if tmp:
+            os.remove(tmp)
+
+
+def _copy(con: Any, query: str, path: Union[str, "os.PathLike[str]"], fmt: Optional[str]) -> int:
+    fmt = (fmt or "").lower() or ("parquet" if str(path).lower().endswith((".parquet", ".pq")) else "csv")
+    if fmt not in ("csv", "parquet"):
+        raise ValueError(f"Unsupported output format '{fmt}'; use 'csv' or 'parquet'.")
+    options = "FORMAT parquet" if fmt == "parquet" else "FORMAT csv, HEADER true"
+    return con.execute(f"COPY ({query}) TO {literal(os.fspath(path))} ({options})").fetchone()[0]
+
+
+def process_duckdb_to(
+    source: Source,
+    config: Dict[str, Any],
+    sink: Union[str, "os.PathLike[str]"],
+    filtered_sink: Optional[Union[str, "os.PathLike[str]"]] = None,
+    fmt: Optional[str] = None,
+    con: Any = None,
+    encoding: str = "utf-8",
+    delimiter: Optional[str] = None,
+) -> Dict[str, int]:
+    """
+    The DuckDB counterpart of `streaming.process_stream`, for files larger
+    than memory: the cleaned rows (and optionally df_filtered) are written
+    by DuckDB's COPY to CSV or Parquet (by extension / `fmt`) without ever
+    becoming a DataFrame. Returns counters: rows_in, rows_filtered, rows_out.
+    """
+    own = con is None
+    con = con or connect()
+    tmp = None
+    try:
+        _, tmp = _prepare(con, source, config, encoding, delimiter)
+        stats = {
+            "rows_in": con.execute(f"SELECT count(*) FROM {_SCANNED}").fetchone()[0],
+            "rows_filtered": con.execute(f"SELECT count(*) FROM {_FILTERED}").fetchone()[0],
+        }
+        if filtered_sink is not None:
+            _copy(con, f"SELECT * EXCLUDE ({ROW_ID}) FROM {_FILTERED} ORDER BY {ROW_ID}", filtered_sink, fmt)
+        cleaned = cleaning_sql(con, _FILTERED, (config or {}).get("cleaning_plan"), row_id=False)
+        stats["rows_out"] = _copy(con, cleaned, sink, fmt)
+        return stats
+    finally:
+        if own:
+            con.close()
+        if tmp:
+            os.remove(tmp)
+
+
+# -------------------------
+# Parity corpus
+# -------------------------
+def parity_corpus() -> Dict[str, Dict[str, Any]]:
+    """
+    Configs both engines must agree on: every comparator (and alias) the
+    prompts emit and every cleaning step, over the columns of
+    `benchmark.customer_schema`. Add a case here with every new comparator
+    or step.
+    """
+    city_in = {"op": "CMP", "field": "city", "cmp": "in", "value": ["Mumbai", "Delhi", "Pune"]}
+    cmp = lambda field, op, value: {"op": "CMP", "field": field, "cmp": op, "value": value}
+    steps = lambda *s: {"pandas": {"steps": list(s)}}
+    return {
+        "no_filter": {"filter_ast": None},
+        "eq_ne": {"filter_ast": {"op": "OR", "children": [cmp("separtment", "eq", "IT"), cmp("country", "!=", "US")]}},
+        "ordering": {"filter_ast": {"op": "AND", "children": [
+            cmp("age", ">=", 25), cmp("age", "lt", 40), cmp("salary", "gt", 1_000_000), cmp("amount", "<=", 1500)]}},
+        "in_not_in": {"filter_ast": {"op": "AND", "children": [city_in, cmp("status", "not_in", ["shipped", None])]}},
+        "not": {"filter_ast": {"op": "NOT", "children": [cmp("country", "in", ["US", "IN"])]}},
+        "between": {"filter_ast": {"op": "OR", "children": [
+            cmp("age", "between", {"min": 30, "max": 35}), cmp("amount", "between", [None, 10])]}},
+        "text": {"filter_ast": {"op": "OR", "children": [
+            cmp("email", "contains", "example"), cmp("first_name", "starts_with", "A"), cmp("company", "endswith", "a")]}},
+        "type_mismatch": {"filter_ast": {"op": "OR", "children": [
+            cmp("city", "gt", 5), cmp("age", "eq", "30"), cmp("missing_column", "eq", 1)]}},
+        "fill_constant": {"filter_ast": city_in, "cleaning_plan": steps(
+            {"fillna_categorical": {"columns": ["separtment", "city", "company"], "strategy": "constant", "value": "UNKNOWN"}},
+            {"fillna_numeric": {"columns": ["age", "salary", "amount"], "strategy": "constant", "value": 0}},
+            {"clip_values": {"columns": ["age"], "min": 18, "max": 65}},
+        )},
+        "fill_stats": {"cleaning_plan": steps(
+            {"fillna_numeric": {"columns": ["age"], "strategy": "median"}},
+            {"fillna_numeric": {"columns": ["amount"], "strategy": "mean"}},
+            {"fillna_categorical": {"columns": ["company", "city"], "strategy": "most_frequent"}},
+        )},
+        "text_steps": {"cleaning_plan": steps(
+            {"strip_whitespace": {"columns": ["first_name", "company"]}},
+            {"lowercase_text": {"columns": ["company"]}},
+            {"standardize_categories": {"column": "separtment", "mapping": {"it": "Tech", "HR": "People"}}},
+        )},
+        "types": {"cleaning_plan": steps(
+            {"coerce_numeric": {"columns": ["phone_number", "age"], "errors": "coerce"}},
+            {"coerce_numeric": {"columns": ["customer_id"], "errors": "ignore"}},
+            {"parse_datetime": {"columns": ["date_of_birth"], "format": "%Y-%m-%d"}},
+            {"parse_datetime": {"columns": ["date_of_joining"]}},
+        )},
+        "winsorize": {"cleaning_plan": steps({"winsorize_iqr": {"columns": ["salary", "amount"], "iqr_multiplier": 1.0}})},
+        "dedupe": {"filter_ast": cmp("age", "ge", 30), "cleaning_plan": steps(
+            {"drop_duplicates": {"subset": ["city", "separtment"], "keep": "first"}},
+        )},
+        "dedupe_last_none": {"cleaning_plan": steps(
+            {"drop_duplicates": {"subset": ["city", "status"], "keep": "last"}},
+            {"drop_duplicates": {"subset": ["age"], "keep": False}},
+        )},
+        "drop_invalid": {"cleaning_plan": steps(
+            {"drop_invalid": {"rules": [
+                {"column": "age", "cmp": "between", "value": [20, 60]},
+                {"column": "country", "cmp": "in", "value": ["US", "IN", "GB"]},
+                {"column": "city", "cmp": "gt", "value": 3},
+            ]}},
+        )},
+    }
+
+
+def _comparable_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Dtype-neutral view for parity checks: text and booleans as object, other numbers as float64."""
+    out = {}
+    for col in df.columns:
+        s = df[col]
+        if (isinstance(s.dtype, pd.CategoricalDtype) or pd.api.types.is_string_dtype(s.dtype)
+                or pd.api.types.is_bool_dtype(s.dtype)):
+            s = s.astype(object).where(s.notna(), None)
+        elif pd.api.types.is_numeric_dtype(s.dtype) and not pd.api.types.is_bool_dtype(s.dtype):
+            s = s.astype("float64")
+        out[col] = s
+    return pd.DataFrame(out, index=df.index)
+
+
+def check_parity(
+    source: Source,
+    configs: Optional[Dict[str, Dict[str, Any]]] = None,
+    con: Any = None,
+) -> Dict[str, str]:
+    """
+    Run every config (default `parity_corpus()`) through `t.process` and
+    `process_duckdb` and return {config name: first difference} for those
+    whose (df_filtered, df_cleaned) disagree; an empty dict means parity.
+    A CSV source is parsed by `data_io.load_df` for the pandas engine and
+    read by DuckDB itself for the other, so readers are compared too.
+    """
+    from data_io import load_df
+    from t import process
+
+    if isinstance(source, pd.DataFrame):
+        df = source
+    elif str(getattr(source, "name", source)).lower().endswith((".parquet", ".pq")):
+        df = pd.read_parquet(source)
+    else:
+        if isinstance(source, (bytes, bytearray)):
+            data = bytes(source)
+        elif hasattr(source, "read"):
+            source.seek(0)
+            data = source.read()
+        else:
+            with open(source, "rb") as f:
+                data = f.read()
+        df = load_df(data)
+
+    failures: Dict[str, str] = {}
+    for name, config in (configs if configs is not None else parity_corpus()).items():
+        try:
+            expected = process(df, config)
+            got = process_duckdb(source, config, con)
+            for label, want, have in zip(("df_filtered", "df_cleaned"), expected, got):
+                try:
+                    pd.testing.assert_frame_equal(_comparable_frame(want), _comparable_frame(have), check_index_type=False)
+                except AssertionError as e:
+                    raise AssertionError(f"{label}: {e}") from None
+        except Exception as e:
+            failures[name] = str(e)
+    return failures
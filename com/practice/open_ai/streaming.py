@@ -0,0 +1,481 @@
+from __future__ import annotations
+
+import io
+import logging
+import os
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from data_io import sniff_delimiter
+from filter_ast import compiled_batch, compiled_plan
+from filter_plan import FilterPlan
+from t import (
+    dedupe_keep,
+    iqr_fences,
+    is_global_step,
+    numeric_stats,
+    numeric_values,
+    pick_mode,
+    run_cleaning_plan,
+    select_rows,
+    split_step,
+)
+
+logger = logging.getLogger(__name__)
+
+Source = Union[str, "os.PathLike[str]", bytes, io.IOBase]
+
+DEFAULT_CHUNKSIZE = 100_000
+
+# ------------------------------------------------------------------
+# Global-statistic steps
+# ------------------------------------------------------------------
+# Most cleaning steps are row-local and run on each chunk independently.
+# These need a statistic over *all* filtered rows, as seen by the step (i.e.
+# after every earlier step has run):
+#
+#   fillna_* strategy=median|mean      exact: one extra pass collects the column
+#                                      as float64 (8 bytes/row for that column
+#                                      only), then the step becomes a constant
+#                                      fill with the same statistic
+#                                      (t.numeric_stats).
+#   fillna_* strategy=most_frequent    one extra pass merges per-chunk
+#                                      value_counts (memory ~ cardinality), then
+#                                      a constant fill with the mode.
+#   winsorize_iqr                      one extra pass collects the column, Q1/Q3
+#                                      come from t.numeric_stats and the step
+#                                      becomes clip_values at t.iqr_fences.
+#   drop_duplicates keep="first"       no extra pass; the final pass keeps a set
+#                                      of 64-bit row hashes already emitted.
+#   drop_duplicates keep="last"|False  one extra pass records, per row hash, the
+#                                      last position / occurrence count, and the
+#                                      final pass keeps only those positions.
+#
+# Every extra pass re-reads the source and replays the steps before it, so the
+# output matches the in-memory `t.process` path row for row. Row hashes come
+# from pd.util.hash_pandas_object; a 64-bit collision would merge two distinct
+# rows, which we accept. `t.is_global_step` decides which steps these are.
+class _Dedupe:
+    """Stateful drop_duplicates over a stream of chunks."""
+
+    def __init__(self, subset: Optional[List[str]], keep: Any):
+        self.subset = subset
+        self.keep = keep
+        self.keep_positions: Optional[np.ndarray] = None
+        self.reset()
+
+    def reset(self) -> None:
+        self.pos = 0
+        self.seen: set = set()
+
+    def _columns(self, chunk: pd.DataFrame) -> List[str]:
+        return [c for c in self.subset if c in chunk.columns] if self.subset else list(chunk.columns)
+
+    def _hashes(self, chunk: pd.DataFrame) -> np.ndarray:
+        return pd.util.hash_pandas_object(chunk[self._columns(chunk)], index=False).to_numpy()
+
+    def _positions(self, n: int) -> np.ndarray:
+        positions = np.arange(self.pos, self.pos + n)
+        self.pos += n
+        return positions
+
+    def collect(self, chunks: Iterator[pd.DataFrame]) -> None:
+        """Stats pass for keep="last"/False: decide which stream positions survive."""
+        last: Dict[int, int] = {}
+        first: Dict[int, int] = {}
+        counts: Dict[int, int] = {}
+        for chunk in chunks:
+            if not self._columns(chunk):  # no subset column exists: nothing is a duplicate, as in t
+                return
+            h = self._hashes(chunk).tolist()
+            pos = self._positions(len(chunk)).tolist()
+            if self.keep == "last":
+                last.update(zip(h, pos))
+            else:
+                for x, p in zip(h, pos):
+                    first.setdefault(x, p)
+                    counts[x] = counts.get(x, 0) + 1
+        keep = last.values() if self.keep == "last" else (first[x] for x, c in counts.items() if c == 1)
+        self.keep_positions = np.sort(np.fromiter(keep, dtype=np.int64))
+
+    def apply(self, chunk: pd.DataFrame) -> pd.DataFrame:
+        positions = self._positions(len(chunk))
+        kp = self.keep_positions
+        if kp is not None:
+            if not len(kp):
+                return chunk.iloc[:0]
+            idx = np.minimum(np.searchsorted(kp, positions), len(kp) - 1)
+            return chunk.loc[kp[idx] == positions]
+
+        if not self._columns(chunk):
+            return chunk
+        h = self._hashes(chunk)
+        keep = ~pd.Series(h).duplicated(keep="first").to_numpy()
+        keep &= np.fromiter((x not in self.seen for x in h.tolist()), dtype=bool, count=len(h))
+        self.seen.update(h[keep].tolist())
+        return chunk.loc[keep]
+
+
+# -------------------------
+# Reading
+# -------------------------
+def _open(source: Source) -> Any:
+    if isinstance(source, (bytes, bytearray)):
+        return io.BytesIO(source)
+    if hasattr(source, "read"):
+        source.seek(0)
+    return source
+
+
+def read_sample(source: Source, size: int = 64 * 1024) -> bytes:
+    if isinstance(source, (bytes, bytearray)):
+        return bytes(source[:size])
+    if hasattr(source, "read"):
+        source.seek(0)
+        sample = source.read(size)
+        return sample.encode() if isinstance(sample, str) else sample
+    with open(source, "rb") as f:
+        return f.read(size)
+
+
+def csv_columns(source: Source, encoding: str = "utf-8", delimiter: Optional[str] = None) -> List[str]:
+    """The header of the source CSV."""
+    sample = read_sample(source)
+    if delimiter is None:
+        delimiter = sniff_delimiter(sample, encoding)
+    return list(pd.read_csv(io.BytesIO(sample), sep=delimiter, encoding=encoding, nrows=0).columns)
+
+
+def iter_csv_chunks(
+    source: Source,
+    chunksize: int = DEFAULT_CHUNKSIZE,
+    encoding: str = "utf-8",
+    delimiter: Optional[str] = None,
+    dtype: Optional[Dict[str, Any]] = None,
+    usecols: Optional[List[str]] = None,
+) -> Iterator[pd.DataFrame]:
+    """Yield the source CSV (only `usecols`, if given) as DataFrames of at most `chunksize` rows."""
+    if delimiter is None:
+        delimiter = sniff_delimiter(read_sample(source), encoding)
+    reader = pd.read_csv(
+        _open(source),
+        sep=delimiter,
+        encoding=encoding,
+        on_bad_lines="skip",
+        chunksize=chunksize,
+        dtype=dtype,
+        usecols=usecols,
+    )
+    with reader:
+        yield from reader
+
+
+def infer_stream_dtypes(
+    source: Source,
+    chunksize: int = DEFAULT_CHUNKSIZE,
+    encoding: str = "utf-8",
+    delimiter: Optional[str] = None,
+    usecols: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    """
+    Scan the source once and return the dtype overrides needed so every chunk
+    parses to the same dtypes a whole-file `load_df` would produce
+    (int + float -> float64, numbers mixed with text -> str).
+    """
+    seen: Dict[str, set] = {}
+    for chunk in iter_csv_chunks(source, chunksize, encoding, delimiter, usecols=usecols):
+        for col, dt in chunk.dtypes.items():
+            seen.setdefault(col, set()).add(dt)
+
+    overrides: Dict[str, Any] = {}
+    for col, dtypes in seen.items():
+        if len(dtypes) == 1 or any(pd.api.types.is_bool_dtype(d) for d in dtypes):
+            continue
+        if all(pd.api.types.is_numeric_dtype(d) for d in dtypes):
+            overrides[col] = "float64"
+        else:
+            overrides[col] = str
+    return overrides
+
+
+# -------------------------
+# Sinks
+# -------------------------
+class _CsvSink:
+    def __init__(self, path: Union[str, "os.PathLike[str]"]):
+        self._f = open(path, "w", newline="", encoding="utf-8")
+        self._header = True
+
+    def write(self, chunk: pd.DataFrame) -> None:
+        chunk.to_csv(self._f, index=False, header=self._header)
+        self._header = False
+
+    def close(self) -> None:
+        self._f.close()
+
+
+class _ParquetSink:
+    def __init__(self, path: Union[str, "os.PathLike[str]"]):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("Parquet output requires pyarrow (pip install pyarrow).") from e
+        self._pa, self._pq = pa, pq
+        self._path = path
+        self._writer = None
+
+    def write(self, chunk: pd.DataFrame) -> None:
+        table = self._pa.Table.from_pandas(chunk, preserve_index=False)
+        if self._writer is None:
+            self._writer = self._pq.ParquetWriter(self._path, table.schema)
+        elif not table.schema.equals(self._writer.schema):
+            table = table.cast(self._writer.schema)
+        self._writer.write_table(table)
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+
+
+def _open_sink(path: Union[str, "os.PathLike[str]"], fmt: Optional[str]) -> Any:
+    fmt = (fmt or "").lower() or ("parquet" if str(path).lower().endswith((".parquet", ".pq")) else "csv")
+    if fmt == "parquet":
+        return _ParquetSink(path)
+    if fmt == "csv":
+        return _CsvSink(path)
+    raise ValueError(f"Unsupported output format '{fmt}'; use 'csv' or 'parquet'.")
+
+
+# -------------------------
+# Execution
+# -------------------------
+Op = Tuple[str, Any]  # ("steps", [step, ...]) | ("dedupe", _Dedupe)
+
+
+def _apply_ops(chunk: pd.DataFrame, ops: List[Op]) -> pd.DataFrame:
+    for kind, payload in ops:
+        if kind == "steps":
+            if payload:
+                chunk = run_cleaning_plan(chunk, {"pandas": {"steps": payload}}, inplace=True)
+        else:
+            chunk = payload.apply(chunk)
+    return chunk
+
+
+class _Pipeline:
+    """Filter + resolved cleaning ops, replayable over the source any number of times."""
+
+    def __init__(self, read, plan: FilterPlan):
+        self.read = read
+        self.plan = plan
+        self.passes = 0
+
+    def filtered(self) -> Iterator[pd.DataFrame]:
+        self.passes += 1
+        for chunk in self.read():
+            yield select_rows(chunk, self.plan.evaluate(chunk))
+
+    def run(self, ops: List[Op]) -> Iterator[pd.DataFrame]:
+        for kind, payload in ops:
+            if kind == "dedupe":
+                payload.reset()
+        for chunk in self.filtered():
+            yield _apply_ops(chunk, ops)
+
+
+def _numeric_column(chunks: Iterator[pd.DataFrame], columns: List[str]) -> Dict[str, np.ndarray]:
+    parts: Dict[str, List[np.ndarray]] = {c: [] for c in columns}
+    for chunk in chunks:
+        for col in columns:
+            if col in chunk.columns:
+                parts[col].append(numeric_values(chunk[col]))
+    return {c: np.concatenate(p) if p else np.empty(0) for c, p in parts.items()}
+
+
+def _value_counts(chunks: Iterator[pd.DataFrame], columns: List[str]) -> Dict[str, pd.Series]:
+    counts: Dict[str, pd.Series] = {c: pd.Series(dtype="int64") for c in columns}
+    for chunk in chunks:
+        for col in columns:
+            if col in chunk.columns:
+                counts[col] = counts[col].add(chunk[col].value_counts(dropna=True), fill_value=0)
+    return counts
+
+
+def _none_if_nan(value: Any) -> Any:
+    return None if value is None or (isinstance(value, float) and np.isnan(value)) else value
+
+
+def _resolve_step(pipe: _Pipeline, ops: List[Op], name: str, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Run one stats pass and rewrite a global step into equivalent row-local steps."""
+    columns = list(params.get("columns") or [])
+    if name == "winsorize_iqr":
+        k = params.get("iqr_multiplier", 1.5)
+        resolved = []
+        for col, values in _numeric_column(pipe.run(ops), columns).items():
+            lower, upper = iqr_fences(numeric_stats(values), k)
+            resolved.append({"clip_values": {"columns": [col], "min": lower, "max": upper}})
+        return resolved
+
+    strategy = params.get("strategy")
+    if strategy == "most_frequent":
+        stats = {c: pick_mode(vc) for c, vc in _value_counts(pipe.run(ops), columns).items()}
+    else:
+        stats = {c: numeric_stats(values)[strategy] for c, values in _numeric_column(pipe.run(ops), columns).items()}
+    return [
+        {name: {"columns": [col], "strategy": "constant", "value": _none_if_nan(value)}}
+        for col, value in stats.items()
+        if _none_if_nan(value) is not None
+    ]
+
+
+def _resolve_plan(pipe: _Pipeline, cleaning_plan: Optional[Dict[str, Any]]) -> List[Op]:
+    steps = ((cleaning_plan or {}).get("pandas") or {}).get("steps") or []
+    if not isinstance(steps, list):
+        logger.warning("cleaning_plan.pandas.steps is not a list; skipping.")
+        return []
+
+    ops: List[Op] = []
+    pending: List[Any] = []
+    for step in steps:
+        name, params = split_step(step)
+        if not is_global_step(step):
+            pending.append(step)
+            continue
+
+        ops.append(("steps", pending))
+        pending = []
+        if name == "drop_duplicates":
+            dedupe = _Dedupe(params.get("subset"), dedupe_keep(params.get("keep", "first")))
+            if dedupe.keep != "first":
+                dedupe.collect(pipe.run(ops))
+            ops.append(("dedupe", dedupe))
+        else:
+            pending = _resolve_step(pipe, ops, name, params)
+    ops.append(("steps", pending))
+    return ops
+
+
+def process_stream(
+    source: Source,
+    config: Dict[str, Any],
+    sink: Union[str, "os.PathLike[str]"],
+    filtered_sink: Optional[Union[str, "os.PathLike[str]"]] = None,
+    chunksize: int = DEFAULT_CHUNKSIZE,
+    fmt: Optional[str] = None,
+    encoding: str = "utf-8",
+    delimiter: Optional[str] = None,
+    dtype: Optional[Dict[str, Any]] = None,
+    engine: str = "pandas",
+) -> Dict[str, int]:
+    """
+    Streaming counterpart of `t.process`: read `source` in chunks of
+    `chunksize` rows, apply filter_ast and cleaning_plan to each chunk, and
+    append the cleaned rows to `sink` (CSV, or Parquet by extension / `fmt`).
+    `filtered_sink` optionally receives df_filtered the same way.
+
+    Peak memory is bounded by the chunk size, plus the per-column state that
+    global-statistic steps need (see the note at the top of this module).
+    If `dtype` is None, a schema pass first unifies per-chunk dtypes so the
+    output matches the in-memory path.
+
+    Returns counters: rows_in, rows_filtered, rows_out, chunks, passes.
+
+    engine="duckdb" hands the whole job to DuckDB instead
+    (sql_backend.process_duckdb_to: multi-threaded, spills to disk; it reads
+    the CSV itself, so `chunksize` and `dtype` do not apply and only
+    rows_in / rows_filtered / rows_out are returned).
+    """
+    if engine == "duckdb":
+        from sql_backend import process_duckdb_to
+
+        return process_duckdb_to(source, config, sink, filtered_sink, fmt, encoding=encoding, delimiter=delimiter)
+    if engine != "pandas":
+        raise ValueError(f"Unknown engine '{engine}'; expected 'pandas' or 'duckdb'.")
+    stats = {"rows_in": 0, "rows_filtered": 0, "rows_out": 0, "chunks": 0, "passes": 0}
+    if delimiter is None:
+        delimiter = sniff_delimiter(read_sample(source), encoding)
+    if dtype is None:
+        dtype = infer_stream_dtypes(source, chunksize, encoding, delimiter)
+        stats["passes"] += 1
+
+    def read() -> Iterator[pd.DataFrame]:
+        return iter_csv_chunks(source, chunksize, encoding, delimiter, dtype)
+
+    pipe = _Pipeline(read, compiled_plan((config or {}).get("filter_ast")))
+    ops = _resolve_plan(pipe, (config or {}).get("cleaning_plan"))
+    for kind, payload in ops:
+        if kind == "dedupe":
+            payload.reset()
+
+    out = _open_sink(sink, fmt)
+    out_filtered = _open_sink(filtered_sink, fmt) if filtered_sink is not None else None
+    try:
+        pipe.passes += 1
+        for chunk in read():
+            stats["chunks"] += 1
+            stats["rows_in"] += len(chunk)
+            df_filtered = select_rows(chunk, pipe.plan.evaluate(chunk))
+            stats["rows_filtered"] += len(df_filtered)
+            if out_filtered is not None:
+                out_filtered.write(df_filtered)
+            df_cleaned = _apply_ops(df_filtered, ops)
+            stats["rows_out"] += len(df_cleaned)
+            out.write(df_cleaned)
+    finally:
+        out.close()
+        if out_filtered is not None:
+            out_filtered.close()
+
+    stats["passes"] += pipe.passes
+    return stats
+
+
+def filter_stream_batch(
+    source: Source,
+    asts: Union[Dict[Any, Any], List[Any]],
+    sinks: Optional[Dict[Any, Union[str, "os.PathLike[str]"]]] = None,
+    chunksize: int = DEFAULT_CHUNKSIZE,
+    fmt: Optional[str] = None,
+    encoding: str = "utf-8",
+    delimiter: Optional[str] = None,
+    dtype: Optional[Dict[str, Any]] = None,
+) -> Dict[Any, int]:
+    """
+    Apply many filter ASTs (a dict {name: AST}, or a list named by position)
+    to the source CSV in one pass and return the matching row count per
+    filter. `sinks` optionally maps names to files (CSV, or Parquet by
+    extension / `fmt`) that receive that filter's rows.
+
+    The filters are compiled together (filter_ast.compiled_batch): every
+    chunk is read once and each distinct leaf evaluated once on it, however
+    many filters share it. Without sinks only the filter columns are parsed.
+    Unless `dtype` is given, a first pass over those columns unifies dtypes
+    as in process_stream.
+    """
+    names = list(asts.keys()) if isinstance(asts, dict) else list(range(len(asts)))
+    batch = compiled_batch(asts.values() if isinstance(asts, dict) else asts)
+    if delimiter is None:
+        delimiter = sniff_delimiter(read_sample(source), encoding)
+    usecols = None
+    if not sinks:
+        header = csv_columns(source, encoding, delimiter)
+        usecols = [c for c in header if c in batch.columns] or header[:1]
+    if dtype is None:
+        dtype = infer_stream_dtypes(source, chunksize, encoding, delimiter, usecols=usecols)
+
+    counts = np.zeros(len(batch), dtype=np.int64)
+    outs = {name: _open_sink(path, fmt) for name, path in (sinks or {}).items()}
+    try:
+        for chunk in iter_csv_chunks(source, chunksize, encoding, delimiter, dtype, usecols=usecols):
+            masks = batch.evaluate(chunk)
+            counts += masks.sum(axis=1)
+            for i, name in enumerate(names):
+                if name in outs:
+                    outs[name].write(select_rows(chunk, masks[i]))
+    finally:
+        for out in outs.values():
+            out.close()
+    return {name: int(n) for name, n in zip(names, counts)}
@@ -0,0 +1,299 @@
+from __future__ import annotations
+
+import logging
+import re
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_ROWS = 1_000_000
+# Rows drawn from one child of the seed. Fixed (not the chunk size), so the data
+# depends on (schema, seed) alone, however it is chunked.
+SEED_BLOCK_ROWS = 65_536
+
+# ---------------------------------------
+# Vocabularies for name-driven string fields
+# ---------------------------------------
+FIRST_NAMES = ["Amit", "Priya", "Rahul", "Sneha", "Vikram", "Ananya", "Rohan", "Ishita", "Arjun", "Kavya",
+               "Harshit", "Neha", "Karan", "Pooja", "Ankit", "Divya", "Siddharth", "Meera", "Aditya", "Riya"]
+LAST_NAMES = ["Sharma", "Verma", "Agarwal", "Pillai", "Kulkarni", "Rastogi", "Khan", "Iyer", "Reddy", "Gupta",
+              "Mehta", "Nair", "Joshi", "Singh", "Patel", "Das", "Bose", "Chopra", "Malhotra", "Rao"]
+CITIES = ["Mumbai", "Delhi", "Bengaluru", "Chennai", "Kolkata", "Hyderabad", "Pune", "Ahmedabad", "Jaipur", "Lucknow"]
+METRO_CITIES = ["Mumbai", "Delhi", "Bengaluru", "Chennai", "Kolkata", "Hyderabad"]
+COMPANIES = ["Amazon India", "Flipkart", "Tata Consultancy", "Infosys", "Wipro", "Zomato", "Swiggy", "HCL", "Reliance", "Paytm"]
+DEPARTMENTS = ["HR", "IT", "FINANCE", "SALES", "OPERATIONS"]
+EMAIL_DOMAINS = ["example.com", "org.in", "mail.com"]
+
+_INT_TYPES = {"integer", "int", "long", "bigint", "smallint"}
+_FLOAT_TYPES = {"decimal", "float", "double", "number", "numeric", "real"}
+_DATE_TYPES = {"date", "datetime", "timestamp"}
+_BOOL_TYPES = {"boolean", "bool"}
+
+# -------------------------
+# Constraint parsing
+# -------------------------
+_NUM = r"(-?\d+(?:\.\d+)?)"
+_BOUND_PATTERNS = [
+    (re.compile(r"(?:>=|greater than or equal to|at least)\s*" + _NUM, re.I), "lo", 0),
+    (re.compile(r"(?:<=|less than or equal to|at most)\s*" + _NUM, re.I), "hi", 0),
+    (re.compile(r"(?:>|greater than|above|over)\s*" + _NUM, re.I), "lo", 1),
+    (re.compile(r"(?:<|less than|below|under)\s*" + _NUM, re.I), "hi", -1),
+]
+_BETWEEN = re.compile(r"(?:between\s*)?" + _NUM + r"\s*(?:and|to|-|,)\s*" + _NUM, re.I)
+_SET = re.compile(r"SET\s*\[(.*?)\]", re.I)
+_DATE = r"(\d{4}-\d{2}-\d{2})"
+_DATE_RANGE = re.compile(_DATE + r"\s*(?:and|to|-|,)\s*" + _DATE)
+
+
+def parse_constraints(ftype: str, constraints: Any) -> Dict[str, Any]:
+    """
+    Turn a field's free-text constraint into sampling parameters:
+    {"choices": [...]} for SET[...], {"lo", "hi"} for bounds/ranges,
+    {"decimals": n} for a bare number on a decimal field.
+    """
+    text = str(constraints or "").strip()
+    spec: Dict[str, Any] = {}
+    if not text:
+        return spec
+
+    m = _SET.search(text)
+    if m:
+        spec["choices"] = [c.strip().strip("'\"") for c in m.group(1).split(",") if c.strip()]
+        return spec
+
+    if ftype in _DATE_TYPES:
+        m = _DATE_RANGE.search(text)
+        if m:
+            spec["lo"], spec["hi"] = m.group(1), m.group(2)
+        return spec
+
+    if ftype in _FLOAT_TYPES and re.fullmatch(r"\d+", text):
+        spec["decimals"] = int(text)
+        return spec
+
+    step = 1 if ftype in _INT_TYPES else 0
+    for pattern, key, sign in _BOUND_PATTERNS:
+        m = pattern.search(text)
+        if m and key not in spec:
+            spec[key] = float(m.group(1)) + sign * step
+            text = text[: m.start()] + text[m.end():]
+    if "lo" not in spec and "hi" not in spec:
+        m = _BETWEEN.search(text)
+        if m:
+            spec["lo"], spec["hi"] = float(m.group(1)), float(m.group(2))
+    return spec
+
+
+# -------------------------
+# Per-type samplers
+# -------------------------
+def _ordered(name: str, lo: Any, hi: Any) -> Tuple[Any, Any]:
+    if lo > hi:
+        logger.warning("Field '%s': range %s to %s is reversed; sampling from %s to %s.", name, lo, hi, hi, lo)
+        return hi, lo
+    return lo, hi
+
+
+def _bounds(name: str, spec: Dict[str, Any], default_lo: float, default_span: float) -> Tuple[float, float]:
+    lo = spec.get("lo")
+    hi = spec.get("hi")
+    if lo is None and hi is None:
+        return default_lo, default_lo + default_span
+    if lo is None:
+        return hi - default_span, hi
+    if hi is None:
+        return lo, lo + default_span
+    return _ordered(name, lo, hi)
+
+
+def _pick(rng: np.random.Generator, values: List[Any], n: int) -> np.ndarray:
+    return np.asarray(values, dtype=object)[rng.integers(0, len(values), n)]
+
+
+def _strings(name: str, spec: Dict[str, Any], rng: np.random.Generator, n: int, start: int, frame: Dict[str, np.ndarray]) -> np.ndarray:
+    lname = name.lower()
+    cardinality = spec.get("cardinality")
+    if cardinality:
+        tokens = np.char.add(f"{name}_", np.arange(int(cardinality)).astype(str)).astype(object)
+        return tokens[rng.integers(0, len(tokens), n)]
+    if re.search(r"(?:^|[_\s-])id$", lname) or re.search(r"[a-z]I[dD]$", name):  # customer_id, customerId; not "paid"
+        prefix = re.sub(r"[^A-Z]", "", name.upper())[:4] or "ID"
+        return np.char.add(prefix, np.char.zfill(np.arange(start + 1, start + n + 1).astype(str), 8)).astype(object)
+    if "email" in lname:
+        first = frame.get("first_name", _pick(rng, FIRST_NAMES, n)).astype(str)
+        last = frame.get("last_name", _pick(rng, LAST_NAMES, n)).astype(str)
+        local = np.char.add(np.char.add(np.char.lower(first), "."), np.char.lower(last))
+        local = np.char.add(local, rng.integers(0, 1000, n).astype(str))
+        return np.char.add(np.char.add(local, "@"), _pick(rng, EMAIL_DOMAINS, n).astype(str)).astype(object)
+    if "phone" in lname:
+        return np.char.add("+91-", rng.integers(6_000_000_000, 9_999_999_999, n).astype(str)).astype(object)
+    if "first" in lname:
+        return _pick(rng, FIRST_NAMES, n)
+    if "last" in lname or "surname" in lname:
+        return _pick(rng, LAST_NAMES, n)
+    if "name" in lname:
+        return np.char.add(np.char.add(_pick(rng, FIRST_NAMES, n).astype(str), " "), _pick(rng, LAST_NAMES, n).astype(str)).astype(object)
+    if "city" in lname:
+        return _pick(rng, METRO_CITIES if "metro" in str(spec.get("raw", "")).lower() else CITIES, n)
+    if "company" in lname or "employer" in lname:
+        return _pick(rng, COMPANIES, n)
+    if "department" in lname or "dept" in lname:
+        return _pick(rng, DEPARTMENTS, n)
+    return np.char.add(f"{name}_", rng.integers(0, 1_000_000, n).astype(str)).astype(object)
+
+
+def _sample_field(field: Dict[str, Any], rng: np.random.Generator, n: int, start: int, frame: Dict[str, np.ndarray]) -> np.ndarray:
+    name = str(field.get("name"))
+    ftype = str(field.get("type") or "string").lower()
+    spec = parse_constraints(ftype, field.get("constraints"))
+    spec["raw"] = field.get("constraints")
+    spec["cardinality"] = field.get("cardinality")
+
+    if "choices" in spec:
+        choices: List[Any] = spec["choices"]
+        if ftype in _INT_TYPES:
+            choices = [int(c) for c in choices]
+        elif ftype in _FLOAT_TYPES:
+            choices = [float(c) for c in choices]
+        numeric = ftype in _INT_TYPES or ftype in _FLOAT_TYPES
+        values = np.asarray(choices) if numeric else np.asarray(choices, dtype=object)
+        return values[rng.integers(0, len(values), n)]
+
+    if ftype in _INT_TYPES:
+        lo, hi = _bounds(name, spec, 0, 100)
+        return rng.integers(int(np.ceil(lo)), int(np.floor(hi)) + 1, n)
+    if ftype in _FLOAT_TYPES:
+        lo, hi = _bounds(name, spec, 0, 100_000)
+        return np.round(rng.uniform(lo, hi, n), spec.get("decimals", 2))
+    if ftype in _BOOL_TYPES:
+        return rng.random(n) < 0.5
+    if ftype in _DATE_TYPES:
+        lo, hi = _ordered(name, np.datetime64(spec.get("lo", "1970-01-01"), "D"), np.datetime64(spec.get("hi", "2025-12-31"), "D"))
+        days = rng.integers(0, (hi - lo).astype(int) + 1, n)
+        return (lo + days.astype("timedelta64[D]")).astype("datetime64[ns]")
+    return _strings(name, spec, rng, n, start, frame)
+
+
+def _with_nulls(values: np.ndarray, ratio: float, rng: np.random.Generator) -> np.ndarray:
+    if not ratio:
+        return values
+    return pd.Series(values).mask(rng.random(len(values)) < ratio).to_numpy()
+
+
+def _block(fields: List[Dict[str, Any]], rng: np.random.Generator, start: int, n: int) -> pd.DataFrame:
+    frame: Dict[str, np.ndarray] = {}
+    for field in fields:
+        frame[str(field.get("name"))] = _sample_field(field, rng, n, start, frame)
+    data = {
+        str(f.get("name")): _with_nulls(frame[str(f.get("name"))], float(f.get("null_ratio") or 0), rng)
+        for f in fields
+    }
+    return pd.DataFrame(data, index=pd.RangeIndex(start, start + n))
+
+
+# -------------------------
+# Public API
+# -------------------------
+def iter_chunks(
+    schema: Dict[str, Any],
+    rows: Optional[int] = None,
+    seed: int = 0,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+) -> Iterator[pd.DataFrame]:
+    """
+    Yield the dataset described by a `json_with_ai.generate_dataset_schema`
+    schema as DataFrames of up to `chunk_rows` rows. `rows` overrides
+    schema["row_count"]. The same (schema, seed) always yields the same
+    rows, whatever `chunk_rows` is: each block of SEED_BLOCK_ROWS rows draws
+    from its own child of the seed, and chunks are cut from those blocks.
+
+    Fields may also carry "null_ratio" (fraction of missing values) and, for
+    strings, "cardinality" (number of distinct values).
+    """
+    total = int(rows if rows is not None else schema.get("row_count") or 0)
+    fields = schema.get("fields") or []
+    n_blocks = -(-total // SEED_BLOCK_ROWS) if total else 0
+    pending: List[pd.DataFrame] = []
+    buffered = 0
+    for i, child in enumerate(np.random.SeedSequence(seed).spawn(n_blocks)):
+        start = i * SEED_BLOCK_ROWS
+        pending.append(_block(fields, np.random.default_rng(child), start, min(SEED_BLOCK_ROWS, total - start)))
+        buffered += len(pending[-1])
+        while buffered >= chunk_rows or (buffered and i == n_blocks - 1):
+            block = pd.concat(pending) if len(pending) > 1 else pending[0]
+            yield block.iloc[:chunk_rows]
+            rest = block.iloc[chunk_rows:]
+            pending, buffered = ([rest] if len(rest) else []), len(rest)
+
+
+def generate_df(schema: Dict[str, Any], rows: Optional[int] = None, seed: int = 0) -> pd.DataFrame:
+    """Materialize the whole dataset in memory (fine up to a few million rows)."""
+    chunks = list(iter_chunks(schema, rows, seed))
+    if not chunks:
+        return pd.DataFrame({str(f.get("name")): [] for f in schema.get("fields") or []})
+    return pd.concat(chunks) if len(chunks) > 1 else chunks[0]
+
+
+def _arrow_writer(path: str, date_fields: List[str]):
+    """Return a chunk writer using pyarrow's CSV writer (~10x to_csv), or None if unavailable."""
+    try:
+        import pyarrow as pa
+        import pyarrow.csv as pacsv
+    except ImportError:
+        return None
+
+    state: Dict[str, Any] = {"writer": None}
+
+    def write(chunk: pd.DataFrame) -> None:
+        table = pa.Table.from_pandas(chunk, preserve_index=False)
+        for name in date_fields:
+            i = table.schema.get_field_index(name)
+            if i >= 0 and pa.types.is_timestamp(table.schema.field(i).type):
+                table = table.set_column(i, name, table.column(i).cast(pa.date32()))
+        if state["writer"] is None:
+            state["writer"] = pacsv.CSVWriter(path, table.schema)
+        state["writer"].write_table(table)
+
+    def close() -> None:
+        if state["writer"] is not None:
+            state["writer"].close()
+
+    return write, close
+
+
+def write_csv(
+    schema: Dict[str, Any],
+    path: str,
+    rows: Optional[int] = None,
+    seed: int = 0,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+) -> int:
+    """
+    Stream the dataset to a CSV file chunk by chunk; returns rows written.
+    Uses pyarrow's CSV writer when installed, pandas' to_csv otherwise.
+    """
+    date_fields = [str(f.get("name")) for f in schema.get("fields") or [] if str(f.get("type") or "").lower() == "date"]
+    arrow = _arrow_writer(path, date_fields)
+    written = 0
+    if arrow is not None:
+        write, close = arrow
+        try:
+            for chunk in iter_chunks(schema, rows, seed, chunk_rows):
+                write(chunk)
+                written += len(chunk)
+        finally:
+            close()
+        if not written:
+            generate_df(schema, rows=0).to_csv(path, index=False)
+        return written
+
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        for chunk in iter_chunks(schema, rows, seed, chunk_rows):
+            chunk.to_csv(f, index=False, header=written == 0, date_format="%Y-%m-%d" if date_fields else None)
+            written += len(chunk)
+        if not written:
+            generate_df(schema, rows=0).to_csv(f, index=False)
+    return written
@@ -1,12 +1,17 @@
 from __future__ import annotations
 
 import logging
-from functools import reduce
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Tuple, Union
 
 import numpy as np
 import pandas as pd
 
+from data_io import compact_df, parse_datetime_column
+from filter_ast import AstNode, compiled_batch, compiled_plan
+from filter_plan import FilterPlan, eval_predicate, normalize_cmp
+from frame_index import FrameIndex, index_for
+from tracing import Trace, cells_changed
+
 # --- Logging setup (tweak as needed) ---
 logger = logging.getLogger(__name__)
 if not logger.handlers:
@@ -27,44 +32,15 @@ def _eval_single_predicate(df: pd.DataFrame, field: str, cmp: str, value: Any) -
     Evaluate a single predicate like city in ["Delhi","Mumbai"] or age >= 18.
     If field is missing, return an all-False mask and warn.
     """
-    if field not in df.columns:
-        logger.warning("Predicate skipped: column '%s' not found.", field)
-        return _safe_boolean_series(df, False)
-
-    s = df[field]
-    cmp = (cmp or "").lower()
-
-    try:
-        if cmp == "in":
-            if value is None:
-                logger.warning("Predicate 'in' skipped: value is None.")
-                return _safe_boolean_series(df, False)
-            return s.isin(list(value))
-        elif cmp in {"not_in", "nin"}:
-            if value is None:
-                logger.warning("Predicate 'not_in' skipped: value is None.")
-                return _safe_boolean_series(df, False)
-            return ~s.isin(list(value))
-        elif cmp in {"==", "eq"}:
-            return s == value
-        elif cmp in {"!=", "ne"}:
-            return s != value
-        elif cmp in {">", "gt"}:
-            return s > value
-        elif cmp in {">=", "ge"}:
-            return s >= value
-        elif cmp in {"<", "lt"}:
-            return s < value
-        elif cmp in {"<=", "le"}:
-            return s <= value
-        else:
-            logger.warning("Unknown comparator '%s'; predicate skipped.", cmp)
-            return _safe_boolean_series(df, False)
-    except Exception as e:
-        logger.warning("Predicate evaluation error on column '%s' with cmp '%s': %s", field, cmp, e)
-        return _safe_boolean_series(df, False)
-
-def apply_filter_ast(df: pd.DataFrame, ast: Optional[Dict[str, Any]]) -> pd.Series:
+    plan = compiled_plan({"op": "CMP", "field": field, "cmp": cmp, "value": value})
+    return plan.mask(df)
+
+def apply_filter_ast(
+    df: pd.DataFrame,
+    ast: Union[Dict[str, Any], AstNode, FilterPlan, None],
+    trace: Optional[Trace] = None,
+    index: Optional[FrameIndex] = None,
+) -> pd.Series:
     """
     Build a boolean mask from a filter AST.
 
@@ -72,50 +48,88 @@ def apply_filter_ast(df: pd.DataFrame, ast: Optional[Dict[str, Any]]) -> pd.Seri
       - op: "AND" | "OR" | "NOT" (default = "AND")
       - field: str
       - cmp: "in" | "not_in" | "==" | "!=" | ">" | ">=" | "<" | "<="
-      - value: Any (list for 'in'/'not_in')
+             (or the names eq / ne / neq / gt / ge / gte / lt / le / lte)
+             | "between" | "contains" | "starts_with" | "ends_with"
+      - value: Any (list for 'in'/'not_in'; {"min", "max"} or [min, max] for
+        'between', either bound optional; a string for the text operators,
+        which are case-sensitive and literal)
       - children: list[AST]
 
     Rules:
       - If both a local predicate (field/cmp/value) and children exist, combine
         ALL masks according to 'op'.
       - If AST is None/empty, returns an all-True mask (no filtering).
+
+    Dict ASTs are canonicalized (`filter_ast.parse_ast`) and their compiled
+    plan is shared through `filter_ast.PLAN_CACHE`, so equivalent filters are
+    compiled once. `ast` may also be a canonical AstNode or a FilterPlan. With a
+    `tracing.Trace`, each node records its evaluation time and selectivity.
+    Leaves are answered from `index` (or the FrameIndex attached to df with
+    `frame_index.attach_index`) when it covers the column and comparator.
     """
-    if ast is None or not isinstance(ast, dict) or len(df) == 0:
+    if ast is None or len(df) == 0:
         return _safe_boolean_series(df, True)
 
-    op = (ast.get("op") or "AND").upper()
-    field = ast.get("field")
-    cmp = ast.get("cmp")
-    value = ast.get("value")
-    children = ast.get("children") or []
-
-    masks: List[pd.Series] = []
+    plan = compiled_plan(ast)
+    return plan.mask(df, trace, index if index is not None else index_for(df))
 
-    # Optional local predicate
-    if field is not None and cmp is not None:
-        masks.append(_eval_single_predicate(df, field, cmp, value))
+def _named(asts: Union[Mapping[Any, Any], Sequence[Any]]) -> Tuple[List[Any], List[Any]]:
+    if isinstance(asts, Mapping):
+        return list(asts.keys()), list(asts.values())
+    return list(range(len(asts))), list(asts)
 
-    # Children
-    for child in children:
-        masks.append(apply_filter_ast(df, child))
+def apply_filter_asts(
+    df: pd.DataFrame,
+    asts: Union[Mapping[Any, Any], Sequence[Any]],
+    trace: Optional[Trace] = None,
+    index: Optional[FrameIndex] = None,
+) -> Dict[Any, pd.Series]:
+    """
+    apply_filter_ast for many filters at once (e.g. one per segment): a dict
+    {name: AST} or a list (names are positions) -> {name: mask}. The filters
+    are compiled into one `filter_plan.BatchPlan`, so a leaf shared by
+    several of them, and every filter repeated verbatim, is evaluated once.
+    """
+    names, items = _named(asts)
+    masks = compiled_batch(items).evaluate(df, trace, index if index is not None else index_for(df))
+    return {name: pd.Series(m, index=df.index, dtype=bool) for name, m in zip(names, masks)}
+
+def count_filter_asts(
+    df: pd.DataFrame,
+    asts: Union[Mapping[Any, Any], Sequence[Any]],
+    index: Optional[FrameIndex] = None,
+) -> Dict[Any, int]:
+    """Matching row count per filter, from one batch evaluation (see apply_filter_asts)."""
+    names, items = _named(asts)
+    counts = compiled_batch(items).counts(df, index if index is not None else index_for(df))
+    return {name: int(n) for name, n in zip(names, counts)}
+
+def split_by_filters(df: pd.DataFrame, asts: Union[Mapping[Any, Any], Sequence[Any]]) -> Dict[Any, pd.DataFrame]:
+    """{name: df_filtered} per filter, from one batch evaluation (see apply_filter_asts)."""
+    return {name: select_rows(df, mask) for name, mask in apply_filter_asts(df, asts).items()}
 
-    # Combine masks
-    if op == "NOT":
-        # For NOT, invert combined AND of children/predicate (or True if none)
-        base = reduce(lambda a, b: a & b, masks, _safe_boolean_series(df, True)) if masks else _safe_boolean_series(df, True)
-        return ~base
+# ---------------------------
+# Copies
+# ---------------------------
+def copy_on_write() -> bool:
+    """True if pandas copies on write (always from 3.0; opt-in via mode.copy_on_write on 2.x)."""
+    if int(pd.__version__.split(".")[0]) >= 3:
+        return True
+    return pd.get_option("mode.copy_on_write") is True
 
-    if not masks:
-        # No predicate and no children: default to True (no-op filter)
-        return _safe_boolean_series(df, True)
+def owned_copy(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    A frame whose columns can be reassigned without touching df. Under
+    copy-on-write that is a shallow copy: columns stay shared until a step
+    replaces them. Otherwise it has to be a deep copy.
+    """
+    return df.copy(deep=not copy_on_write())
 
-    if op == "AND":
-        return reduce(lambda a, b: a & b, masks)
-    elif op == "OR":
-        return reduce(lambda a, b: a | b, masks)
-    else:
-        logger.warning("Unknown logical op '%s'; defaulting to AND.", op)
-        return reduce(lambda a, b: a & b, masks)
+def select_rows(df: pd.DataFrame, mask: Union[pd.Series, np.ndarray]) -> pd.DataFrame:
+    """df.loc[mask] as a frame independent of df; an all-True mask copies nothing under copy-on-write."""
+    if not copy_on_write():
+        return df.loc[mask].copy()
+    return df.copy(deep=False) if bool(np.all(mask)) else df.loc[mask]
 
 # ---------------------------
 # Cleaning plan implementation
@@ -128,31 +142,347 @@ def _existing_columns(df: pd.DataFrame, columns: Optional[List[str]]) -> List[st
         logger.warning("Skipping missing column(s): %s", missing)
     return [c for c in columns if c in df.columns]
 
-def _step_fillna_constant(df: pd.DataFrame, columns: List[str], value: Any) -> pd.DataFrame:
-    if value is None:
-        logger.warning("fillna 'constant' skipped: value is None.")
-        return df
-    for col in _existing_columns(df, columns):
-        df[col] = df[col].fillna(value)
-    return df
+# Steps that need a statistic over all rows rather than one row at a time.
+GLOBAL_FILL_STRATEGIES = {"median", "mean", "most_frequent"}
+
+def split_step(step: Any) -> Tuple[Optional[str], Dict[str, Any]]:
+    """Return (name, params) of a {"name": {...params}} step, or (None, {}) if malformed."""
+    if not isinstance(step, dict) or len(step) != 1:
+        return None, {}
+    name, params = list(step.items())[0]
+    return name, params or {}
+
+def is_global_step(step: Any) -> bool:
+    """True if the step's result for a row depends on other rows (stats or duplicates)."""
+    name, params = split_step(step)
+    if name in ("fillna_numeric", "fillna_categorical"):
+        return params.get("strategy", "constant") in GLOBAL_FILL_STRATEGIES
+    return name in ("winsorize_iqr", "drop_duplicates")
+
+def is_column_step(step: Any) -> bool:
+    """True if the step rewrites columns in place (no rows added or dropped), so a run of them fuses per column."""
+    name, _ = split_step(step)
+    return name in _COLUMN_OPS
+
+def step_columns(step: Any) -> List[str]:
+    """Columns a step reads or writes."""
+    _, params = split_step(step)
+    cols = list(params.get("columns") or []) + list(params.get("subset") or [])
+    if params.get("column") is not None:
+        cols.append(params["column"])
+    cols.extend(r.get("column") for r in params.get("rules") or [] if isinstance(r, dict) and r.get("column") is not None)
+    return list(dict.fromkeys(cols))
+
+def pick_mode(counts: pd.Series) -> Any:
+    """Most frequent value from value counts; ties resolve like Series.mode() (smallest)."""
+    counts = counts[counts > 0]
+    if counts.empty:
+        return None
+    top = list(counts.index[counts.to_numpy() == counts.max()])
+    try:
+        return sorted(top)[0]
+    except TypeError:
+        return top[0]
+
+def numeric_values(s: pd.Series) -> np.ndarray:
+    """The column as float64 (non-numeric values -> NaN), as every statistic sees it."""
+    return pd.to_numeric(s, errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+
+def numeric_stats(values: np.ndarray) -> Dict[str, float]:
+    """q1 / median / q3 / mean of a float64 array, ignoring NaN; the quantiles share one partition."""
+    finite = values[~np.isnan(values)]
+    if not len(finite):
+        return dict.fromkeys(("q1", "median", "q3", "mean"), np.nan)
+    q1, median, q3 = np.quantile(finite, [0.25, 0.5, 0.75]).tolist()
+    return {"q1": q1, "median": median, "q3": q3, "mean": float(finite.mean())}
+
+def iqr_fences(stats: Dict[str, float], k: float) -> Tuple[Optional[float], Optional[float]]:
+    """winsorize_iqr bounds (Q1 - k*IQR, Q3 + k*IQR); None when the column has no numbers."""
+    q1, q3 = stats["q1"], stats["q3"]
+    if np.isnan(q1) or np.isnan(q3):
+        return None, None
+    iqr = q3 - q1
+    return q1 - k * iqr, q3 + k * iqr
+
+def dedupe_keep(keep: Any) -> Any:
+    """drop_duplicates' keep: "first" | "last" | False (also "false"/"none"); anything else -> "first"."""
+    if keep is None or keep in ("first", "last"):
+        return keep or "first"
+    if keep is False or str(keep).lower() in ("false", "none"):
+        return False
+    logger.warning("drop_duplicates: unsupported keep '%s'; using 'first'.", keep)
+    return "first"
+
+# ---------- column-local steps: (series, params, stats) -> series ----------
+# `stats()` returns numeric_stats of the series as the step sees it.
+ColumnOp = Callable[[pd.Series, Dict[str, Any], Callable[[], Dict[str, float]]], pd.Series]
+
+def _map_categories(s: pd.Series, fn: Callable[[pd.Series], pd.Series]) -> pd.Series:
+    """Apply fn to a categorical's categories (not its rows), merging categories that collide."""
+    cats = pd.Series(s.cat.categories)
+    new = fn(cats)
+    if new.equals(cats):
+        return s
+    if new.notna().all() and new.is_unique:
+        return s.cat.rename_categories(new.tolist())
+    codes = s.cat.codes.to_numpy()
+    values = new.to_numpy(dtype=object)[codes]
+    values[codes < 0] = np.nan
+    return pd.Series(pd.Categorical(values, categories=pd.unique(new.dropna())), index=s.index, name=s.name)
+
+def _text_op(s: pd.Series, fn: Callable[[Any], pd.Series]) -> pd.Series:
+    """Apply a vectorized `.str` transform to the text values of s; other values pass through."""
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        return _map_categories(s, lambda cats: _text_op(cats, fn))
+    if not (pd.api.types.is_object_dtype(s) or pd.api.types.is_string_dtype(s)):
+        return s
+    try:
+        out = fn(s.str)
+    except AttributeError:  # object column without any strings
+        return s
+    return out.where(out.notna() | s.isna(), s)
+
+def _op_coerce_numeric(s: pd.Series, params: Dict[str, Any], stats) -> pd.Series:
+    errors = params.get("errors", "coerce")
+    if errors in ("coerce", "raise"):
+        return pd.to_numeric(s, errors=errors)
+    try:  # "ignore": leave the column alone unless every value converts
+        return pd.to_numeric(s)
+    except (ValueError, TypeError):
+        return s
+
+def _op_parse_datetime(s: pd.Series, params: Dict[str, Any], stats) -> pd.Series:
+    if pd.api.types.is_datetime64_any_dtype(s):
+        return s
+    fmt = params.get("format")
+    return parse_datetime_column(
+        s,
+        formats=[fmt] if fmt else None,
+        dayfirst=bool(params.get("dayfirst", False)),
+        fallback=not fmt,
+        errors=params.get("errors", "coerce"),
+    )
+
+def _op_strip_whitespace(s: pd.Series, params: Dict[str, Any], stats) -> pd.Series:
+    return _text_op(s, lambda v: v.strip())
 
-def _step_clip_values(df: pd.DataFrame, columns: List[str], min_val: Optional[float], max_val: Optional[float]) -> pd.DataFrame:
-    for col in _existing_columns(df, columns):
+def _op_lowercase_text(s: pd.Series, params: Dict[str, Any], stats) -> pd.Series:
+    return _text_op(s, lambda v: v.lower())
+
+def _op_standardize_categories(s: pd.Series, params: Dict[str, Any], stats) -> pd.Series:
+    mapping = params.get("mapping") or {}
+    case_insensitive = params.get("case_insensitive", True)
+
+    def standardize(values: pd.Series) -> pd.Series:
+        if case_insensitive:
+            lookup = {(k.lower() if isinstance(k, str) else k): v for k, v in mapping.items()}
+            keys = _text_op(values, lambda v: v.lower())
+        else:
+            lookup, keys = mapping, values
+        mapped = keys.map(lookup)
+        return values.where(mapped.isna(), mapped)
+
+    if not mapping:
+        return s
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        return _map_categories(s, standardize)
+    return standardize(s)
+
+def _op_clip_values(s: pd.Series, params: Dict[str, Any], stats) -> pd.Series:
+    return pd.to_numeric(s, errors="coerce").clip(lower=params.get("min"), upper=params.get("max"))
+
+def _op_winsorize_iqr(s: pd.Series, params: Dict[str, Any], stats) -> pd.Series:
+    lower, upper = iqr_fences(stats(), params.get("iqr_multiplier", 1.5))
+    return pd.to_numeric(s, errors="coerce").clip(lower=lower, upper=upper)
+
+def _op_fillna(s: pd.Series, params: Dict[str, Any], stats) -> pd.Series:
+    if not s.isna().any():
+        return s
+    strategy = params.get("strategy", "constant")
+    if strategy == "constant":
+        value = params.get("value")
+    elif strategy == "most_frequent":
+        value = pick_mode(s.value_counts(dropna=True))
+    else:
+        value = stats()[strategy]
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return s
+    if isinstance(s.dtype, pd.CategoricalDtype) and value not in s.cat.categories:
+        s = s.cat.add_categories([value])
+    return s.fillna(value)
+
+_COLUMN_OPS: Dict[str, ColumnOp] = {
+    "coerce_numeric": _op_coerce_numeric,
+    "parse_datetime": _op_parse_datetime,
+    "strip_whitespace": _op_strip_whitespace,
+    "lowercase_text": _op_lowercase_text,
+    "standardize_categories": _op_standardize_categories,
+    "clip_values": _op_clip_values,
+    "winsorize_iqr": _op_winsorize_iqr,
+    "fillna_numeric": _op_fillna,
+    "fillna_categorical": _op_fillna,
+}
+
+# ---------- row steps: (df, params) -> df ----------
+def _step_drop_duplicates(df: pd.DataFrame, params: Dict[str, Any]) -> pd.DataFrame:
+    subset = params.get("subset")
+    cols = None
+    if subset:
+        cols = _existing_columns(df, list(subset))
+        if not cols:
+            logger.warning("drop_duplicates skipped: none of the subset columns exist.")
+            return df
+    return df.drop_duplicates(subset=cols, keep=dedupe_keep(params.get("keep", "first")))
+
+def _step_drop_invalid(df: pd.DataFrame, params: Dict[str, Any]) -> pd.DataFrame:
+    """Keep rows that satisfy every rule; a missing value is not judged (that is fillna_*'s job)."""
+    valid = np.ones(len(df), dtype=bool)
+    for rule in params.get("rules") or []:
+        if not isinstance(rule, dict):
+            logger.warning("Malformed drop_invalid rule '%s'; skipping.", rule)
+            continue
+        col, cmp, value = rule.get("column"), normalize_cmp(rule.get("cmp")), rule.get("value")
+        if col not in df.columns:
+            logger.warning("drop_invalid rule skipped: column '%s' not found.", col)
+            continue
+        if cmp is None or (cmp in ("in", "not_in") and value is None):
+            logger.warning("drop_invalid rule on '%s' skipped: unsupported cmp '%s' / value '%s'.", col, rule.get("cmp"), value)
+            continue
         try:
-            df[col] = pd.to_numeric(df[col], errors="coerce").clip(lower=min_val, upper=max_val)
+            ok = eval_predicate(df[col], cmp, value)
         except Exception as e:
-            logger.warning("clip_values failed for column '%s': %s", col, e)
+            logger.warning("drop_invalid rule on '%s' skipped: %s", col, e)
+            continue
+        valid &= ok | df[col].isna().to_numpy()
+    return df if valid.all() else df.loc[valid]
+
+_ROW_STEPS: Dict[str, Callable[[pd.DataFrame, Dict[str, Any]], pd.DataFrame]] = {
+    "drop_duplicates": _step_drop_duplicates,
+    "drop_invalid": _step_drop_invalid,
+}
+
+def _step_is_runnable(name: str, params: Dict[str, Any]) -> bool:
+    if name in ("fillna_numeric", "fillna_categorical"):
+        strategy = params.get("strategy", "constant")
+        if strategy != "constant" and strategy not in GLOBAL_FILL_STRATEGIES:
+            logger.warning("Unsupported strategy '%s' for %s; skipping.", strategy, name)
+            return False
+        if strategy == "constant" and params.get("value") is None:
+            logger.warning("fillna 'constant' skipped: value is None.")
+            return False
+    return True
+
+class _ColumnChain:
+    """A column's value while consecutive column-local steps run over it (stats cached until it changes)."""
+
+    __slots__ = ("series", "changed", "_stats")
+
+    def __init__(self, series: pd.Series):
+        self.series = series
+        self.changed = False
+        self._stats: Optional[Dict[str, float]] = None
+
+    def stats(self) -> Dict[str, float]:
+        if self._stats is None:
+            self._stats = numeric_stats(numeric_values(self.series))
+        return self._stats
+
+    def apply(self, op: ColumnOp, params: Dict[str, Any]) -> None:
+        out = op(self.series, params, self.stats)
+        if out is not self.series:
+            self.series, self.changed, self._stats = out, True, None
+
+class _PlanExecutor:
+    """
+    Runs steps over df (a private copy). Column-local steps are queued per
+    column and written back once, when a row step needs the whole frame or
+    at `flush`, so a run of steps touches each column once, not once per step.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+        self.pending: Dict[str, _ColumnChain] = {}
+
+    def step(self, name: str, params: Dict[str, Any]) -> None:
+        if name in _COLUMN_OPS:
+            if not _step_is_runnable(name, params):
+                return
+            columns = params.get("columns") or ([params["column"]] if params.get("column") is not None else [])
+            for col in _existing_columns(self.df, list(columns)):
+                chain = self.pending.get(col)
+                if chain is None:
+                    chain = self.pending[col] = _ColumnChain(self.df[col])
+                try:
+                    chain.apply(_COLUMN_OPS[name], params)
+                except Exception as e:
+                    logger.warning("%s failed for column '%s': %s", name, col, e)
+        elif name in _ROW_STEPS:
+            self.flush()
+            try:
+                self.df = _ROW_STEPS[name](self.df, params)
+            except Exception as e:
+                logger.warning("%s failed: %s", name, e)
+        else:
+            logger.warning("Unknown step '%s'; skipping.", name)
+
+    def flush(self) -> pd.DataFrame:
+        for col, chain in self.pending.items():
+            if chain.changed:
+                self.df[col] = chain.series
+        self.pending = {}
+        return self.df
+
+def _run_step(df: pd.DataFrame, name: str, params: Dict[str, Any]) -> pd.DataFrame:
+    """Apply one step to df (already a private copy) and return it."""
+    executor = _PlanExecutor(df)
+    executor.step(name, params)
+    return executor.flush()
+
+def _run_step_traced(df: pd.DataFrame, step: Dict[str, Any], name: str, params: Dict[str, Any], trace: Trace) -> pd.DataFrame:
+    cols = [c for c in step_columns(step) if c in df.columns]
+    before = df[cols].copy()
+    bytes_before = trace.frame_bytes(df)
+    with trace.span(name, kind="cleaning_step", rows_in=len(df)) as span:
+        df = _run_step(df, name, params)
+    span.attrs.update(
+        rows_out=len(df),
+        mem_delta_bytes=trace.frame_bytes(df) - bytes_before,
+        cells_changed=cells_changed(before, df, cols),
+    )
     return df
 
-def run_cleaning_plan(df: pd.DataFrame, cleaning_plan: Optional[Dict[str, Any]]) -> pd.DataFrame:
+def run_cleaning_plan(
+    df: pd.DataFrame,
+    cleaning_plan: Optional[Dict[str, Any]],
+    trace: Optional[Trace] = None,
+    inplace: bool = False,
+) -> pd.DataFrame:
     """
-    Execute cleaning_plan['pandas']['steps'] sequentially on a COPY of df.
-    Recognized steps:
-      - {"fillna_categorical": {"columns": [...], "strategy": "constant", "value": ...}}
-      - {"fillna_numeric":     {"columns": [...], "strategy": "constant", "value": ...}}
-      - {"clip_values":        {"columns": [...], "min": <num|None>, "max": <num|None>}}
+    Execute cleaning_plan['pandas']['steps'] sequentially on a COPY of df
+    (see owned_copy: only columns a step changes get new memory). Callers that
+    own df can pass inplace=True to skip the copy; changed columns are then
+    written into df itself. Always use the returned frame: row steps such as
+    drop_duplicates return a new one.
+    Recognized steps (the DemoDC vocabulary):
+      - {"coerce_numeric":         {"columns": [...], "errors": "coerce" | "raise" | "ignore"}}
+      - {"parse_datetime":         {"columns": [...], "format": <optional>, "errors": ..., "dayfirst": bool}}
+      - {"strip_whitespace":       {"columns": [...]}}
+      - {"lowercase_text":         {"columns": [...]}}
+      - {"standardize_categories": {"column": ..., "mapping": {raw: standard}, "case_insensitive": bool}}
+      - {"clip_values":            {"columns": [...], "min": <num|None>, "max": <num|None>}}
+      - {"winsorize_iqr":          {"columns": [...], "iqr_multiplier": 1.5}}
+      - {"fillna_numeric":         {"columns": [...], "strategy": "constant" | "median" | "mean", "value": ...}}
+      - {"fillna_categorical":     {"columns": [...], "strategy": "constant" | "most_frequent", "value": ...}}
+      - {"drop_duplicates":        {"subset": [...] | None, "keep": "first" | "last" | False}}
+      - {"drop_invalid":           {"rules": [{"column": ..., "cmp": ..., "value": ...}, ...]}}
+    Without parse_datetime's "format", known layouts are tried vectorized and
+    only leftovers are parsed one by one. Statistics (median, mean, IQR) are
+    over pd.to_numeric(errors="coerce") values, as streaming.process_stream
+    computes them. Consecutive column-local steps are fused per column.
+    With a `tracing.Trace`, each step records wall time, rows in/out, memory
+    delta and the number of cells it changed (steps then run unfused).
     """
-    df_out = df.copy(deep=True)
+    df_out = df if inplace else owned_copy(df)
     if not cleaning_plan or "pandas" not in cleaning_plan:
         return df_out
 
@@ -161,59 +491,69 @@ def run_cleaning_plan(df: pd.DataFrame, cleaning_plan: Optional[Dict[str, Any]])
         logger.warning("cleaning_plan.pandas.steps is not a list; skipping.")
         return df_out
 
+    executor = _PlanExecutor(df_out)
     for step in steps:
         if not isinstance(step, dict) or len(step) != 1:
             logger.warning("Malformed step '%s'; skipping.", step)
             continue
 
-        name, params = list(step.items())[0]
-        params = params or {}
-
-        if name == "fillna_categorical":
-            strategy = params.get("strategy", "constant")
-            if strategy != "constant":
-                logger.warning("Unsupported strategy '%s' for fillna_categorical; only 'constant' is supported.", strategy)
-                continue
-            df_out = _step_fillna_constant(df_out, params.get("columns", []), params.get("value"))
-
-        elif name == "fillna_numeric":
-            strategy = params.get("strategy", "constant")
-            if strategy != "constant":
-                logger.warning("Unsupported strategy '%s' for fillna_numeric; only 'constant' is supported.", strategy)
-                continue
-            df_out = _step_fillna_constant(df_out, params.get("columns", []), params.get("value"))
-
-        elif name == "clip_values":
-            df_out = _step_clip_values(
-                df_out,
-                params.get("columns", []),
-                params.get("min", None),
-                params.get("max", None),
-            )
-
+        name, params = split_step(step)
+        if trace is None:
+            executor.step(name, params)
         else:
-            logger.warning("Unknown step '%s'; skipping.", name)
+            executor.df = _run_step_traced(executor.df, step, name, params, trace)
 
-    return df_out
+    return executor.flush()
 
 # --------------
 # Orchestration
 # --------------
-def process(df: pd.DataFrame, config: Dict[str, Any]) -> Tuple[pd.DataFrame, pd.DataFrame]:
+PROCESS_ENGINES = ("pandas", "duckdb")
+
+def process(
+    df: pd.DataFrame,
+    config: Dict[str, Any],
+    compact: bool = False,
+    trace: Optional[Trace] = None,
+    engine: str = "pandas",
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
     """
     Orchestrate the pipeline:
-      1) Build mask via filter_ast and produce df_filtered (copy).
-      2) Apply cleaning_plan on df_filtered to produce df_cleaned (copy).
+      0) Optionally compact dtypes first (see data_io.compact_df).
+      1) Build mask via filter_ast and produce df_filtered (own rows, see select_rows).
+      2) Apply cleaning_plan on df_filtered to produce df_cleaned (shares unchanged columns
+         with df_filtered under copy-on-write).
       Returns (df_filtered, df_cleaned).
-    The original df is never mutated.
+    The original df is never mutated. Pass a `tracing.Trace` to record
+    per-node and per-step timings (see tracing.Trace).
+    engine="duckdb" runs the same config as SQL on an embedded DuckDB
+    (see sql_backend.process_duckdb; no tracing there).
     """
-    ast = (config or {}).get("filter_ast")
-    mask = apply_filter_ast(df, ast)
-    df_filtered = df.loc[mask].copy()
+    if engine not in PROCESS_ENGINES:
+        raise ValueError(f"Unknown engine '{engine}'; expected one of {PROCESS_ENGINES}.")
+    if compact:
+        df = compact_df(df)
+    if engine == "duckdb":
+        from sql_backend import process_duckdb
 
-    cleaning_plan = (config or {}).get("cleaning_plan")
-    df_cleaned = run_cleaning_plan(df_filtered, cleaning_plan)
+        return process_duckdb(df, config)
 
+    ast = (config or {}).get("filter_ast")
+    cleaning_plan = (config or {}).get("cleaning_plan")
+    if trace is None:
+        mask = apply_filter_ast(df, ast)
+        df_filtered = select_rows(df, mask)
+        df_cleaned = run_cleaning_plan(df_filtered, cleaning_plan)
+        return df_filtered, df_cleaned
+
+    with trace.span("process", kind="pipeline", rows_in=len(df)):
+        with trace.span("filter", kind="stage", rows_in=len(df)) as span:
+            mask = apply_filter_ast(df, ast, trace)
+            df_filtered = select_rows(df, mask)
+            span.attrs["rows_out"] = len(df_filtered)
+        with trace.span("clean", kind="stage", rows_in=len(df_filtered)) as span:
+            df_cleaned = run_cleaning_plan(df_filtered, cleaning_plan, trace)
+            span.attrs["rows_out"] = len(df_cleaned)
     return df_filtered, df_cleaned
 
 # ----------------
@@ -0,0 +1,6 @@
+import os
+import sys
+
+# The modules import each other by bare name (`from filter_ast import ...`), as
+# when the app runs from this directory.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
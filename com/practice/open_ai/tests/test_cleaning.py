@@ -0,0 +1,157 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_io import load_df
+from parallel import process_parallel
+from streaming import process_stream
+from t import iqr_fences, numeric_stats, numeric_values, process, run_cleaning_plan
+from tracing import Trace
+
+
+def _messy(n=400, seed=0):
+    rng = np.random.default_rng(seed)
+    amount = rng.normal(100, 20, n).round(2)
+    amount[rng.random(n) < 0.03] *= 50  # outliers for winsorize_iqr
+    raw = amount.astype(str).astype(object)
+    raw[rng.random(n) < 0.1] = "n/a"
+    raw[rng.random(n) < 0.1] = None
+    dates = pd.Timestamp("2020-01-01") + pd.to_timedelta(rng.integers(0, 1000, n), unit="D")
+    joined = np.where(rng.random(n) < 0.5, dates.strftime("%Y-%m-%d"), dates.strftime("%d/%m/%Y")).astype(object)
+    joined[rng.random(n) < 0.1] = "soon"
+    city = rng.choice([" Pune", "pune ", "DELHI", "Delhi", "mumbai", None], n)
+    df = pd.DataFrame({
+        "id": np.arange(n) % (n - 40),  # some repeated ids
+        "amount": raw,
+        "age": np.where(rng.random(n) < 0.15, np.nan, rng.integers(18, 70, n).astype(float)),
+        "joined": joined,
+        "city": city,
+        "dept": rng.choice(["IT", "HR", "Ops", None], n, p=[0.5, 0.3, 0.1, 0.1]),
+    })
+    return df.astype({"amount": "str", "joined": "str", "city": "str", "dept": "str"})
+
+
+def _plan(*steps):
+    return {"pandas": {"steps": list(steps)}}
+
+
+LOCAL = [
+    {"coerce_numeric": {"columns": ["amount"], "errors": "coerce"}},
+    {"strip_whitespace": {"columns": ["city"]}},
+    {"lowercase_text": {"columns": ["city"]}},
+    {"standardize_categories": {"column": "city", "mapping": {"delhi": "New Delhi"}}},
+    {"clip_values": {"columns": ["age"], "min": 21, "max": 65}},
+    {"fillna_categorical": {"columns": ["dept"], "strategy": "constant", "value": "UNKNOWN"}},
+]
+GLOBAL = [
+    {"winsorize_iqr": {"columns": ["amount"], "iqr_multiplier": 1.5}},
+    {"fillna_numeric": {"columns": ["age"], "strategy": "median"}},
+    {"fillna_numeric": {"columns": ["amount"], "strategy": "mean"}},
+    {"fillna_categorical": {"columns": ["city"], "strategy": "most_frequent"}},
+]
+PLANS = {
+    "local": _plan(*LOCAL),
+    "global": _plan(*LOCAL, *GLOBAL),
+    "row_steps_between": _plan(
+        LOCAL[0],
+        {"drop_invalid": {"rules": [{"column": "amount", "cmp": "gt", "value": 50}, {"column": "city", "cmp": "ne", "value": "x"}]}},
+        LOCAL[1], LOCAL[2],
+        {"drop_duplicates": {"subset": ["id"], "keep": "last"}},
+        *GLOBAL,
+    ),
+    "dates": _plan({"parse_datetime": {"columns": ["joined"]}}, {"parse_datetime": {"columns": ["joined"], "format": "%Y-%m-%d"}}),
+    "same_column_twice": _plan(LOCAL[0], GLOBAL[0], LOCAL[0], {"clip_values": {"columns": ["amount"], "max": 120}}, GLOBAL[2]),
+}
+
+
+@pytest.mark.parametrize("name", sorted(PLANS))
+def test_fused_plan_matches_traced_steps(name):
+    df = _messy()
+    fused = run_cleaning_plan(df, PLANS[name])
+    traced = run_cleaning_plan(df, PLANS[name], trace=Trace())
+    pd.testing.assert_frame_equal(fused, traced)
+    pd.testing.assert_frame_equal(df, _messy())  # input untouched
+
+
+def test_coerce_numeric_modes():
+    s = pd.DataFrame({"x": pd.Series(["1", " 2.5", "n/a", None], dtype=object)})
+    coerced = run_cleaning_plan(s, _plan({"coerce_numeric": {"columns": ["x"]}}))["x"]
+    assert coerced.dtype == np.float64 and coerced.isna().tolist() == [False, False, True, True]
+    ignored = run_cleaning_plan(s, _plan({"coerce_numeric": {"columns": ["x"], "errors": "ignore"}}))["x"]
+    assert ignored.tolist() == s["x"].tolist()
+    # errors="raise" fails the step, which is logged and skipped
+    assert run_cleaning_plan(s, _plan({"coerce_numeric": {"columns": ["x"], "errors": "raise"}}))["x"].tolist() == s["x"].tolist()
+
+
+def test_parse_datetime_mixed_layouts():
+    df = pd.DataFrame({"d": ["2021-03-04", "05/06/2021", "soon", None]})
+    out = run_cleaning_plan(df, _plan({"parse_datetime": {"columns": ["d"], "dayfirst": True}}))["d"]
+    assert pd.api.types.is_datetime64_any_dtype(out)
+    assert out.iloc[0] == pd.Timestamp("2021-03-04") and out.iloc[1] == pd.Timestamp("2021-06-05")
+    assert out.iloc[2:].isna().all()
+
+
+def test_winsorize_iqr_clips_at_the_fences():
+    df = _messy()
+    out = run_cleaning_plan(df, _plan(LOCAL[0], GLOBAL[0]))["amount"]
+    lower, upper = iqr_fences(numeric_stats(numeric_values(pd.to_numeric(df["amount"], errors="coerce"))), 1.5)
+    present = out.dropna()
+    assert present.min() >= lower and present.max() <= upper
+    assert (present == upper).any()  # the outliers were pulled in, not dropped
+    assert out.isna().sum() == pd.to_numeric(df["amount"], errors="coerce").isna().sum()
+
+
+def test_drop_invalid_keeps_missing_values():
+    df = pd.DataFrame({"x": [1.0, 5.0, np.nan, 10.0], "s": ["a", None, "b", "c"]})
+    out = run_cleaning_plan(df, _plan({"drop_invalid": {"rules": [
+        {"column": "x", "cmp": "between", "value": [2, 9]},
+        {"column": "s", "cmp": "not_in", "value": ["b"]},
+        {"column": "missing", "cmp": "eq", "value": 1},  # skipped
+    ]}}))
+    assert out.index.tolist() == [1]
+
+
+def test_median_and_most_frequent_fills():
+    df = pd.DataFrame({"x": [1.0, np.nan, 3.0, 10.0], "c": pd.Series(["b", "a", None, "a"], dtype="category")})
+    out = run_cleaning_plan(df, _plan(
+        {"fillna_numeric": {"columns": ["x"], "strategy": "median"}},
+        {"fillna_categorical": {"columns": ["c"], "strategy": "most_frequent"}},
+    ))
+    assert out["x"].tolist() == [1.0, 3.0, 3.0, 10.0]
+    assert out["c"].tolist() == ["b", "a", "a", "a"] and isinstance(out["c"].dtype, pd.CategoricalDtype)
+
+
+CONFIG_FILTER = {"op": "OR", "children": [
+    {"op": "CMP", "field": "dept", "cmp": "in", "value": ["IT", "Ops"]},
+    {"op": "CMP", "field": "age", "cmp": "gt", "value": 40},
+]}
+
+
+@pytest.fixture(scope="module")
+def csv_frame(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("cleaning") / "messy.csv")
+    _messy(n=1500, seed=3).to_csv(path, index=False)
+    with open(path, "rb") as f:
+        return path, load_df(f.read())
+
+
+@pytest.mark.parametrize("name", sorted(PLANS))
+def test_stream_matches_in_memory(csv_frame, tmp_path, name):
+    path, df = csv_frame
+    config = {"filter_ast": CONFIG_FILTER, "cleaning_plan": PLANS[name]}
+    _, expected = process(df, config)
+    sink = str(tmp_path / "out.parquet")
+    stats = process_stream(path, config, sink, chunksize=256)
+    assert stats["chunks"] > 1 and stats["rows_out"] == len(expected)
+    got = pd.read_parquet(sink)
+    pd.testing.assert_frame_equal(got, expected.reset_index(drop=True))
+
+
+@pytest.mark.parametrize("name", sorted(PLANS))
+def test_parallel_matches_serial(name):
+    df = _messy(n=3000, seed=5)
+    config = {"filter_ast": CONFIG_FILTER, "cleaning_plan": PLANS[name]}
+    expected_filtered, expected = process(df, config)
+    got_filtered, got = process_parallel(df, config, workers=2, partition_rows=700)
+    pd.testing.assert_frame_equal(got_filtered, expected_filtered)
+    pd.testing.assert_frame_equal(got, expected)
@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_io import compact_df
+from frame_index import FrameIndex
+from t import apply_filter_ast
+
+CMPS = ["eq", "ne", "gt", "ge", "lt", "le", "in", "not_in", "between", "contains", "starts_with", "ends_with"]
+
+VALUES = {
+    "s": ["b", "zz", "", None],
+    "i": [50, 50.5, 1000, -1],
+    "f": [float(np.float32(0.1)), 0.1, 0.5],
+    "big": [1000, 100000],
+}
+
+
+def _frame(n=600, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "s": rng.choice(["a", "b", "c", "d"], n).astype(object),
+        "i": rng.integers(0, 100, n),
+        "f": rng.choice([float(np.float32(0.1)), 0.5, 1.25, np.nan], n),
+        "big": rng.integers(-5, 5, n) * 1000,
+    })
+    df.loc[::7, "s"] = None
+    df["s"] = df["s"].astype("str")
+    return df
+
+
+def _cases():
+    for col, values in VALUES.items():
+        for cmp in CMPS:
+            for v in values:
+                if cmp == "between":
+                    if v is not None:
+                        yield col, cmp, [v, v]
+                        yield col, cmp, [v, None]
+                elif cmp in ("in", "not_in"):
+                    yield col, cmp, [v, "c"]
+                else:
+                    yield col, cmp, v
+
+
+@pytest.mark.parametrize("arrow_strings", [False, True])
+@pytest.mark.parametrize("indexed", [False, True])
+def test_compacted_frame_filters_like_the_raw_one(arrow_strings, indexed):
+    df = _frame()
+    compact = compact_df(df, arrow_strings=arrow_strings)
+    assert isinstance(compact["s"].dtype, pd.CategoricalDtype)
+    assert compact["f"].dtype == np.float32 and compact["i"].dtype.itemsize < df["i"].dtype.itemsize
+    index = FrameIndex(compact) if indexed else None
+    for col, cmp, value in _cases():
+        ast = {"op": "CMP", "field": col, "cmp": cmp, "value": value}
+        try:
+            raw = apply_filter_ast(df, ast).to_numpy()
+        except (TypeError, ValueError):
+            continue
+        got = apply_filter_ast(compact, ast, index=index).to_numpy()
+        assert np.array_equal(raw, got), (compact[col].dtype, cmp, value, raw.sum(), got.sum())
+
+
+def test_arrow_strings_keep_ne_matching_missing():
+    df = pd.DataFrame({"s": pd.Series([f"v{i}" for i in range(8)] + [None, None], dtype="str")})
+    compact = compact_df(df, arrow_strings=True)
+    assert compact["s"].dtype == "string[pyarrow]"
+    ast = {"op": "CMP", "field": "s", "cmp": "ne", "value": "v0"}
+    assert apply_filter_ast(compact, ast).sum() == apply_filter_ast(df, ast).sum() == 9
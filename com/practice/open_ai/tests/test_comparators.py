@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from frame_index import FrameIndex
+from t import apply_filter_ast
+
+TEXT = ["apple", "Apple pie", "a.c", "abc", "", "banana", None, "cab", "apple"]
+TEXT_DTYPES = [object, "str", "string", "string[pyarrow]", "category"]
+PATTERNS = ["a", "A", "ap", "e", "a.c", "", "zz", "an"]
+
+
+def _cmp(field, cmp, value):
+    return {"op": "CMP", "field": field, "cmp": cmp, "value": value}
+
+
+def _reference(values, cmp, value):
+    """Row by row, in plain Python: missing never matches, anything else is compared on str()."""
+    def one(v):
+        if v is None or (isinstance(v, float) and np.isnan(v)) or v is pd.NA:
+            return False
+        if cmp == "between":
+            lo, hi = (value.get("min"), value.get("max")) if isinstance(value, dict) else value
+            return (lo is None or v >= lo) and (hi is None or v <= hi)
+        text = str(v)
+        return {"contains": value in text, "starts_with": text.startswith(value), "ends_with": text.endswith(value)}[cmp]
+    return np.array([one(v) for v in values], dtype=bool)
+
+
+def _check(df, field, cmp, value, expected, indexes=()):
+    scan = apply_filter_ast(df, _cmp(field, cmp, value)).to_numpy()
+    assert np.array_equal(scan, expected), (df[field].dtype, cmp, value, scan, expected)
+    for index in indexes:
+        indexed = apply_filter_ast(df, _cmp(field, cmp, value), index=index).to_numpy()
+        assert np.array_equal(indexed, expected), (df[field].dtype, cmp, value, "index", indexed, expected)
+
+
+@pytest.mark.parametrize("dtype", TEXT_DTYPES)
+@pytest.mark.parametrize("cmp", ["contains", "starts_with", "ends_with"])
+def test_text_comparators_are_literal_and_case_sensitive(dtype, cmp):
+    df = pd.DataFrame({"s": pd.Series(TEXT, dtype=dtype)})
+    indexes = [FrameIndex(df, max_bitmap_values=256), FrameIndex(df, max_bitmap_values=1)]
+    for pattern in PATTERNS:
+        _check(df, "s", cmp, pattern, _reference(TEXT, cmp, pattern), indexes)
+
+
+@pytest.mark.parametrize("dtype", TEXT_DTYPES)
+def test_between_on_text(dtype):
+    df = pd.DataFrame({"s": pd.Series(TEXT, dtype=dtype)})
+    for value in (["a", "b"], ["apple", "apple"], {"min": "b"}, {"max": "abc"}, ["b", "a"]):
+        _check(df, "s", "between", value, _reference(TEXT, "between", value), [FrameIndex(df)])
+
+
+@pytest.mark.parametrize("dtype", ["float64", "Int64", "category"])
+def test_numeric_between_and_text_form(dtype):
+    values = [1.0, 2.5, None, 10.0, -3.0, 2.5, 12.0]
+    s = pd.Series(values, dtype="float64")
+    s = s.astype(dtype) if dtype != "Int64" else s.round().astype("Int64")
+    df = pd.DataFrame({"x": s})
+    present = [None if pd.isna(v) else v for v in df["x"].tolist()]
+    index = [FrameIndex(df)]
+    for value in ([1, 3], [2.5, 2.5], {"min": 2}, {"max": 0}, [10, 1], [-5.5, 100]):
+        _check(df, "x", "between", value, _reference(present, "between", value), index)
+    for cmp, pattern in (("contains", "2"), ("starts_with", "1"), ("ends_with", "0")):
+        _check(df, "x", cmp, pattern, _reference(present, cmp, pattern), index)
+
+
+def test_between_on_datetimes_with_missing():
+    d = pd.Series(pd.to_datetime(["2021-01-01", None, "2021-02-15", "2021-03-31", "2020-12-31"]))
+    df = pd.DataFrame({"d": d})
+    cases = {
+        ("2021-01-01", "2021-03-31"): [True, False, True, True, False],
+        ("2021-02-01", None): [False, False, True, True, False],
+        (None, pd.Timestamp("2021-01-01")): [True, False, False, False, True],
+    }
+    for (lo, hi), expected in cases.items():
+        _check(df, "d", "between", [lo, hi], np.array(expected), [FrameIndex(df)])
+
+
+@pytest.mark.parametrize("value", [None, [], [1], [1, 2, 3], {"low": 1}, {"min": None, "max": None}])
+def test_malformed_between_matches_nothing(value):
+    df = pd.DataFrame({"x": [1.0, 2.0, np.nan]})
+    assert not apply_filter_ast(df, _cmp("x", "between", value)).any()
+    assert not apply_filter_ast(df, _cmp("x", "between", value), index=FrameIndex(df)).any()
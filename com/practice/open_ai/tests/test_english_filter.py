@@ -0,0 +1,26 @@
+import pytest
+
+from english_filter import FilterParseError, check_corpus, parse_english_filter, translate_filter
+from translation import StubClient, TranslationCache, TranslationService
+
+
+def test_parse_corpus():
+    assert check_corpus() == {}
+
+
+def test_columns_are_resolved_case_insensitively():
+    ast = parse_english_filter("Zip Code is 501 and first name is A", columns=["zip_code", "First Name"])
+    assert [c["field"] for c in ast["children"]] == ["zip_code", "First Name"]
+    with pytest.raises(FilterParseError):
+        parse_english_filter("zip is 501", columns=["zip_code"])
+
+
+def test_translate_filter_only_calls_the_llm_on_fallback(tmp_path):
+    reply = '{"op": "CMP", "field": "status", "cmp": "not_in", "value": ["shipped", "cancelled"]}'
+    client = StubClient(lambda messages: reply)
+    service = TranslationService(client=client, cache=TranslationCache(str(tmp_path / "cache.sqlite")))
+
+    assert translate_filter("country is US", service, "prompt") == {"op": "CMP", "field": "country", "cmp": "eq", "value": "US"}
+    assert client.calls == 0
+    assert translate_filter("status is not shipped or cancelled", service, "prompt")["cmp"] == "not_in"
+    assert client.calls == 1
@@ -0,0 +1,36 @@
+import gzip
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from export import export_bytes, spool_export
+
+
+def _frame(n=1000):
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({"x": rng.normal(size=n), "s": rng.choice(["a", "b", None], n)})
+
+
+@pytest.mark.parametrize("max_memory", [1 << 20, 256])  # in memory, then spilled to disk
+def test_spooled_export_matches_the_whole_export(max_memory):
+    df = _frame()
+    with spool_export(df, "csv", max_memory=max_memory, chunk_rows=128) as f:
+        data = f.read()
+    assert data == export_bytes(df, "csv")
+    pd.testing.assert_frame_equal(pd.read_csv(io.BytesIO(data)), pd.read_csv(io.BytesIO(export_bytes(df, "csv", 1000))))
+
+
+def test_spooled_gzip_and_parquet_round_trip():
+    df = _frame()
+    with spool_export(df, "csv.gz", chunk_rows=128) as f:
+        assert gzip.decompress(f.read()) == export_bytes(df, "csv")
+    pytest.importorskip("pyarrow")
+    with spool_export(df, "parquet", chunk_rows=128) as f:
+        pd.testing.assert_frame_equal(pd.read_parquet(f), df)
+
+
+def test_unknown_format_raises():
+    with pytest.raises(ValueError, match="Unsupported export format"):
+        spool_export(_frame(), "xlsx")
@@ -0,0 +1,211 @@
+import datetime as dt
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import filter_plan
+from filter_ast import compiled_batch, parse_ast
+from filter_plan import _EvalContext, compile_filter_ast, eval_predicate, normalize_cmp
+from frame_index import FrameIndex
+from t import apply_filter_ast, apply_filter_asts, count_filter_asts, split_by_filters
+from tracing import Trace
+
+
+def _in(value, cmp="in"):
+    return {"op": "CMP", "field": "d", "cmp": cmp, "value": value}
+
+
+def test_in_list_keeps_timestamp_values():
+    df = pd.DataFrame({"d": pd.to_datetime(["2020-01-01", "2020-01-02", None])})
+    ast = _in([pd.Timestamp("2020-01-01"), pd.Timestamp("2020-01-01")])
+    assert apply_filter_ast(df, ast).tolist() == [True, False, False]
+    assert apply_filter_ast(df, _in([pd.Timestamp("2020-01-02")], "not_in")).tolist() == [True, False, True]
+
+
+def test_in_list_canonical_form_keeps_value_types():
+    node = parse_ast(_in([pd.Timestamp("2020-01-02"), dt.date(2020, 1, 1), pd.Timestamp("2020-01-02")]))
+    assert sorted(map(type, node.value), key=str) == [dt.date, pd.Timestamp]
+    assert node == parse_ast(_in([dt.date(2020, 1, 1), pd.Timestamp("2020-01-02")]))
+
+
+def test_in_list_is_order_and_duplicate_insensitive():
+    assert parse_ast(_in([3, 1, "a", 1])) == parse_ast(_in(["a", 3, 1]))
+
+
+# ---------- randomized: compiled plans against a naive per-node mask ----------
+
+
+def _frame(n=300, seed=0):
+    rng = np.random.default_rng(seed)
+    text = rng.choice(["apple", "banana", "cherry", "date", None], n)
+    return pd.DataFrame({
+        "x": np.where(rng.random(n) < 0.2, np.nan, rng.normal(0, 1, n).round(1)),
+        "n": rng.integers(-5, 5, n),
+        "s": pd.Series(text, dtype="str"),
+        "o": pd.Series(text, dtype=object),
+        "c": pd.Series(text, dtype="category"),
+        "d": pd.Series(pd.date_range("2021-01-01", periods=n, freq="D")).where(rng.random(n) > 0.1),
+    })
+
+
+_LEAVES = {
+    "x": [("gt", 0.0), ("le", -0.5), ("eq", 0.1), ("ne", 0.1), ("between", [-1, 1]), ("in", [0.0, 0.5]), ("not_in", [0.0])],
+    "n": [("ge", 2), ("lt", -2), ("eq", 0), ("ne", 3), ("between", {"min": 0}), ("in", [1, 2, 9])],
+    "d": [("gt", "2021-03-01"), ("between", ["2021-02-01", "2021-04-01"]), ("ne", "2021-01-05")],
+    "missing": [("eq", 1)],
+}
+for _col in ("s", "o", "c"):
+    _LEAVES[_col] = [("eq", "apple"), ("ne", "banana"), ("in", ["cherry", "date"]), ("not_in", ["apple"]),
+                     ("gt", "b"), ("contains", "an"), ("starts_with", "c"), ("ends_with", "e")]
+
+
+def _random_ast(rng, depth):
+    if depth == 0 or rng.random() < 0.3:
+        field = rng.choice(sorted(_LEAVES))
+        cmp, value = rng.choice(_LEAVES[field])
+        return {"op": "CMP", "field": field, "cmp": cmp, "value": value}
+    node = {"op": rng.choice(["AND", "OR", "NOT"]), "children": [_random_ast(rng, depth - 1) for _ in range(rng.randint(0, 3))]}
+    if rng.random() < 0.3:  # a local predicate next to the children
+        node.update(_random_ast(rng, 0), op=node["op"])
+    return node
+
+
+def _naive(df, node):
+    """Every node evaluated on every row, exactly as the AST reads."""
+    if not isinstance(node, dict):
+        return np.ones(len(df), dtype=bool)
+    op = (node.get("op") or "AND").upper()
+    parts = []
+    if node.get("field") is not None and node.get("cmp") is not None:
+        field, cmp = node["field"], normalize_cmp(node["cmp"])
+        parts.append(eval_predicate(df[field], cmp, node.get("value")) if field in df.columns else np.zeros(len(df), dtype=bool))
+    parts += [_naive(df, child) for child in node.get("children") or []]
+    if op == "OR":
+        return np.logical_or.reduce(parts) if parts else np.ones(len(df), dtype=bool)
+    both = np.logical_and.reduce(parts) if parts else np.ones(len(df), dtype=bool)
+    return ~both if op == "NOT" else both
+
+
+def _shuffled(rng, node):
+    node = dict(node)
+    if node.get("children"):
+        node["children"] = [_shuffled(rng, c) for c in node["children"]]
+        rng.shuffle(node["children"])
+    return node
+
+
+@pytest.mark.parametrize("subset_fraction", [0.0, 0.5, 2.0])  # always / sometimes / never evaluate on a subset
+def test_random_asts_match_naive_masks(monkeypatch, subset_fraction):
+    monkeypatch.setattr(filter_plan, "_SUBSET_FRACTION", subset_fraction)
+    df = _frame()
+    index = FrameIndex(df)
+    rng = random.Random(subset_fraction)
+    for _ in range(150):
+        ast = _random_ast(rng, 3)
+        if rng.random() < 0.3:  # repeat a subtree, so leaves are shared
+            ast = {"op": rng.choice(["AND", "OR"]), "children": [ast, _shuffled(rng, ast), _random_ast(rng, 1)]}
+        expected = _naive(df, ast)
+        assert np.array_equal(compile_filter_ast(ast).evaluate(df), expected), ast
+        assert np.array_equal(apply_filter_ast(df, _shuffled(rng, ast)).to_numpy(), expected), ast
+        assert np.array_equal(apply_filter_ast(df, ast, index=index).to_numpy(), expected), ast
+        rows = np.sort(rng.sample(range(len(df)), 40))
+        plan = compile_filter_ast(ast)
+        assert np.array_equal(_EvalContext(df).run(plan.root, rows), expected[rows]), ast
+
+
+def test_and_short_circuits_on_undecided_rows(monkeypatch):
+    df = _frame()
+    seen = []
+    real = filter_plan.eval_predicate
+
+    def spy(s, cmp, value, rows=None):
+        seen.append((s.name, cmp, None if rows is None else len(rows)))
+        return real(s, cmp, value, rows)
+
+    monkeypatch.setattr(filter_plan, "eval_predicate", spy)
+    never = {"op": "CMP", "field": "n", "cmp": "eq", "value": 100}
+    ast = {"op": "AND", "children": [{"op": "CMP", "field": "x", "cmp": "gt", "value": 0}, never]}
+    assert not compile_filter_ast(ast).evaluate(df).any()
+    assert seen == [("n", "eq", None)]  # eq is tried first and decides every row
+
+    seen.clear()
+    rare = {"op": "CMP", "field": "n", "cmp": "eq", "value": 0}
+    mask = compile_filter_ast({"op": "AND", "children": [{"op": "CMP", "field": "x", "cmp": "gt", "value": 0}, rare]}).evaluate(df)
+    assert seen[0] == ("n", "eq", None) and seen[1] == ("x", "gt", int((df["n"] == 0).sum()))
+    assert np.array_equal(mask, (df["n"] == 0).to_numpy() & (df["x"] > 0).to_numpy())
+
+
+def test_nan_never_matches_except_negations():
+    df = pd.DataFrame({"x": [np.nan, 1.0], "s": pd.Series([None, "a"], dtype="str")})
+    for field, value in (("x", 1.0), ("s", "a")):
+        for cmp in ("eq", "gt", "ge", "lt", "le", "in"):
+            v = [value] if cmp == "in" else value
+            assert not apply_filter_ast(df, {"op": "CMP", "field": field, "cmp": cmp, "value": v}).iloc[0], (field, cmp)
+        for cmp, v in (("ne", value), ("not_in", [value])):
+            assert apply_filter_ast(df, {"op": "CMP", "field": field, "cmp": cmp, "value": v}).iloc[0], (field, cmp)
+        assert apply_filter_ast(df, {"op": "NOT", "field": field, "cmp": "eq", "value": value}).iloc[0]
+
+
+# ---------- batches: one BatchPlan against per-AST apply_filter_ast ----------
+
+_ALIASES = {"eq": "==", "ne": "!=", "gt": ">", "ge": ">=", "lt": "<", "le": "<="}
+
+
+def _equivalent(rng, node):
+    """The same filter spelled differently: shuffled children, comparator aliases, reordered in-lists."""
+    node = _shuffled(rng, node)
+    if node.get("cmp") in _ALIASES:
+        node["cmp"] = _ALIASES[node["cmp"]]
+    if node.get("cmp") in ("in", "not_in"):
+        node["value"] = list(reversed(node["value"]))
+    if node.get("children"):
+        node["children"] = [_equivalent(rng, c) for c in node["children"]]
+    return node
+
+
+def test_batch_matches_per_ast_masks(monkeypatch):
+    df = _frame(seed=4)
+    rng = random.Random(4)
+    asts = [_random_ast(rng, 3) for _ in range(40)]
+    asts += [asts[3], asts[3], _equivalent(rng, asts[5]), _equivalent(rng, asts[7]), None, {"op": "AND", "children": []}]
+    rng.shuffle(asts)
+    expected = np.array([apply_filter_ast(df, ast).to_numpy() for ast in asts])
+
+    batch = compiled_batch(asts)
+    assert len(batch) == len(asts) and len(batch.roots) < len(asts)
+    noop = [i for i, a in enumerate(asts) if a is None or a == {"op": "AND", "children": []}]
+    assert len(noop) >= 2 and len({batch.slots[i] for i in noop}) == 1
+    for i, ast in enumerate(asts):
+        for j in range(i):
+            # duplicates and equivalent spellings share a slot
+            assert (batch.slots[i] == batch.slots[j]) == (parse_ast(ast) == parse_ast(asts[j]))
+
+    calls = []
+    real = _EvalContext._compute
+    monkeypatch.setattr(_EvalContext, "_compute", lambda ctx, pred, rows: calls.append((pred.pid, rows)) or real(ctx, pred, rows))
+    assert np.array_equal(batch.evaluate(df), expected)
+    assert sorted(calls, key=lambda c: c[0]) == [(p.pid, None) for p in batch.predicates]  # each distinct leaf once, on every row
+    assert np.array_equal(batch.evaluate(df, trace=Trace()), expected)
+    assert np.array_equal(batch.evaluate(df, index=FrameIndex(df)), expected)
+    assert batch.evaluate(df.iloc[:0]).shape == (len(asts), 0)
+
+
+def test_named_batch_helpers():
+    df = _frame(seed=5)
+    asts = {
+        "apples": {"op": "CMP", "field": "s", "cmp": "eq", "value": "apple"},
+        "apples_again": {"op": "CMP", "field": "s", "cmp": "==", "value": "apple"},
+        "big": {"op": "AND", "children": [{"op": "CMP", "field": "x", "cmp": "gt", "value": 0.5}, {"op": "CMP", "field": "n", "cmp": "ge", "value": 0}]},
+        "everything": None,
+    }
+    masks = apply_filter_asts(df, asts)
+    counts = count_filter_asts(df, asts)
+    parts = split_by_filters(df, asts)
+    for name, ast in asts.items():
+        expected = apply_filter_ast(df, ast)
+        pd.testing.assert_series_equal(masks[name], expected)
+        assert counts[name] == int(expected.sum())
+        pd.testing.assert_frame_equal(parts[name], df[expected])
+    assert list(apply_filter_asts(df, list(asts.values()))) == [0, 1, 2, 3]
@@ -0,0 +1,49 @@
+import datetime as dt
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from frame_index import FrameIndex
+from t import apply_filter_ast
+
+TEXT_DTYPES = [object, "str", "string", "string[pyarrow]", "category"]
+
+CASES = [
+    ("eq", "a"), ("ne", "a"), ("ne", "zz"), ("in", ["a", "c"]), ("not_in", ["a"]), ("not_in", []),
+    ("starts_with", "a"), ("ends_with", "b"), ("contains", "b"),
+]
+
+
+def _cmp(field, cmp, value):
+    return {"op": "CMP", "field": field, "cmp": cmp, "value": value}
+
+
+def _check(df, index, field, cases):
+    for cmp, value in cases:
+        ast = _cmp(field, cmp, value)
+        scan = apply_filter_ast(df, ast).to_numpy()
+        indexed = apply_filter_ast(df, ast, index=index).to_numpy()
+        assert np.array_equal(scan, indexed), (df[field].dtype, cmp, value, scan, indexed)
+
+
+@pytest.mark.parametrize("dtype", TEXT_DTYPES)
+@pytest.mark.parametrize("max_bitmap_values", [256, 1])  # bitmap, then sorted-text index
+def test_text_index_matches_scan_with_nulls(dtype, max_bitmap_values):
+    df = pd.DataFrame({"s": pd.Series(["a", "b", None, "a", "cab", None], dtype=dtype)})
+    index = FrameIndex(df, max_bitmap_values=max_bitmap_values)
+    _check(df, index, "s", CASES)
+
+
+def test_sorted_index_matches_scan_with_nulls():
+    df = pd.DataFrame({
+        "x": [1.0, np.nan, 3.0, 2.0, np.nan],
+        "d": pd.to_datetime(["2020-01-01", None, "2020-01-03", "2020-01-02", "2020-01-01"]),
+    })
+    index = FrameIndex(df)
+    cases = [("eq", 1.0), ("ne", 1.0), ("gt", 1.5), ("le", 2), ("in", [1, 3]), ("not_in", [3]), ("between", [2, 3])]
+    _check(df, index, "x", cases)
+    _check(df, index, "d", [
+        ("ne", "2020-01-01"), ("eq", pd.Timestamp("2020-01-01")), ("eq", dt.date(2020, 1, 1)),
+        ("in", [pd.Timestamp("2020-01-02")]), ("not_in", ["2020-01-02"]), ("ge", "2020-01-02"),
+    ])
@@ -0,0 +1,217 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+import pytest
+
+from llm_pool import LLMPool, request_key
+from translation import StubClient, TranslationCache, TranslationService
+
+
+class FakeAPI:
+    """
+    Scripted chat-completions backend, keyed on the user message:
+    "slow ..." takes 0.2s, "429-once <header> <value> ..." answers 429 with
+    that retry-after header the first time, "500 ..." always fails with a
+    500, "400 ..." with a 400; anything else is echoed back.
+    """
+
+    def __init__(self):
+        self.calls = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._seen = set()
+        self._lock = threading.Lock()
+
+    def handle(self, body):
+        content = body["messages"][-1]["content"]
+        with self._lock:
+            self.calls.append(body)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            if content.startswith("slow"):
+                time.sleep(0.2)
+            word = content.split()
+            if word[0] == "429-once" and content not in self._seen:
+                self._seen.add(content)
+                return 429, {word[1]: word[2]}, {"error": {"message": "rate limited", "type": "rate_limit"}}
+            if word[0] in ("400", "500"):
+                return int(word[0]), {}, {"error": {"message": f"failed with {word[0]}", "type": "error"}}
+            return 200, {}, {
+                "id": "chatcmpl-fake", "object": "chat.completion", "created": 0, "model": body["model"],
+                "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": f"echo: {content}"}}],
+                "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+            }
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+
+class FakeStatusError(Exception):
+    def __init__(self, status_code, headers, body):
+        super().__init__(body["error"]["message"])
+        self.status_code = status_code
+        self.response = SimpleNamespace(headers=headers)
+
+
+class FakeClient:
+    """Sync client in the shape of `OpenAI()`, answering from a FakeAPI in-process."""
+
+    def __init__(self, api):
+        self.api = api
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, model, messages, **kwargs):
+        status, headers, body = self.api.handle({"model": model, "messages": messages, **kwargs})
+        if status != 200:
+            raise FakeStatusError(status, headers, body)
+        choice = body["choices"][0]["message"]["content"]
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=choice))])
+
+
+def _serve(api):
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            status, headers, payload = api.handle(body)
+            data = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+@pytest.fixture(params=["client", "http"])
+def make_pool(request, monkeypatch):
+    """Pools over a FakeAPI: in-process sync client, or AsyncOpenAI + httpx against a local HTTP server."""
+    api = FakeAPI()
+    pools, servers = [], []
+
+    def make(**kwargs):
+        kwargs.setdefault("backoff", 0.01)
+        if request.param == "client":
+            pool = LLMPool(FakeClient(api), **kwargs)
+        else:
+            pytest.importorskip("httpx")
+            pytest.importorskip("openai")
+            server = _serve(api)
+            servers.append(server)
+            monkeypatch.setenv("OPENAI_API_KEY", "test")
+            monkeypatch.setenv("OPENAI_BASE_URL", f"http://127.0.0.1:{server.server_address[1]}/v1")
+            pool = LLMPool(**kwargs)  # builds its own AsyncOpenAI client from the environment
+        pools.append(pool)
+        return pool, api
+
+    yield make
+    for pool in pools:
+        pool.close()
+    for server in servers:
+        server.shutdown()
+
+
+def _ask(text):
+    return [{"role": "user", "content": text}]
+
+
+def test_concurrency_cap(make_pool):
+    pool, api = make_pool(max_concurrency=3)
+    futures = [pool.submit(_ask(f"slow {i}")) for i in range(9)]
+    assert [f.result(10) for f in futures] == [f"echo: slow {i}" for i in range(9)]
+    assert api.max_in_flight == 3
+    assert pool.metrics.snapshot()["calls"] == 9
+
+
+def test_identical_in_flight_requests_are_coalesced(make_pool):
+    pool, api = make_pool()
+    futures = [pool.submit(_ask("slow same")) for _ in range(5)]
+    assert {f.result(10) for f in futures} == {"echo: slow same"}
+    assert len(api.calls) == 1
+    snap = pool.metrics.snapshot()
+    assert (snap["requests"], snap["coalesced"], snap["calls"]) == (5, 4, 1)
+
+
+@pytest.mark.parametrize("header,value,wait", [("retry-after-ms", "300", 0.3), ("retry-after", "0.3", 0.3)])
+def test_429_waits_for_retry_after(make_pool, header, value, wait):
+    pool, api = make_pool()
+    start = time.perf_counter()
+    assert pool.complete(_ask(f"429-once {header} {value}")) == f"echo: 429-once {header} {value}"
+    assert time.perf_counter() - start >= wait
+    assert len(api.calls) == 2
+    snap = pool.metrics.snapshot()
+    assert (snap["rate_limited"], snap["retries"], snap["calls"], snap["failures"]) == (1, 1, 2, 0)
+
+
+def test_429_pauses_other_callers(make_pool):
+    pool, api = make_pool(max_concurrency=1)
+    first = pool.submit(_ask("429-once retry-after-ms 300"))
+    time.sleep(0.05)
+    start = time.perf_counter()
+    assert pool.complete(_ask("after")) == "echo: after"
+    first.result(10)
+    assert time.perf_counter() - start >= 0.2
+
+
+def test_non_retryable_error_propagates(make_pool):
+    pool, api = make_pool()
+    with pytest.raises(Exception, match="failed with 400"):
+        pool.complete(_ask("400 bad request"))
+    assert len(api.calls) == 1
+    snap = pool.metrics.snapshot()
+    assert (snap["failures"], snap["retries"]) == (1, 0)
+
+
+def test_transient_error_is_retried_then_propagates(make_pool):
+    pool, api = make_pool(max_retries=2)
+    with pytest.raises(Exception, match="failed with 500"):
+        pool.complete(_ask("500 server error"))
+    assert len(api.calls) == 3
+    snap = pool.metrics.snapshot()
+    assert (snap["requests"], snap["calls"], snap["retries"], snap["failures"]) == (1, 3, 2, 1)
+    assert snap["latency_p50_ms"] is not None
+
+
+def test_temperature_is_sent_and_keyed(make_pool):
+    pool, api = make_pool()
+    pool.complete(_ask("hello"), temperature=0)
+    pool.complete(_ask("hello"))
+    assert [c.get("temperature") for c in api.calls] == [0, None]
+    assert request_key("m", _ask("x"), 0) != request_key("m", _ask("x"))
+    assert request_key("m", _ask("x")) == request_key("m", _ask("x"), None)
+
+
+def test_translation_cache_key_depends_on_temperature(tmp_path):
+    cache = TranslationCache(str(tmp_path / "cache.sqlite"))
+    client = StubClient(lambda messages: "{}")
+    default = TranslationService(client=client, cache=cache)
+    greedy = TranslationService(client=client, cache=cache, temperature=0)
+    assert default.cache_key("p", "x") != greedy.cache_key("p", "x")
+    default.translate("p", "x")
+    greedy.translate("p", "x")
+    assert client.calls == 2
+
+
+def test_translate_many_inside_a_running_loop(tmp_path, make_pool):
+    pool, api = make_pool()
+    service = TranslationService(pool=pool, cache=TranslationCache(str(tmp_path / "cache.sqlite")))
+    service.cache.put(service.cache_key("p", "b"), '{"cached": true}')
+
+    async def caller():
+        return service.translate_many("p", ["a", "b", "c"])
+
+    a, b, c = asyncio.run(caller())
+    assert a.startswith("echo: ") and a.endswith("\na") and c.endswith("\nc") and b == '{"cached": true}'
+    assert sorted(call["messages"][-1]["content"][-1] for call in api.calls) == ["a", "c"]
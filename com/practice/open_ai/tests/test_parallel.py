@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from parallel import _attach, _share_arrow, process_parallel
+from t import process
+
+
+def _columns(n, seed=0):
+    rng = np.random.default_rng(seed)
+    text = rng.choice(["Pune ", "delhi", "  Mumbai", None], n)
+    return {
+        "object": pd.Series(text, dtype=object),
+        "str": pd.Series(text, dtype="str"),
+        "string": pd.Series(text, dtype="string"),
+        "string[pyarrow]": pd.Series(text, dtype="string[pyarrow]"),
+        "category": pd.Series(text, dtype="category"),
+        "Int64": pd.Series(np.where(rng.random(n) < 0.2, None, rng.integers(0, 100, n)), dtype="Int64"),
+        "boolean": pd.Series(np.where(rng.random(n) < 0.2, None, rng.random(n) < 0.5), dtype="boolean"),
+        "tz": pd.Series(pd.date_range("2021-01-01", periods=n, freq="h", tz="UTC")).where(rng.random(n) > 0.1),
+        "mixed": pd.Series(np.where(rng.random(n) < 0.5, rng.integers(0, 9, n).astype(object), text), dtype=object),
+    }
+
+
+@pytest.mark.parametrize("name", [c for c in _columns(1) if c != "mixed"])
+def test_arrow_shared_column_round_trips(name):
+    s = _columns(50)[name]
+    blocks = []
+    try:
+        shm = _share_arrow(s, blocks)
+        assert shm is not None
+        part = _attach(("arrow", (shm, s.dtype)), 10, 35)
+    finally:
+        for block in blocks:
+            block.close()
+            block.unlink()
+    pd.testing.assert_series_equal(part, s.iloc[10:35])
+
+
+def test_mixed_object_column_is_not_shared():
+    blocks = []
+    assert _share_arrow(_columns(50)["mixed"], blocks) is None
+    assert blocks == []
+
+
+def test_parallel_matches_serial_on_extension_columns():
+    df = pd.DataFrame(_columns(4000, seed=1)).set_axis(np.arange(4000) * 3)  # labels are not positions
+    config = {
+        "filter_ast": {"op": "OR", "children": [
+            {"op": "CMP", "field": "string", "cmp": "starts_with", "value": "Pu"},
+            {"op": "CMP", "field": "category", "cmp": "ne", "value": "delhi"},
+            {"op": "AND", "children": [
+                {"op": "CMP", "field": "Int64", "cmp": "gt", "value": 50},
+                {"op": "CMP", "field": "boolean", "cmp": "eq", "value": True},
+            ]},
+            {"op": "CMP", "field": "tz", "cmp": "lt", "value": "2021-02-01T00:00:00+00:00"},
+            {"op": "CMP", "field": "mixed", "cmp": "in", "value": [3, "Pune "]},
+        ]},
+        "cleaning_plan": {"pandas": {"steps": [
+            {"strip_whitespace": {"columns": ["object", "str", "string", "string[pyarrow]", "category", "mixed"]}},
+            {"lowercase_text": {"columns": ["object", "str", "category"]}},
+            {"fillna_categorical": {"columns": ["string", "category"], "strategy": "constant", "value": "unknown"}},
+            {"clip_values": {"columns": ["Int64"], "max": 90}},
+        ]}},
+    }
+    expected_filtered, expected = process(df, config)
+    got_filtered, got = process_parallel(df, config, workers=2, partition_rows=900)
+    pd.testing.assert_frame_equal(got_filtered, expected_filtered)
+    pd.testing.assert_frame_equal(got, expected)
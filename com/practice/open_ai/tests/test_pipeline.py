@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+
+from pipeline import Pipeline
+from t import run_cleaning_plan
+
+
+def _frame():
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        "k": rng.integers(0, 50, 500),
+        "x": np.where(rng.random(500) < 0.2, np.nan, rng.normal(size=500)),
+        "s": rng.choice([" a", "B ", None], 500),
+    })
+
+
+STEPS = [
+    {"strip_whitespace": {"columns": ["s"]}},
+    {"lowercase_text": {"columns": ["s"]}},
+    {"fillna_numeric": {"columns": ["x"], "strategy": "median"}},
+    {"drop_duplicates": {"subset": ["k"]}},
+    {"winsorize_iqr": {"columns": ["x"]}},
+    {"fillna_categorical": {"columns": ["s"], "strategy": "constant", "value": "?"}},
+]
+
+
+def _plan(steps):
+    return {"pandas": {"steps": steps}}
+
+
+def test_clean_caches_one_frame_per_run_of_column_steps():
+    df = _frame()
+    pipeline = Pipeline()
+    loaded = pipeline.load("f", lambda: df)
+    result = pipeline.clean(loaded, _plan(STEPS))
+    pd.testing.assert_frame_equal(result.value, run_cleaning_plan(df, _plan(STEPS)))
+    assert result.stage == "clean[4:6]"
+    assert pipeline.stats()["entries"] == 4  # load, steps 0-2, drop_duplicates, steps 4-5
+
+    # editing a step in the last run reuses everything before it
+    edited = STEPS[:5] + [{"fillna_categorical": {"columns": ["s"], "strategy": "constant", "value": "none"}}]
+    before = pipeline.stats()
+    again = pipeline.clean(loaded, _plan(edited))
+    after = pipeline.stats()
+    assert (after["hits"] - before["hits"], after["misses"] - before["misses"]) == (2, 1)
+    pd.testing.assert_frame_equal(again.value, run_cleaning_plan(df, _plan(edited)))
+
+
+def test_clean_without_steps_returns_parent():
+    pipeline = Pipeline()
+    loaded = pipeline.load("f", _frame)
+    assert pipeline.clean(loaded, None) is loaded
+    assert pipeline.clean(loaded, {"pandas": {"steps": "not a list"}}) is loaded
@@ -0,0 +1,35 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from preview import histogram_estimate, sample_rows
+from viz_data import histogram
+
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({"x": np.where(rng.random(20_000) < 0.1, np.nan, rng.lognormal(0, 1, 20_000))})
+
+
+@pytest.mark.parametrize("method", ["fixed", "quantile"])
+def test_histogram_estimate_uses_the_bin_method(frame, method):
+    sample = sample_rows(frame, 2000)
+    est = histogram_estimate(sample, "x", method=method)
+    drawn = histogram(sample.frame["x"], method=method)
+    np.testing.assert_array_equal(est[["left", "right"]].to_numpy(), drawn[["left", "right"]].to_numpy())
+    scaled = np.round(drawn["count"].to_numpy() * sample.population / len(sample.frame))
+    np.testing.assert_array_equal(est["count"].to_numpy(), scaled)
+    assert (est["count_low"] <= est["count"]).all() and (est["count"] <= est["count_high"]).all()
+    if method == "quantile":
+        # quantile bins hold roughly equal numbers of rows, unlike fixed-width ones on skewed data
+        assert est["count"].max() < 2 * est["count"].min()
+
+
+@pytest.mark.parametrize("method", ["fixed", "quantile"])
+def test_histogram_estimate_is_exact_on_a_full_sample(frame, method):
+    sample = sample_rows(frame, len(frame))
+    est = histogram_estimate(sample, "x", method=method)
+    exact = histogram(frame["x"], method=method)
+    np.testing.assert_array_equal(est["count"].to_numpy(), exact["count"].to_numpy())
+    assert (est["count_low"] == est["count"]).all() and (est["count_high"] == est["count"]).all()
@@ -0,0 +1,138 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from profiler import CoMoments, DistinctCounter, HeavyHitters, Moments, QuantileSketch, profile_frame
+
+
+def _parts(x, rng, k=7):
+    cuts = np.sort(rng.choice(np.arange(len(x) + 1), k - 1))
+    return np.split(x, cuts)  # uneven, some possibly empty
+
+
+def _merged(cls, parts, feed):
+    """Accumulate each part separately, then merge pairwise (a tree, as partitions would)."""
+    accs = []
+    for part in parts:
+        acc = cls()
+        feed(acc, part)
+        accs.append(acc)
+    while len(accs) > 1:
+        nxt = []
+        for a, b in zip(accs[::2], accs[1::2]):
+            a.merge(b)
+            nxt.append(a)
+        accs = nxt + ([accs[-1]] if len(accs) % 2 else [])
+    return accs[0]
+
+
+@pytest.mark.parametrize("offset", [0.0, 1e9])
+def test_moments_merge_matches_numpy(offset):
+    rng = np.random.default_rng(1)
+    x = offset + rng.normal(0, 3, 10_000)
+    m = _merged(Moments, _parts(x, rng), Moments.update)
+    assert m.n == len(x)
+    assert m.mean == pytest.approx(x.mean(), rel=1e-12)
+    assert m.var(1) == pytest.approx(x.var(ddof=1), rel=1e-6)
+    assert (m.min, m.max) == (x.min(), x.max())
+    with_fill = m.with_constant(5, 2.0)
+    y = np.concatenate([x, np.full(5, 2.0)])
+    assert with_fill.mean == pytest.approx(y.mean(), rel=1e-12) and with_fill.var(0) == pytest.approx(y.var(), rel=1e-6)
+
+
+def test_comoments_merge_matches_dataframe_corr():
+    rng = np.random.default_rng(2)
+    n = 5000
+    a = rng.normal(100, 5, n)
+    df = pd.DataFrame({"a": a, "b": 2 * a + rng.normal(0, 3, n), "c": rng.normal(-1e6, 1, n)})
+    for col, rate in (("a", 0.1), ("b", 0.3)):
+        df.loc[rng.random(n) < rate, col] = np.nan
+    parts = [df.iloc[i:i + 700] for i in range(0, n, 700)]
+    # partitions see different column sets: the first ones lack "c"
+    feed = lambda acc, part: acc.update({c: part[c].to_numpy() for c in part.columns if not (part is parts[0] and c == "c")})
+    expected = df.copy()
+    expected.loc[parts[0].index, "c"] = np.nan
+    got = _merged(CoMoments, parts, feed).corr(["a", "b", "c"])
+    pd.testing.assert_frame_equal(got, expected.corr(), rtol=1e-8)
+
+
+@pytest.mark.parametrize("merge", [False, True])
+def test_quantile_sketch_stays_within_its_rank_error(merge):
+    rng = np.random.default_rng(3)
+    x = rng.lognormal(0, 1, 200_000)
+    if merge:
+        sketch = _merged(lambda: QuantileSketch(k=256, seed=4), _parts(x, rng), QuantileSketch.update)
+    else:
+        sketch = QuantileSketch(k=256, seed=4)
+        for part in np.array_split(x, 50):
+            sketch.update(part)
+    assert not sketch.exact and sketch.n == len(x) and sketch.rank_error > 0
+    xs = np.sort(x)
+    qs = np.linspace(0.01, 0.99, 25)
+    for q, v in zip(qs, sketch.quantiles(list(qs))):
+        lo, hi = np.searchsorted(xs, v, "left"), np.searchsorted(xs, v, "right")
+        assert lo - sketch.rank_error <= q * len(x) <= hi + sketch.rank_error
+    for v in np.quantile(x, [0.1, 0.5, 0.9]):
+        assert abs(sketch.count_below(v) - np.searchsorted(xs, v, "left")) <= sketch.rank_error
+        assert abs(sketch.count_above(v) - (len(x) - np.searchsorted(xs, v, "right"))) <= sketch.rank_error
+
+
+def test_quantile_sketch_is_exact_while_small():
+    x = np.random.default_rng(5).normal(size=1000)
+    sketch = QuantileSketch(k=4096)
+    sketch.update(x)
+    assert sketch.exact and sketch.quantiles([0.25, 0.5, 0.75]) == np.quantile(x, [0.25, 0.5, 0.75]).tolist()
+
+
+def test_distinct_counter_beyond_the_exact_limit():
+    hashes = lambda lo, hi: pd.util.hash_array(np.arange(lo, hi, dtype=np.int64))
+    exact = DistinctCounter()
+    exact.update(hashes(0, 50_000))
+    exact.update(hashes(0, 50_000))
+    assert exact.estimate() == 50_000 and exact.relative_error == 0.0
+
+    a, b = DistinctCounter(), DistinctCounter()
+    for lo in range(0, 250_000, 50_000):
+        a.update(hashes(lo, lo + 50_000))
+    b.update(hashes(150_000, 400_000))  # overlaps a
+    a.merge(b)
+    assert a.hashes is None and a.relative_error > 0
+    assert abs(a.estimate() - 400_000) <= 3 * a.relative_error * 400_000
+
+
+@pytest.mark.parametrize("capacity", [5, 50])
+def test_heavy_hitters_undercount_by_at_most_error(capacity):
+    rng = np.random.default_rng(6)
+    values = pd.Series(rng.zipf(1.5, 20_000) % 500)
+    hh = _merged(lambda: HeavyHitters(capacity), [values.iloc[i:i + 1500] for i in range(0, len(values), 1500)],
+                 lambda acc, part: acc.update(part.value_counts()))
+    truth = values.value_counts()
+    assert hh.error > 0 and len(hh.counts) <= capacity
+    for value, count in hh.counts.items():
+        assert truth[value] - hh.error <= count <= truth[value]
+    # anything more frequent than the error bound is still tracked
+    assert set(truth[truth > hh.error].index) <= set(hh.counts.index)
+
+
+def test_profile_frame_matches_describe_and_corr():
+    rng = np.random.default_rng(7)
+    n = 3000
+    df = pd.DataFrame({
+        "x": np.where(rng.random(n) < 0.1, np.nan, rng.normal(10, 2, n)),
+        "y": rng.integers(0, 50, n),
+        "city": rng.choice(["Pune", "Delhi", "Goa", None], n, p=[0.5, 0.3, 0.1, 0.1]),
+    })
+    df["z"] = df["x"] * -0.5 + rng.normal(0, 1, n)
+    report = profile_frame(df, chunk_rows=400)["pandas"]
+    described = report["describe_all"]
+    for col in ("x", "y", "z"):
+        expected = df[col].describe()
+        for stat in ("count", "mean", "std", "min", "25%", "50%", "75%", "max"):
+            assert described[col][stat] == pytest.approx(expected[stat], rel=1e-9), (col, stat)
+    expected = df["city"].describe()
+    assert {k: described["city"][k] for k in ("count", "unique", "top", "freq")} == {
+        "count": expected["count"], "unique": expected["unique"], "top": expected["top"], "freq": expected["freq"],
+    }
+    corr = pd.DataFrame(report["correlations"])
+    pd.testing.assert_frame_equal(corr.loc[["x", "y", "z"], ["x", "y", "z"]], df[["x", "y", "z"]].corr(), rtol=1e-8)
+    assert report["missingness_summary"]["x"]["missing_count"] == int(df["x"].isna().sum())
@@ -0,0 +1,42 @@
+import pytest
+
+pytest.importorskip("duckdb")
+
+import synth
+from benchmark import customer_schema
+from data_io import load_df
+from sql_backend import check_parity
+
+
+@pytest.fixture(scope="module")
+def csv_path(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("parity") / "customers.csv")
+    synth.write_csv(customer_schema(null_ratio=0.1, cardinality=20), path, rows=2000, seed=7)
+    return path
+
+
+def test_parity_on_csv(csv_path):
+    assert check_parity(csv_path) == {}
+
+
+def test_parity_on_dataframe(csv_path):
+    with open(csv_path, "rb") as f:
+        df = load_df(f.read())
+    assert check_parity(df) == {}
+
+
+def test_parity_on_parquet(csv_path, tmp_path):
+    pytest.importorskip("pyarrow")
+    with open(csv_path, "rb") as f:
+        df = load_df(f.read())
+    path = str(tmp_path / "customers.parquet")
+    df.to_parquet(path)
+    assert check_parity(path) == {}
+
+
+def test_parity_on_compacted_dataframe(csv_path):
+    from data_io import compact_df
+
+    with open(csv_path, "rb") as f:
+        df = compact_df(load_df(f.read()))
+    assert check_parity(df) == {}
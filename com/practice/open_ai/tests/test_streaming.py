@@ -0,0 +1,105 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_io import load_df
+from filter_ast import compiled_plan
+from streaming import _Dedupe, _Pipeline, _resolve_plan, infer_stream_dtypes, iter_csv_chunks, process_stream
+from t import iqr_fences, numeric_stats, numeric_values, process
+
+FILTER = {"op": "CMP", "field": "grp", "cmp": "ne", "value": "z"}
+
+
+@pytest.fixture(scope="module")
+def source(tmp_path_factory):
+    """A CSV with duplicates spread across chunks, outliers and missing values."""
+    rng = np.random.default_rng(11)
+    n = 1000
+    amount = rng.normal(50, 10, n).round(1)
+    amount[rng.random(n) < 0.02] *= 40
+    df = pd.DataFrame({
+        "key": rng.integers(0, 300, n),
+        "grp": rng.choice(["a", "b", "z", None], n),
+        "amount": np.where(rng.random(n) < 0.1, np.nan, amount),
+        "city": rng.choice(["Pune", "Delhi", None], n, p=[0.5, 0.3, 0.2]),
+    })
+    df = pd.concat([df, df.sample(200, random_state=1)], ignore_index=True)  # exact duplicate rows, far apart
+    path = str(tmp_path_factory.mktemp("stream") / "rows.csv")
+    df.to_csv(path, index=False)
+    with open(path, "rb") as f:
+        return path, load_df(f.read())
+
+
+def _config(*steps):
+    return {"filter_ast": FILTER, "cleaning_plan": {"pandas": {"steps": list(steps)}}}
+
+
+def _read(path):
+    return pd.read_parquet(path) if path.endswith(".parquet") else pd.read_csv(path)
+
+
+CASES = {
+    f"dedupe_{subset}_{keep}": _config(
+        {"fillna_categorical": {"columns": ["city"], "strategy": "constant", "value": "?"}},
+        {"drop_duplicates": {"subset": None if subset == "all" else ["key", "city"], "keep": keep}},
+    )
+    for subset in ("all", "subset")
+    for keep in ("first", "last", False)
+}
+CASES["global_steps"] = _config(
+    {"winsorize_iqr": {"columns": ["amount"]}},
+    {"fillna_numeric": {"columns": ["amount"], "strategy": "median"}},
+    {"fillna_categorical": {"columns": ["city"], "strategy": "most_frequent"}},
+    {"drop_duplicates": {"subset": ["key"], "keep": "last"}},
+    {"fillna_numeric": {"columns": ["amount"], "strategy": "mean"}},
+)
+
+
+@pytest.mark.parametrize("chunksize", [7, 97, 5000])
+@pytest.mark.parametrize("name", sorted(CASES))
+def test_stream_matches_in_memory(source, tmp_path, name, chunksize):
+    path, df = source
+    expected_filtered, expected = process(df, CASES[name])
+    for ext in ("csv", "parquet"):
+        sink, filtered_sink = str(tmp_path / f"out.{ext}"), str(tmp_path / f"filtered.{ext}")
+        stats = process_stream(path, CASES[name], sink, filtered_sink, chunksize=chunksize)
+        assert (stats["rows_in"], stats["rows_filtered"], stats["rows_out"]) == (len(df), len(expected_filtered), len(expected))
+        got = _read(sink)
+        if ext == "csv":
+            expected_out = pd.read_csv(pd.io.common.StringIO(expected.to_csv(index=False)))
+        else:
+            expected_out = expected.reset_index(drop=True)
+        pd.testing.assert_frame_equal(got, expected_out, check_dtype=ext == "parquet")
+        assert len(_read(filtered_sink)) == len(expected_filtered)
+
+
+def test_global_steps_become_constant_fills_and_clips(source):
+    path, df = source
+    dtype = infer_stream_dtypes(path, 97)
+    pipe = _Pipeline(lambda: iter_csv_chunks(path, 97, dtype=dtype), compiled_plan(FILTER))
+    ops = _resolve_plan(pipe, CASES["global_steps"]["cleaning_plan"])
+
+    filtered, _ = process(df, {"filter_ast": FILTER})
+    amount = numeric_values(filtered["amount"])
+    lower, upper = iqr_fences(numeric_stats(amount), 1.5)
+    clipped = filtered["amount"].clip(lower, upper)
+    steps = [step for kind, payload in ops if kind == "steps" for step in payload]
+    assert steps[0] == {"clip_values": {"columns": ["amount"], "min": lower, "max": upper}}
+    assert steps[1] == {"fillna_numeric": {"columns": ["amount"], "strategy": "constant", "value": numeric_stats(numeric_values(clipped))["median"]}}
+    assert steps[2]["fillna_categorical"]["value"] == filtered["city"].value_counts().idxmax()
+    dedupes = [payload for kind, payload in ops if kind == "dedupe"]
+    assert len(dedupes) == 1 and dedupes[0].keep == "last" and dedupes[0].keep_positions is not None
+    assert steps[-1]["fillna_numeric"]["strategy"] == "constant"  # the mean, over the deduplicated stream
+    assert pipe.passes == 5  # one stats pass per global step
+
+
+@pytest.mark.parametrize("keep", ["first", "last", False])
+def test_dedupe_across_chunks(keep):
+    df = pd.DataFrame({"k": [1, 2, 1, 3, 2, 1, 4], "v": list("abcdefg")})
+    chunks = [df.iloc[i:i + 2] for i in range(0, len(df), 2)]
+    dedupe = _Dedupe(["k"], keep)
+    if keep != "first":
+        dedupe.collect(iter(chunks))
+    dedupe.reset()
+    got = pd.concat([dedupe.apply(c) for c in chunks])
+    pd.testing.assert_frame_equal(got, df.drop_duplicates(subset=["k"], keep=keep))
@@ -0,0 +1,57 @@
+import pandas as pd
+
+import synth
+
+SCHEMA = {"fields": [
+    {"name": "customer_id", "type": "String"},
+    {"name": "first_name", "type": "String"},
+    {"name": "email", "type": "String", "null_ratio": 0.2},
+    {"name": "paid", "type": "String"},
+    {"name": "age", "type": "Integer", "constraints": "between 18 and 65", "null_ratio": 0.1},
+    {"name": "joined", "type": "Date"},
+]}
+
+
+def test_data_does_not_depend_on_chunking(tmp_path):
+    rows = synth.SEED_BLOCK_ROWS + 1234
+    whole = synth.generate_df(SCHEMA, rows=rows, seed=3)
+    for chunk_rows in (1000, synth.SEED_BLOCK_ROWS, 50_000, 10 ** 6):
+        chunked = pd.concat(synth.iter_chunks(SCHEMA, rows, seed=3, chunk_rows=chunk_rows))
+        pd.testing.assert_frame_equal(chunked, whole, check_dtype=False)
+
+    path = str(tmp_path / "data.csv")
+    assert synth.write_csv(SCHEMA, path, rows=rows, seed=3, chunk_rows=1000) == rows
+    written = pd.read_csv(path, dtype={"paid": str})
+    assert written["email"].isna().tolist() == whole["email"].isna().tolist()
+    assert written["customer_id"].tolist() == whole["customer_id"].tolist()
+
+
+def test_chunk_sizes():
+    sizes = [len(c) for c in synth.iter_chunks(SCHEMA, 2500, chunk_rows=1000)]
+    assert sizes == [1000, 1000, 500]
+    assert list(synth.iter_chunks(SCHEMA, 0)) == []
+
+
+def test_id_columns_are_whole_tokens():
+    df = synth.generate_df({"fields": [
+        {"name": "customer_id", "type": "String"}, {"name": "orderId", "type": "String"},
+        {"name": "id", "type": "String"}, {"name": "paid", "type": "String"}, {"name": "valid", "type": "String"},
+    ]}, rows=3)
+    assert df["customer_id"].tolist() == ["CUST00000001", "CUST00000002", "CUST00000003"]
+    assert df["orderId"].iloc[0] == "ORDE00000001"
+    assert df["id"].iloc[2] == "ID00000003"
+    assert df["paid"].str.startswith("paid_").all() and df["valid"].str.startswith("valid_").all()
+
+
+def test_reversed_ranges_are_swapped(monkeypatch):
+    warnings = []
+    monkeypatch.setattr(synth.logger, "warning", lambda msg, *args: warnings.append(msg % args))
+    df = synth.generate_df({"fields": [
+        {"name": "qty", "type": "Integer", "constraints": "between 5 and 3"},
+        {"name": "price", "type": "Float", "constraints": ">= 9.5 and <= 2"},
+        {"name": "on", "type": "Date", "constraints": "2024-03-01 to 2024-01-01"},
+    ]}, rows=500)
+    assert df["qty"].between(3, 5).all() and set(df["qty"]) == {3, 4, 5}
+    assert df["price"].between(2, 9.5).all()
+    assert df["on"].between(pd.Timestamp("2024-01-01"), pd.Timestamp("2024-03-01")).all()
+    assert len(warnings) == 3 and all("reversed" in w for w in warnings)
@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import json
+import os
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+import pandas as pd
+
+
+class Span:
+    """One timed unit of work (a pipeline stage, cleaning step or AST node)."""
+
+    __slots__ = ("name", "kind", "start_ns", "end_ns", "attrs", "children", "span_id")
+
+    def __init__(self, name: str, kind: str, span_id: int, attrs: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.kind = kind
+        self.span_id = span_id
+        self.start_ns = time.time_ns()
+        self.end_ns = self.start_ns
+        self.attrs: Dict[str, Any] = dict(attrs or {})
+        self.children: List["Span"] = []
+
+    @property
+    def duration_s(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e9
+
+    @property
+    def self_s(self) -> float:
+        return max(self.duration_s - sum(c.duration_s for c in self.children), 0.0)
+
+
+class Trace:
+    """
+    Opt-in instrumentation for `t.process`, `t.run_cleaning_plan` and
+    `t.apply_filter_ast`: pass `trace=Trace()` and inspect it afterwards.
+
+    Cleaning-step spans carry rows_in, rows_out, mem_delta_bytes and
+    cells_changed; filter-node spans carry rows (evaluated), selected and
+    selectivity. `memory="deep"` measures object columns by content (slower).
+    Export with `to_records`, `write_otel` (OTLP/JSON spans) or
+    `write_folded` (flamegraph.pl / speedscope folded stacks).
+    """
+
+    def __init__(self, memory: str = "shallow"):
+        self.memory = memory
+        self.roots: List[Span] = []
+        self._stack: List[Span] = []
+        self._next_id = 1
+        self._trace_id = os.urandom(16).hex()
+
+    def frame_bytes(self, df: pd.DataFrame) -> int:
+        return int(df.memory_usage(deep=self.memory == "deep", index=False).sum())
+
+    @contextmanager
+    def span(self, name: str, kind: str = "internal", **attrs: Any) -> Iterator[Span]:
+        s = Span(name, kind, self._next_id, attrs)
+        self._next_id += 1
+        (self._stack[-1].children if self._stack else self.roots).append(s)
+        self._stack.append(s)
+        try:
+            yield s
+        finally:
+            s.end_ns = time.time_ns()
+            self._stack.pop()
+
+    def spans(self) -> Iterator[tuple]:
+        """Depth-first (span, parent, path) triples."""
+        def walk(span: Span, parent: Optional[Span], path: List[str]):
+            here = path + [span.name]
+            yield span, parent, here
+            for child in span.children:
+                yield from walk(child, span, here)
+        for root in self.roots:
+            yield from walk(root, None, [])
+
+    # ---------- export ----------
+    def to_records(self) -> List[Dict[str, Any]]:
+        """Flat rows (one per span) for quick inspection, e.g. pd.DataFrame(trace.to_records())."""
+        return [
+            {"path": ";".join(path), "kind": s.kind, "duration_s": s.duration_s, "self_s": s.self_s, **s.attrs}
+            for s, _, path in self.spans()
+        ]
+
+    def to_otel(self) -> Dict[str, Any]:
+        """OTLP/JSON-shaped payload (resourceSpans -> scopeSpans -> spans)."""
+        def attr(key: str, value: Any) -> Dict[str, Any]:
+            if isinstance(value, bool):
+                return {"key": key, "value": {"boolValue": value}}
+            if isinstance(value, int):
+                return {"key": key, "value": {"intValue": str(value)}}
+            if isinstance(value, float):
+                return {"key": key, "value": {"doubleValue": value}}
+            return {"key": key, "value": {"stringValue": str(value)}}
+
+        spans = [{
+            "traceId": self._trace_id,
+            "spanId": f"{s.span_id:016x}",
+            "parentSpanId": f"{p.span_id:016x}" if p else "",
+            "name": s.name,
+            "kind": 1,
+            "startTimeUnixNano": str(s.start_ns),
+            "endTimeUnixNano": str(s.end_ns),
+            "attributes": [attr("data_zen.kind", s.kind)] + [attr(k, v) for k, v in s.attrs.items()],
+        } for s, p, _ in self.spans()]
+        return {"resourceSpans": [{
+            "resource": {"attributes": [attr("service.name", "data_zen")]},
+            "scopeSpans": [{"scope": {"name": "data_zen.tracing"}, "spans": spans}],
+        }]}
+
+    def to_folded(self) -> str:
+        """Folded stacks ("a;b;c <self microseconds>") for flamegraph tools."""
+        lines = []
+        for s, _, path in self.spans():
+            us = int(round(s.self_s * 1e6))
+            if us > 0:
+                lines.append(";".join(p.replace(";", ",").replace(" ", "_") for p in path) + f" {us}")
+        return "\n".join(lines) + ("\n" if lines else "")
+
+    def write_otel(self, path: str) -> None:
+        with open(path, "w") as f:
+            json.dump(self.to_otel(), f, indent=2)
+
+    def write_folded(self, path: str) -> None:
+        with open(path, "w") as f:
+            f.write(self.to_folded())
+
+
+def cells_changed(before: pd.DataFrame, after: pd.DataFrame, columns: List[str]) -> int:
+    """Count cells in `columns` whose value differs between before and after (rows still present)."""
+    total = 0
+    for col in columns:
+        if col not in before.columns or col not in after.columns:
+            continue
+        b = after[col]
+        if before.index.is_unique:
+            a = before[col].reindex(after.index)
+        elif len(before) == len(after):
+            a = before[col].set_axis(after.index)
+        else:
+            continue
+        try:
+            same = (a == b).to_numpy(dtype=bool, na_value=False)
+        except (TypeError, ValueError):
+            same = (a.astype(object) == b.astype(object)).to_numpy(dtype=bool, na_value=False)
+        same = same | (a.isna() & b.isna()).to_numpy()
+        total += int((~same).sum())
+    return total
@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import tempfile
+import time
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional, Sequence, Union
+
+from llm_pool import DEFAULT_MODEL, LLMPool, shared_pool
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_PATH = os.path.join(tempfile.gettempdir(), "data_zen_translations.sqlite")
+USER_TEMPLATE = "Now convert the following English condition into JSON AST: \n{instruction}"
+COLUMNS_PLACEHOLDER = "[INSERT_COLUMNS_JSON_OR_EMPTY]"
+
+Columns = Union[None, Sequence[str], Dict[str, str]]
+
+
+def normalize_instruction(text: str) -> str:
+    # Only whitespace is normalized: values such as "US" vs "us" are case-sensitive.
+    return re.sub(r"\s+", " ", text or "").strip()
+
+
+def parse_json_response(text: str) -> Any:
+    """Parse an LLM reply as JSON, tolerating a surrounding ```json fence."""
+    text = (text or "").strip()
+    fenced = re.match(r"^```(?:json)?\s*(.*?)\s*```$", text, re.S)
+    return json.loads(fenced.group(1) if fenced else text)
+
+
+class TranslationCache:
+    """Persistent (SQLite) cache of LLM replies, keyed by `TranslationService.cache_key`."""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.environ.get("DATA_ZEN_TRANSLATION_CACHE") or DEFAULT_CACHE_PATH
+        with self._connect() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS translations (key TEXT PRIMARY KEY, response TEXT, created REAL)")
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30)
+
+    def get(self, key: str) -> Optional[str]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT response FROM translations WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def put(self, key: str, response: str) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO translations (key, response, created) VALUES (?, ?, ?)",
+                (key, response, time.time()),
+            )
+
+
+class StubClient:
+    """
+    Offline stand-in for `OpenAI()`: `chat.completions.create(...)` returns
+    `responder(messages)` in the same shape as the real client.
+    """
+
+    def __init__(self, responder: Callable[[List[Dict[str, str]]], str]):
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+        self._responder = responder
+
+    def _create(self, model: str, messages: List[Dict[str, str]], **kwargs: Any) -> Any:
+        self.calls += 1
+        content = self._responder(messages)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+class TranslationService:
+    """
+    Shared English -> JSON translation for DemoGE / DemoDP / DemoDC and the
+    dataset-schema generator.
+
+    Replies are cached on (prompt-template hash, model, temperature, normalized
+    instruction, column schema); a repeat instruction never reaches the
+    network. `temperature` (None: the model's default) is sent with every
+    call; use 0 where the cached reply should be the deterministic one. Only
+    replies that parse as JSON are cached. Calls go through an LLMPool (the
+    process-wide one unless a client or pool is given), which bounds
+    concurrency, coalesces identical in-flight requests and retries rate-limit
+    / transient errors; `translate_many` submits a whole batch at once.
+    """
+
+    def __init__(
+        self,
+        client: Any = None,
+        model: str = DEFAULT_MODEL,
+        cache: Optional[TranslationCache] = None,
+        max_concurrency: int = 8,
+        max_retries: int = 3,
+        backoff: float = 0.5,
+        pool: Optional[LLMPool] = None,
+        user_template: str = USER_TEMPLATE,
+        temperature: Optional[float] = None,
+    ):
+        if pool is None:
+            pool = shared_pool() if client is None else LLMPool(client, max_concurrency, max_retries, backoff)
+        self.pool = pool
+        self.model = model
+        self.cache = cache if cache is not None else TranslationCache()
+        self.user_template = user_template
+        self.temperature = temperature
+
+    # ---------- keys & prompts ----------
+    @staticmethod
+    def _schema_json(columns: Columns) -> str:
+        if not columns:
+            return "[]"
+        if isinstance(columns, dict):
+            return json.dumps(columns, sort_keys=True)
+        return json.dumps(sorted(columns))
+
+    def cache_key(self, system_prompt: str, instruction: str, columns: Columns = None) -> str:
+        template = system_prompt if self.user_template == USER_TEMPLATE else f"{system_prompt}\0{self.user_template}"
+        template_hash = hashlib.sha256(template.encode("utf-8")).hexdigest()
+        parts = [template_hash, self.model, normalize_instruction(instruction), self._schema_json(columns)]
+        if self.temperature is not None:
+            parts.append(self.temperature)  # keys of default-temperature services are unchanged
+        raw = json.dumps(parts)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _messages(self, system_prompt: str, instruction: str, columns: Columns) -> List[Dict[str, str]]:
+        if COLUMNS_PLACEHOLDER in system_prompt:
+            system_prompt = system_prompt.replace(COLUMNS_PLACEHOLDER, self._schema_json(columns))
+        return [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": self.user_template.format(instruction=normalize_instruction(instruction))},
+        ]
+
+    def _store(self, key: str, response: str) -> None:
+        try:
+            parse_json_response(response)
+        except (TypeError, ValueError):
+            logger.warning("LLM reply is not valid JSON; not caching it.")
+            return
+        self.cache.put(key, response)
+
+    # ---------- sync API ----------
+    def translate(self, system_prompt: str, instruction: str, columns: Columns = None) -> str:
+        key = self.cache_key(system_prompt, instruction, columns)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        response = self.pool.complete(self._messages(system_prompt, instruction, columns), self.model, key, self.temperature)
+        self._store(key, response)
+        return response
+
+    def translate_many(self, system_prompt: str, instructions: Sequence[str], columns: Columns = None) -> List[str]:
+        """
+        Translate a batch concurrently; results come back in input order.
+        Misses are submitted to the pool's own loop and waited on as
+        concurrent futures, so this is safe to call from inside a running
+        event loop (async callers should still prefer atranslate_many).
+        """
+        keys = [self.cache_key(system_prompt, text, columns) for text in instructions]
+        results: List[Any] = [self.cache.get(key) for key in keys]
+        pending = {
+            i: self.pool.submit(self._messages(system_prompt, text, columns), self.model, keys[i], self.temperature)
+            for i, text in enumerate(instructions)
+            if results[i] is None
+        }
+        for i, future in pending.items():
+            results[i] = future.result()
+            self._store(keys[i], results[i])
+        return results
+
+    # ---------- async API ----------
+    async def atranslate(self, system_prompt: str, instruction: str, columns: Columns = None) -> str:
+        key = self.cache_key(system_prompt, instruction, columns)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        response = await self.pool.acomplete(self._messages(system_prompt, instruction, columns), self.model, key, self.temperature)
+        self._store(key, response)
+        return response
+
+    async def atranslate_many(self, system_prompt: str, instructions: Sequence[str], columns: Columns = None) -> List[str]:
+        """Translate a batch concurrently; results come back in input order."""
+        return list(await asyncio.gather(*(self.atranslate(system_prompt, text, columns) for text in instructions)))
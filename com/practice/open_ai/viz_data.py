@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import logging
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from profiler import CoMoments
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BINS = 30
+DEFAULT_BLOCK_ROWS = 100_000
+BIN_METHODS = {"fixed", "quantile"}
+
+
+def _finite(s: pd.Series) -> np.ndarray:
+    values = pd.to_numeric(s, errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+    return values[np.isfinite(values)]
+
+
+def bin_edges(values: np.ndarray, bins: int = DEFAULT_BINS, method: str = "fixed", integer: bool = False) -> np.ndarray:
+    """
+    Histogram bin edges for finite values: `bins` equal-width bins ("fixed")
+    or bins holding roughly equal numbers of rows ("quantile"; tied quantiles
+    are merged, so there may be fewer). Integer columns whose range fits in
+    `bins` get one unit-wide bin per value, centred on it.
+    """
+    lo, hi = float(values.min()), float(values.max())
+    if integer and hi - lo + 1 <= bins:
+        return np.arange(lo - 0.5, hi + 1.0)
+    if method == "quantile":
+        edges = np.unique(np.quantile(values, np.linspace(0, 1, bins + 1)))
+        return edges if len(edges) > 1 else np.array([lo - 0.5, hi + 0.5])
+    if lo == hi:
+        return np.array([lo - 0.5, hi + 0.5])
+    return np.linspace(lo, hi, bins + 1)
+
+
+def column_bins(s: pd.Series, bins: int = DEFAULT_BINS, method: str = "fixed") -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """The finite values of a numeric column and their `bin_edges` (None if there are no values)."""
+    if method not in BIN_METHODS:
+        logger.warning("Unknown bin method '%s'; using fixed-width bins.", method)
+        method = "fixed"
+    values = _finite(s)
+    if not len(values):
+        return values, None
+    integer = pd.api.types.is_integer_dtype(s) or bool(np.all(values == np.round(values)))
+    return values, bin_edges(values, bins, method, integer)
+
+
+def histogram(s: pd.Series, bins: int = DEFAULT_BINS, method: str = "fixed") -> pd.DataFrame:
+    """
+    Binned row counts of a numeric column (missing values ignored) with one
+    row per bin: left, right, count. The chart size depends on `bins`, not
+    on the number of distinct values.
+    """
+    values, edges = column_bins(s, bins, method)
+    if edges is None:
+        return pd.DataFrame({"left": [], "right": [], "count": []})
+    counts, _ = np.histogram(values, bins=edges)
+    return pd.DataFrame({"left": edges[:-1], "right": edges[1:], "count": counts})
+
+
+def histogram_chart(hist: pd.DataFrame) -> pd.Series:
+    """Counts indexed by bin label ("[left, right)"), ready for st.bar_chart."""
+    labels = [f"[{l:.4g}, {r:.4g})" for l, r in zip(hist["left"], hist["right"])]
+    return pd.Series(hist["count"].to_numpy(), index=pd.Index(labels, name="bin"), name="count")
+
+
+def corr_matrix(
+    df: pd.DataFrame,
+    columns: Optional[List[str]] = None,
+    block_rows: int = DEFAULT_BLOCK_ROWS,
+) -> pd.DataFrame:
+    """
+    Pearson correlation matrix with DataFrame.corr semantics (pairwise-
+    complete rows), accumulated `block_rows` rows at a time with matrix
+    products (profiler.CoMoments). Working memory is one row block of the
+    numeric columns plus a few p x p matrices, and the products run in BLAS
+    instead of pandas' per-pair loop, which matters with hundreds of columns.
+    """
+    num = df[columns] if columns is not None else df.select_dtypes("number")
+    num = num.loc[:, [not pd.api.types.is_bool_dtype(num[c]) for c in num.columns]]
+    cols = list(num.columns)
+    acc = CoMoments()
+    for start in range(0, len(num), block_rows):
+        block = num.iloc[start:start + block_rows]
+        acc.update({c: block[c].to_numpy(dtype="float64", na_value=np.nan) for c in cols})
+    if not acc.columns:
+        return pd.DataFrame(np.full((len(cols), len(cols)), np.nan), index=cols, columns=cols)
+    return acc.corr(cols)